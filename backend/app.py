@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, send_file, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from datetime import datetime
@@ -7,34 +7,87 @@ from flask_migrate import Migrate
 import logging
 from marshmallow import Schema, fields, validate, ValidationError
 from functools import wraps
+import click
 import secrets
-from werkzeug.security import generate_password_hash, check_password_hash
 import jwt
 from datetime import timedelta
 import traceback
+from logging_config import StructuredLogger, async_handler_from_env, sampling_from_env
+from password_hashing import VerificacionSaturada, verifier_from_env
+from cache import LRUCache, VersionedCache
+from importacion import leer_bloques, validar_bloque
+from json_rapido import comprimir, provider_from_env
+from exportacion import csv_stream, parquet_stream
+from busqueda import IndiceSincronizado
+from concurrencia import opciones_engine, perfil_desde_env, stats_pool
+from metricas import Metricas
+from perfilado import consultas_lentas_from_env, perfilador_from_env
+from reposicion import borradores, estadisticas_demanda, plazos_por_proveedor, sugerir
+import base64
+import csv
+import io
+import json
+import time
+import uuid
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+import pandas as pd
+from sqlalchemy import and_, case, cast, delete, func, insert, literal, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
 
 # Configurar logging básico
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger()
 
+logstash_handler = None
 try:
     import logstash
     LOGSTASH_HOST = os.getenv("LOGSTASH_HOST")
     LOGSTASH_PORT = int(os.getenv("LOGSTASH_PORT", "5000"))
     if LOGSTASH_HOST:
-        logstash_handler = logstash.TCPLogstashHandler(LOGSTASH_HOST, LOGSTASH_PORT, version=1)
+        # El envío a Logstash se hace desde un hilo aparte, en lotes y con cola
+        # acotada, para que la latencia de las peticiones no dependa de Logstash
+        logstash_handler = async_handler_from_env(
+            logstash.TCPLogstashHandler(LOGSTASH_HOST, LOGSTASH_PORT, version=1))
         logger.addHandler(logstash_handler)
         logger.info(f"LogstashHandler inicializado para {LOGSTASH_HOST}:{LOGSTASH_PORT}")
 except Exception as e:
     logger.warning(f"No se pudo inicializar LogstashHandler: {e}")
 
+# Eventos con payload perezoso y muestreo por tipo (LOG_SAMPLING)
+eventos = StructuredLogger(logger, sampling_from_env())
+
+CABECERAS_SENSIBLES = {'authorization', 'x-api-token', 'cookie'}
+
+def cabeceras_seguras():
+    return {k: ('***' if k.lower() in CABECERAS_SENSIBLES else v) for k, v in request.headers.items()}
+
 app = Flask(__name__)
+# orjson por defecto (JSON_PROVIDER=stdlib vuelve al módulo json)
+app.json = provider_from_env()(app)
 CORS(app, origins=["http://localhost:8080", "http://127.0.0.1:8080"])
 
 @app.route('/api/health')
 def health_check():
     return jsonify({"status": "healthy"}), 200
 
+@app.route('/api/health/cache')
+def cache_stats():
+    return jsonify({"jwt": jwt_cache.stats(), "catalogo": catalogo_cache.stats(),
+                    "busqueda": indice_busqueda.stats()}), 200
+
+@app.route('/api/health/pool')
+def pool_stats():
+    return jsonify({"pid": os.getpid(), **stats_pool(db.engine)}), 200
+
+@app.route('/api/health/logging')
+def logging_stats():
+    if logstash_handler is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **logstash_handler.stats()}), 200
+
 # Configuración de seguridad
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', secrets.token_hex(32))
 app.config['SESSION_COOKIE_SECURE'] = True
@@ -50,35 +103,33 @@ def add_security_headers(response):
     response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
     return response
 
+# gzip/brotli según Accept-Encoding para las respuestas que pasan de COMPRESS_MIN_BYTES
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+
+@app.after_request
+def comprimir_respuesta(response):
+    if COMPRESS_MIN_BYTES < 0:
+        return response
+    return comprimir(response, request.headers.get('Accept-Encoding'), COMPRESS_MIN_BYTES)
+
 # Decorador para validar tokens
 def require_token(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        logger.info(f"Validando token para ruta: {request.path}", extra={
-            'type': 'auth',
-            'method': request.method,
-            'path': request.path,
-            'headers': dict(request.headers)
-        })
+        eventos.info('auth', lambda: f"Validando token para ruta: {request.path}",
+                     lambda: {'method': request.method, 'path': request.path},
+                     detalle=lambda: {'headers': cabeceras_seguras()})
         token = request.headers.get('X-API-Token')
         expected_token = os.getenv('API_TOKEN')
         
         if not token:
-            logger.error("No se recibió token en la petición", extra={
-                'type': 'auth_error',
-                'error': 'token_missing'
-            })
+            eventos.error('auth_error', "No se recibió token en la petición", {'error': 'token_missing'})
             return jsonify({"error": "Token no proporcionado"}), 401
         if token != expected_token:
-            logger.error("Token inválido", extra={
-                'type': 'auth_error',
-                'error': 'invalid_token'
-            })
+            eventos.error('auth_error', "Token inválido", {'error': 'invalid_token'})
             return jsonify({"error": "Token inválido"}), 401
             
-        logger.info("Token válido, procediendo con la petición", extra={
-            'type': 'auth_success'
-        })
+        eventos.info('auth_success', "Token válido, procediendo con la petición")
         return f(*args, **kwargs)
     return decorated
 
@@ -86,9 +137,27 @@ def require_token(f):
 DATABASE_URL = os.getenv('DATABASE_URL', 'postgresql://postgres:postgres@db:5432/inventario')
 app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# El pool de cada worker se dimensiona con los hilos del perfil de gunicorn
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opciones_engine(DATABASE_URL, perfil_desde_env())
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 
+# Latencia por ruta, sentencias SQL por petición y estado del pool
+metricas = Metricas()
+with app.app_context():
+    metricas.instrumentar(app, db.engine)
+
+@app.route('/api/metrics')
+def exportar_metricas():
+    cuerpo, content_type = metricas.exportar()
+    return Response(cuerpo, content_type=content_type)
+
+# Consultas lentas (solo si SLOW_QUERY_MS está definida)
+consultas_lentas = consultas_lentas_from_env()
+if consultas_lentas is not None:
+    with app.app_context():
+        consultas_lentas.instrumentar(db.engine)
+
 # Log de prueba explícito para Logstash
 logger.info("PRUEBA DE LOG A LOGSTASH", extra={"type": "test"})
 
@@ -98,47 +167,29 @@ logging.error("PRUEBA ERROR DESDE EL RAÍZ")
 @app.errorhandler(404)
 def not_found_error(error):
     logger.error("PRUEBA ERROR SIMPLE")
-    logger.error(f"Recurso no encontrado: {request.path}", extra={
-        'type': 'not_found',
-        'path': request.path,
-        'method': request.method,
-        'headers': dict(request.headers)
-    })
+    eventos.error('not_found', lambda: f"Recurso no encontrado: {request.path}",
+                  lambda: {'path': request.path, 'method': request.method},
+                  detalle=lambda: {'headers': cabeceras_seguras()})
     return jsonify({"error": "Recurso no encontrado"}), 404
 
 @app.errorhandler(500)
 def internal_error(error):
-    logger.error(
-        f"Error interno del servidor: {str(error)}\n{traceback.format_exc()}",
-        extra={
-            'type': 'server_error',
-            'error': str(error),
-            'path': request.path,
-            'method': request.method
-        }
-    )
+    eventos.error('server_error', lambda: f"Error interno del servidor: {str(error)}\n{traceback.format_exc()}",
+                  lambda: {'error': str(error), 'path': request.path, 'method': request.method})
     return jsonify({"error": "Error interno del servidor"}), 500
 
 @app.errorhandler(400)
 def bad_request_error(error):
-    logger.error(f"Error en la solicitud: {str(error)}", extra={
-        'type': 'bad_request',
-        'error': str(error),
-        'path': request.path,
-        'method': request.method,
-        'data': request.get_json(silent=True)
-    })
+    eventos.error('bad_request', lambda: f"Error en la solicitud: {str(error)}",
+                  lambda: {'error': str(error), 'path': request.path, 'method': request.method},
+                  detalle=lambda: {'data': request.get_json(silent=True)})
     return jsonify({"error": "Error en la solicitud"}), 400
 
 @app.errorhandler(ValidationError)
 def validation_error(error):
-    logger.error(f"Error de validación: {str(error)}", extra={
-        'type': 'validation_error',
-        'error': str(error),
-        'path': request.path,
-        'method': request.method,
-        'data': request.get_json(silent=True)
-    })
+    eventos.error('validation_error', lambda: f"Error de validación: {str(error)}",
+                  lambda: {'error': str(error), 'path': request.path, 'method': request.method},
+                  detalle=lambda: {'data': request.get_json(silent=True)})
     return jsonify({"error": "Error de validación", "detalles": error.messages}), 400
 
 # Modelos
@@ -166,6 +217,16 @@ class Producto(db.Model):
     fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
     fecha_actualizacion = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Índices de la migración b71f3e9c2d58
+    __table_args__ = (
+        db.Index('ix_producto_categoria_id', 'categoria_id'),
+        db.Index('ix_producto_nombre_id', 'nombre', 'id'),
+        db.Index('ix_producto_nombre_trgm', 'nombre',
+                 postgresql_using='gin', postgresql_ops={'nombre': 'gin_trgm_ops'}),
+        db.Index('ix_producto_sku_trgm', 'sku',
+                 postgresql_using='gin', postgresql_ops={'sku': 'gin_trgm_ops'}),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -200,6 +261,9 @@ class Proveedor(db.Model):
             'fecha_actualizacion': self.fecha_actualizacion.isoformat()
         }
 
+def inicio_de_hoy():
+    return datetime.combine(datetime.now().date(), datetime.min.time())
+
 class OrdenCompra(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     proveedor_id = db.Column(db.Integer, db.ForeignKey('proveedor.id'), nullable=False)
@@ -210,27 +274,41 @@ class OrdenCompra(db.Model):
     items = db.relationship('OrdenCompraItem', backref='orden_compra', lazy=True, cascade='all, delete-orphan')
     proveedor = db.relationship('Proveedor', backref='ordenes_compra')
 
+    __table_args__ = (
+        db.Index('ix_orden_compra_estado_fecha_entrega', 'estado', 'fecha_entrega'),
+        db.Index('ix_orden_compra_proveedor_id', 'proveedor_id'),
+    )
+
+    @hybrid_property
+    def estado_efectivo(self):
+        # 'vencida': sigue pendiente pasado el día de entrega
+        if self.estado == 'pendiente' and self.fecha_entrega and self.fecha_entrega < inicio_de_hoy():
+            return 'vencida'
+        return self.estado
+
+    @estado_efectivo.expression
+    def estado_efectivo(cls):
+        return case((cls.filtro_estado('vencida'), 'vencida'), else_=cls.estado)
+
+    @classmethod
+    def filtro_estado(cls, estado):
+        """Condición WHERE para un estado efectivo, que puede usar el índice (estado, fecha_entrega)."""
+        hoy = inicio_de_hoy()
+        if estado == 'vencida':
+            return and_(cls.estado == 'pendiente', cls.fecha_entrega < hoy)
+        if estado == 'pendiente':
+            return and_(cls.estado == 'pendiente',
+                        or_(cls.fecha_entrega.is_(None), cls.fecha_entrega >= hoy))
+        return cls.estado == estado
+
     def to_dict(self):
-        from datetime import date, datetime as dt
-        estado = self.estado
-        fecha_entrega = self.fecha_entrega
-        # Asegúrate de que fecha_entrega es un datetime antes de llamar a .date()
-        if estado == "pendiente" and fecha_entrega:
-            # Si es string, intenta convertirlo
-            if isinstance(fecha_entrega, str):
-                try:
-                    fecha_entrega = dt.fromisoformat(fecha_entrega)
-                except Exception:
-                    fecha_entrega = None
-            if fecha_entrega and fecha_entrega.date() < date.today():
-                estado = "vencida"
         return {
             'id': self.id,
             'proveedor_id': self.proveedor_id,
             'proveedor': self.proveedor.nombre if self.proveedor else None,
             'fecha_creacion': self.fecha_creacion.isoformat(),
             'fecha_entrega': self.fecha_entrega.isoformat() if self.fecha_entrega else None,
-            'estado': estado,
+            'estado': self.estado_efectivo,
             'total': float(self.total),
             'items': [item.to_dict() for item in self.items]
         }
@@ -244,6 +322,11 @@ class OrdenCompraItem(db.Model):
     subtotal = db.Column(db.Numeric(10, 2), nullable=False)
     producto = db.relationship('Producto')
 
+    __table_args__ = (
+        db.Index('ix_orden_compra_item_orden_compra_id', 'orden_compra_id'),
+        db.Index('ix_orden_compra_item_producto_id', 'producto_id'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -264,6 +347,11 @@ class MovimientoInventario(db.Model):
     usuario = db.Column(db.String(100))  # Opcional, si tienes usuarios
     producto = db.relationship('Producto')
 
+    __table_args__ = (
+        db.Index('ix_movimiento_inventario_producto_id_fecha', 'producto_id', 'fecha'),
+        db.Index('ix_movimiento_inventario_fecha', 'fecha'),
+    )
+
     def to_dict(self):
         return {
             'fecha': self.fecha.strftime('%Y-%m-%d'),
@@ -273,6 +361,55 @@ class MovimientoInventario(db.Model):
             'usuario': self.usuario or ''
         }
 
+class ProductoStaging(db.Model):
+    # Tabla intermedia de la importación masiva; las filas viven solo dentro
+    # de la transacción de cada importación
+    __tablename__ = 'producto_staging'
+    id = db.Column(db.Integer, primary_key=True)
+    import_id = db.Column(db.String(36), nullable=False, index=True)
+    fila = db.Column(db.Integer, nullable=False)
+    nombre = db.Column(db.String(100))
+    sku = db.Column(db.String(50))
+    precio_costo = db.Column(db.Numeric(10, 2))
+    precio_venta = db.Column(db.Numeric(10, 2))
+    descripcion = db.Column(db.Text)
+    cantidad = db.Column(db.Integer)
+    umbral_reorden = db.Column(db.Integer)
+    categoria_id = db.Column(db.Integer)
+
+class ResumenInventario(db.Model):
+    # Resumen por categoría mantenido en cada escritura de productos y stock.
+    # categoria_clave 0 agrupa los productos sin categoría.
+    __tablename__ = 'resumen_inventario'
+    categoria_clave = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    productos = db.Column(db.Integer, nullable=False, default=0)
+    unidades = db.Column(db.BigInteger, nullable=False, default=0)
+    valor_total = db.Column(db.Numeric(16, 2), nullable=False, default=0)
+    bajo_stock = db.Column(db.Integer, nullable=False, default=0)
+
+class MovimientoDiario(db.Model):
+    # Movimientos sumados por producto, día y tipo, mantenidos en cada
+    # escritura de movimientos
+    __tablename__ = 'movimiento_diario'
+    producto_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    dia = db.Column(db.Date, primary_key=True)
+    tipo = db.Column(db.String(20), primary_key=True)
+    cantidad = db.Column(db.BigInteger, nullable=False, default=0)
+    movimientos = db.Column(db.Integer, nullable=False, default=0)
+
+class ProductoBusquedaCambio(db.Model):
+    # Registro de productos escritos, para que cada proceso ponga al día su
+    # índice de búsqueda en memoria (ver busqueda.py)
+    __tablename__ = 'producto_busqueda_cambio'
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    producto_id = db.Column(db.Integer)  # None: recargar todo
+    fecha = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+class CacheVersion(db.Model):
+    __tablename__ = 'cache_version'
+    nombre = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
 class Usuario(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
@@ -280,7 +417,7 @@ class Usuario(db.Model):
     rol = db.Column(db.String(20), nullable=False)
 
     def verify_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_verifier.verify(self.password_hash, password)
 
     def to_dict(self):
         return {
@@ -312,11 +449,336 @@ class MovimientoSchema(Schema):
     cantidad = fields.Int(required=True)
     usuario = fields.Str(allow_none=True)
 
+# Verificación de contraseñas fuera del hilo de la petición, con una cola
+# acotada por debajo de los hilos del worker
+password_verifier = verifier_from_env(perfil_desde_env()['threads'])
+
+# Caché de lectura del catálogo (categorías, proveedores, productos)
+def leer_versiones_cache():
+    return dict(db.session.execute(select(CacheVersion.nombre, CacheVersion.version)).all())
+
+def incrementar_versiones_cache(nombres):
+    versiones = {}
+    for nombre in sorted(set(nombres)):
+        version = db.session.execute(
+            update(CacheVersion)
+            .where(CacheVersion.nombre == nombre)
+            .values(version=CacheVersion.version + 1)
+            .returning(CacheVersion.version)
+        ).scalar()
+        if version is None:
+            version = 1
+            db.session.add(CacheVersion(nombre=nombre, version=version))
+        versiones[nombre] = version
+    db.session.commit()
+    return versiones
+
+catalogo_cache = VersionedCache(
+    leer_versiones_cache,
+    incrementar_versiones_cache,
+    maxsize=int(os.getenv('CATALOG_CACHE_SIZE', '2048')),
+    ttl=float(os.getenv('CATALOG_CACHE_TTL', '300')),
+    intervalo_version=float(os.getenv('CATALOG_CACHE_VERSION_INTERVAL', '1.0'))
+)
+
+def invalidar_catalogo(*nombres):
+    # Se llama después del commit de la escritura
+    try:
+        catalogo_cache.invalidate(*nombres)
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"No se pudo invalidar la caché del catálogo: {e}", extra={
+            'type': 'cache_error',
+            'error': str(e)
+        })
+
+def upsert_insert(modelo):
+    """INSERT con soporte de ON CONFLICT para el dialecto en uso."""
+    if db.engine.dialect.name == 'postgresql':
+        return pg_insert(modelo)
+    return sqlite_insert(modelo)
+
+# Resumen de inventario por categoría
+def estado_resumen(producto):
+    """Lo que aporta un producto al resumen: (categoria_id, cantidad, precio_costo, umbral)."""
+    return (producto.categoria_id, producto.cantidad, producto.precio_costo, producto.umbral_reorden)
+
+def actualizar_resumen(cambios):
+    """Aplica al resumen los cambios [(estado_antes, estado_despues), ...].
+
+    Un estado None significa que el producto no existía (alta) o deja de
+    existir (baja). Se ejecuta un upsert incremental por categoría afectada,
+    dentro de la transacción de quien llama.
+    """
+    deltas = {}
+    for antes, despues in cambios:
+        for estado, signo in ((antes, -1), (despues, 1)):
+            if estado is None:
+                continue
+            categoria_id, cantidad, precio_costo, umbral = estado
+            cantidad = cantidad or 0
+            delta = deltas.setdefault(categoria_id or 0, [0, 0, Decimal(0), 0])
+            delta[0] += signo
+            delta[1] += signo * cantidad
+            delta[2] += signo * cantidad * Decimal(str(precio_costo or 0))
+            delta[3] += signo * (1 if umbral is not None and cantidad <= umbral else 0)
+
+    for clave in sorted(deltas):
+        if any(deltas[clave]):
+            sumar_resumen(clave, *deltas[clave])
+
+def sumar_resumen(clave, productos, unidades, valor_total, bajo_stock):
+    sentencia = upsert_insert(ResumenInventario).values(
+        categoria_clave=clave, productos=productos, unidades=unidades,
+        valor_total=valor_total, bajo_stock=bajo_stock)
+    db.session.execute(sentencia.on_conflict_do_update(
+        index_elements=['categoria_clave'],
+        set_={
+            'productos': ResumenInventario.productos + sentencia.excluded.productos,
+            'unidades': ResumenInventario.unidades + sentencia.excluded.unidades,
+            'valor_total': ResumenInventario.valor_total + sentencia.excluded.valor_total,
+            'bajo_stock': ResumenInventario.bajo_stock + sentencia.excluded.bajo_stock,
+        }))
+
+def fusionar_resumen(clave_origen, clave_destino=0):
+    """Pasa los totales de una categoría a otra (p. ej. al borrar la categoría)."""
+    fila = db.session.get(ResumenInventario, clave_origen)
+    if fila is None:
+        return
+    totales = (fila.productos, fila.unidades, fila.valor_total, fila.bajo_stock)
+    db.session.delete(fila)
+    db.session.flush()
+    sumar_resumen(clave_destino, *totales)
+
+def reconstruir_resumen():
+    """Recalcula el resumen con un recorrido completo de producto.
+
+    Devuelve las categorías cuyo resumen almacenado no coincidía con el
+    recalculado. La escritura queda en la transacción de quien llama.
+    """
+    cantidad = func.coalesce(Producto.cantidad, 0)
+    clave = func.coalesce(Producto.categoria_id, 0)
+    calculado = {
+        fila[0]: tuple(fila[1:])
+        for fila in db.session.execute(
+            select(clave,
+                   func.count(Producto.id),
+                   func.coalesce(func.sum(cantidad), 0),
+                   func.coalesce(func.sum(cantidad * func.coalesce(Producto.precio_costo, 0)), 0),
+                   func.coalesce(func.sum(case((cantidad <= Producto.umbral_reorden, 1), else_=0)), 0))
+            .group_by(clave)
+        )
+    }
+    almacenado = {
+        fila.categoria_clave: (fila.productos, fila.unidades, fila.valor_total, fila.bajo_stock)
+        for fila in ResumenInventario.query.all()
+    }
+
+    def normalizar(valores):
+        productos, unidades, valor, bajo_stock = valores or (0, 0, 0, 0)
+        return (int(productos), int(unidades), Decimal(str(valor)).quantize(Decimal('0.01')), int(bajo_stock))
+
+    diferencias = [
+        {'categoria_clave': c,
+         'almacenado': almacenado.get(c),
+         'calculado': calculado.get(c)}
+        for c in sorted(set(calculado) | set(almacenado))
+        if normalizar(calculado.get(c)) != normalizar(almacenado.get(c))
+    ]
+
+    db.session.execute(delete(ResumenInventario))
+    filas = [
+        dict(zip(('categoria_clave', 'productos', 'unidades', 'valor_total', 'bajo_stock'),
+                 (c, *normalizar(v))))
+        for c, v in calculado.items()
+    ]
+    if filas:
+        db.session.execute(insert(ResumenInventario), filas)
+    return diferencias
+
+@app.cli.command('reconstruir-resumen')
+def reconstruir_resumen_command():
+    """Reconcilia resumen_inventario con un recorrido completo de productos."""
+    diferencias = reconstruir_resumen()
+    db.session.commit()
+    for diferencia in diferencias:
+        print(f"categoria {diferencia['categoria_clave']}: "
+              f"{diferencia['almacenado']} -> {diferencia['calculado']}")
+    print(f"Resumen reconstruido ({len(diferencias)} categorías corregidas)")
+
+# Movimientos agregados por día
+def acumular_movimientos(filas):
+    """Suma al agregado diario los movimientos recién insertados.
+
+    `filas` son dicts con producto_id, tipo, cantidad y fecha. Se ejecuta un
+    upsert incremental por (producto, día, tipo), dentro de la transacción
+    de quien llama.
+    """
+    sumas = {}
+    for fila in filas:
+        clave = (fila['producto_id'], fila['fecha'].date(), fila['tipo'])
+        suma = sumas.setdefault(clave, [0, 0])
+        suma[0] += fila['cantidad']
+        suma[1] += 1
+    if not sumas:
+        return
+    sentencia = upsert_insert(MovimientoDiario)
+    db.session.execute(
+        sentencia.on_conflict_do_update(
+            index_elements=['producto_id', 'dia', 'tipo'],
+            set_={
+                'cantidad': MovimientoDiario.cantidad + sentencia.excluded.cantidad,
+                'movimientos': MovimientoDiario.movimientos + sentencia.excluded.movimientos,
+            }),
+        [{'producto_id': producto_id, 'dia': dia, 'tipo': tipo, 'cantidad': cantidad, 'movimientos': n}
+         for (producto_id, dia, tipo), (cantidad, n) in sorted(sumas.items())])
+
+def reconstruir_movimientos_diarios(desde=None):
+    """Recalcula el agregado diario desde movimiento_inventario.
+
+    Con `desde` (una fecha) solo se recalculan los días a partir de ella.
+    Devuelve las filas (producto, día, tipo) cuyo agregado almacenado no
+    coincidía con el recalculado. La escritura queda en la transacción de
+    quien llama.
+    """
+    dia = func.date(MovimientoInventario.fecha)
+    calculado = (select(MovimientoInventario.producto_id, dia, MovimientoInventario.tipo,
+                        func.sum(MovimientoInventario.cantidad), func.count(MovimientoInventario.id))
+                 # Filas viejas sin fecha o sin tipo no entran en la clave del agregado
+                 .where(MovimientoInventario.producto_id.is_not(None),
+                        MovimientoInventario.fecha.is_not(None),
+                        MovimientoInventario.tipo.is_not(None))
+                 .group_by(MovimientoInventario.producto_id, dia, MovimientoInventario.tipo))
+    almacenado = select(MovimientoDiario.producto_id, MovimientoDiario.dia, MovimientoDiario.tipo,
+                        MovimientoDiario.cantidad, MovimientoDiario.movimientos)
+    borrar = delete(MovimientoDiario)
+    if desde is not None:
+        calculado = calculado.where(MovimientoInventario.fecha >= datetime.combine(desde, datetime.min.time()))
+        almacenado = almacenado.where(MovimientoDiario.dia >= desde)
+        borrar = borrar.where(MovimientoDiario.dia >= desde)
+
+    def normalizar(filas):
+        # func.date devuelve texto en SQLite y date en PostgreSQL
+        return {(p, str(d)[:10], t): (int(c), int(n)) for p, d, t, c, n in filas}
+
+    antes = normalizar(db.session.execute(almacenado))
+    despues = normalizar(db.session.execute(calculado))
+    diferencias = [
+        {'producto_id': p, 'dia': d, 'tipo': t,
+         'almacenado': antes.get((p, d, t)), 'calculado': despues.get((p, d, t))}
+        for p, d, t in sorted(antes.keys() | despues.keys())
+        if antes.get((p, d, t)) != despues.get((p, d, t))
+    ]
+
+    db.session.execute(borrar)
+    filas = [{'producto_id': p, 'dia': datetime.strptime(d, '%Y-%m-%d').date(), 'tipo': t,
+              'cantidad': c, 'movimientos': n}
+             for (p, d, t), (c, n) in despues.items()]
+    if filas:
+        db.session.execute(insert(MovimientoDiario), filas)
+    return diferencias
+
+@app.cli.command('reconstruir-movimientos-diarios')
+@click.option('--desde', help='Recalcular solo desde esta fecha (YYYY-MM-DD)')
+def reconstruir_movimientos_diarios_command(desde):
+    """Reconcilia movimiento_diario con movimiento_inventario."""
+    diferencias = reconstruir_movimientos_diarios(
+        datetime.strptime(desde, '%Y-%m-%d').date() if desde else None)
+    db.session.commit()
+    for diferencia in diferencias:
+        print(f"producto {diferencia['producto_id']} {diferencia['dia']} {diferencia['tipo']}: "
+              f"{diferencia['almacenado']} -> {diferencia['calculado']}")
+    print(f"Agregado diario reconstruido ({len(diferencias)} filas corregidas)")
+
+# Índice de búsqueda de productos
+BUSQUEDA_CHUNK = 5000
+# Los cambios más viejos que esto se purgan; un proceso que no sincronizó en
+# ese tiempo recarga el índice completo
+BUSQUEDA_RETENCION = timedelta(hours=int(os.getenv('SEARCH_LOG_RETENTION_HOURS', '24')))
+# Cuánto tiempo se siguen releyendo los cambios (transacciones que confirman
+# fuera de orden)
+BUSQUEDA_VENTANA = timedelta(seconds=30)
+
+def leer_productos_busqueda(ids):
+    """Filas (id, nombre, sku, descripcion), por bloques de id."""
+    columnas = select(Producto.id, Producto.nombre, Producto.sku, Producto.descripcion)
+    if ids is not None:
+        ids = sorted(ids)
+        for i in range(0, len(ids), BUSQUEDA_CHUNK):
+            yield from db.session.execute(columnas.where(Producto.id.in_(ids[i:i + BUSQUEDA_CHUNK])))
+        return
+    ultimo_id = 0
+    while True:
+        bloque = db.session.execute(
+            columnas.where(Producto.id > ultimo_id).order_by(Producto.id).limit(BUSQUEDA_CHUNK)).all()
+        if not bloque:
+            return
+        yield from bloque
+        ultimo_id = bloque[-1].id
+
+def ultimo_cambio_busqueda():
+    return db.session.execute(select(func.max(ProductoBusquedaCambio.id))).scalar() or 0
+
+def leer_cambios_busqueda(desde):
+    primero = db.session.execute(select(func.min(ProductoBusquedaCambio.id))).scalar()
+    if primero is not None and primero > desde + 1:
+        # Pudieron purgarse cambios que este proceso no aplicó (o son huecos
+        # de la secuencia): se recarga todo, que siempre es correcto
+        return None
+    return db.session.execute(
+        select(ProductoBusquedaCambio.id, ProductoBusquedaCambio.producto_id)
+        .where((ProductoBusquedaCambio.id > desde) |
+               (ProductoBusquedaCambio.fecha >= datetime.utcnow() - BUSQUEDA_VENTANA))).all()
+
+indice_busqueda = IndiceSincronizado(
+    leer_productos_busqueda,
+    ultimo_cambio_busqueda,
+    leer_cambios_busqueda,
+    intervalo=float(os.getenv('SEARCH_SYNC_INTERVAL', '1.0'))
+)
+
+def precalentar_busqueda():
+    """Carga el índice de búsqueda en segundo plano al arrancar el proceso.
+
+    gunicorn la llama en cada worker (post_worker_init): el índice es por
+    proceso y un hilo lanzado en el master no sobrevive al fork.
+    """
+    if os.getenv('SEARCH_WARMUP', '1') == '1':
+        return indice_busqueda.precalentar(app.app_context)
+
+def registrar_cambios_busqueda(ids):
+    """Anota los productos escritos, dentro de la transacción de quien llama.
+
+    `ids` None pide a todos los procesos recargar el índice completo.
+    """
+    ahora = datetime.utcnow()
+    filas = [{'producto_id': i, 'fecha': ahora} for i in ids] if ids is not None \
+        else [{'producto_id': None, 'fecha': ahora}]
+    db.session.execute(insert(ProductoBusquedaCambio), filas)
+    db.session.execute(delete(ProductoBusquedaCambio)
+                       .where(ProductoBusquedaCambio.fecha < ahora - BUSQUEDA_RETENCION))
+    indice_busqueda.invalidar()
+
 # Instancias de schemas
 producto_schema = ProductoSchema()
 orden_compra_schema = OrdenCompraSchema()
 movimiento_schema = MovimientoSchema()
 
+# Caché de tokens JWT ya verificados. La clave incluye la SECRET_KEY con la
+# que se verificó, así un token firmado con una clave rotada no se acepta.
+jwt_cache = LRUCache(maxsize=int(os.getenv('JWT_CACHE_SIZE', '1024')))
+
+def decode_jwt(token):
+    secret = app.config['SECRET_KEY']
+    clave = (secret, token)
+    payload = jwt_cache.get(clave)
+    if payload is None:
+        payload = jwt.decode(token, secret, algorithms=['HS256'])
+        # Solo se cachean tokens con exp; la entrada caduca con el token
+        if 'exp' in payload:
+            jwt_cache.set(clave, payload, expira=payload['exp'])
+    return dict(payload)
+
 def require_jwt(role=None):
     def decorator(f):
         @wraps(f)
@@ -326,7 +788,7 @@ def require_jwt(role=None):
                 return jsonify({'error': 'Token JWT requerido'}), 401
             token = auth_header.split(' ')[1]
             try:
-                payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+                payload = decode_jwt(token)
             except jwt.ExpiredSignatureError:
                 return jsonify({'error': 'Token expirado'}), 401
             except jwt.InvalidTokenError:
@@ -338,16 +800,75 @@ def require_jwt(role=None):
         return wrapper
     return decorator
 
+# Perfilado de peticiones: cabecera X-Profile de un admin o muestreo
+perfilador = perfilador_from_env()
+
+def es_admin():
+    auth_header = request.headers.get('Authorization', '')
+    if not auth_header.startswith('Bearer '):
+        return False
+    try:
+        return decode_jwt(auth_header.split(' ')[1]).get('rol') == 'admin'
+    except jwt.InvalidTokenError:
+        return False
+
+@app.before_request
+def iniciar_perfil():
+    if perfilador.debe_perfilar('X-Profile' in request.headers and es_admin()):
+        perfilador.iniciar(request.headers.get('X-Request-ID'))
+
+@app.after_request
+def guardar_perfil(response):
+    if not perfilador.activo():
+        return response
+    perfil_id = perfilador.terminar({
+        'ruta': request.url_rule.rule if request.url_rule is not None else request.path,
+        'path': request.full_path.rstrip('?'),
+        'metodo': request.method,
+        'estado': response.status_code,
+    })
+    if perfil_id is not None:
+        response.headers['X-Profile-Id'] = perfil_id
+    return response
+
+@app.teardown_request
+def descartar_perfil(error=None):
+    perfilador.descartar()
+
+@app.route('/api/perfiles', methods=['GET'])
+@require_jwt('admin')
+def listar_perfiles():
+    return jsonify(perfilador.listar(request.args.get('limit', 50, type=int)))
+
+@app.route('/api/perfiles/<perfil_id>', methods=['GET'])
+@require_jwt('admin')
+def obtener_perfil(perfil_id):
+    if request.args.get('formato') == 'pstats':
+        ruta = perfilador.archivo(perfil_id)
+        if ruta is None:
+            return jsonify({"error": "Perfil no encontrado"}), 404
+        return send_file(ruta, mimetype='application/octet-stream', as_attachment=True,
+                         download_name=f"{perfil_id}.prof")
+    orden = request.args.get('orden', 'cumulative')
+    if orden not in ('cumulative', 'tottime', 'ncalls'):
+        return jsonify({"error": "orden debe ser cumulative, tottime o ncalls"}), 400
+    texto = perfilador.resumen(perfil_id, orden)
+    if texto is None:
+        return jsonify({"error": "Perfil no encontrado"}), 404
+    return Response(texto, content_type='text/plain; charset=utf-8')
+
 # Endpoints de Categorías
 @app.route('/api/categorias', methods=['GET'])
 def obtener_categorias():
-    categorias = Categoria.query.all()
-    return jsonify([c.to_dict() for c in categorias])
+    categorias = catalogo_cache.get_or_load(
+        'categoria', ('lista',), lambda: [c.to_dict() for c in Categoria.query.all()])
+    return jsonify(categorias)
 
 @app.route('/api/categorias/<int:id>', methods=['GET'])
 def obtener_categoria(id):
-    categoria = Categoria.query.get_or_404(id)
-    return jsonify(categoria.to_dict())
+    categoria = catalogo_cache.get_or_load(
+        'categoria', (id,), lambda: Categoria.query.get_or_404(id).to_dict())
+    return jsonify(categoria)
 
 @app.route('/api/categorias', methods=['POST'])
 @require_jwt('admin')
@@ -356,6 +877,7 @@ def crear_categoria():
     nueva = Categoria(nombre_categoria=data['nombre_categoria'])
     db.session.add(nueva)
     db.session.commit()
+    invalidar_catalogo('categoria')
     return jsonify(nueva.to_dict()), 201
 
 @app.route('/api/categorias/<int:id>', methods=['PUT'])
@@ -365,6 +887,8 @@ def actualizar_categoria(id):
     categoria = Categoria.query.get_or_404(id)
     categoria.nombre_categoria = data['nombre_categoria']
     db.session.commit()
+    # El nombre de la categoría aparece también en cada producto
+    invalidar_catalogo('categoria', 'producto')
     return jsonify(categoria.to_dict())
 
 @app.route('/api/categorias/<int:id>', methods=['DELETE'])
@@ -372,23 +896,188 @@ def actualizar_categoria(id):
 def eliminar_categoria(id):
     categoria = Categoria.query.get_or_404(id)
     db.session.delete(categoria)
+    # Sus productos quedan sin categoría
+    fusionar_resumen(id, 0)
     db.session.commit()
+    invalidar_catalogo('categoria', 'producto')
     return '', 204
 
+# Paginación por cursor (keyset) para el listado de productos
+PRODUCTOS_LIMIT_DEFAULT = 50
+PRODUCTOS_LIMIT_MAX = 500
+# campo -> (expresión de orden, valor de la fila para el cursor)
+PRODUCTOS_SORT = {
+    'id': (Producto.id, lambda p: p.id),
+    'nombre': (Producto.nombre, lambda p: p.nombre),
+    'sku': (Producto.sku, lambda p: p.sku),
+    'cantidad': (func.coalesce(Producto.cantidad, 0), lambda p: p.cantidad or 0),
+}
+# ?fields=: campo -> expresión del SELECT (mismas claves que Producto.to_dict())
+PRODUCTOS_CAMPOS = {
+    'id': Producto.id,
+    'nombre': Producto.nombre,
+    'sku': Producto.sku,
+    'precio_costo': Producto.precio_costo,
+    'precio_venta': Producto.precio_venta,
+    'descripcion': Producto.descripcion,
+    'cantidad': Producto.cantidad,
+    'umbral_reorden': Producto.umbral_reorden,
+    'categoria_id': Producto.categoria_id,
+    'categoria': Categoria.nombre_categoria,
+    'fecha_creacion': Producto.fecha_creacion,
+    'fecha_actualizacion': Producto.fecha_actualizacion,
+}
+
+def encode_cursor(valores):
+    raw = json.dumps(valores, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor, largo=2):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        valores = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    if not isinstance(valores, list) or len(valores) != largo:
+        raise ValueError("Cursor inválido")
+    return valores
+
+def parse_limit(valor, default, maximo):
+    if valor is None:
+        return default
+    limit = int(valor)
+    if limit < 1:
+        raise ValueError("limit debe ser mayor que 0")
+    return min(limit, maximo)
+
+def parse_fields(valor, disponibles):
+    """Campos de ?fields= (separados por coma) en el orden de `disponibles`; None si no vino."""
+    if valor is None:
+        return None
+    pedidos = {campo.strip() for campo in valor.split(',') if campo.strip()}
+    if not pedidos:
+        raise ValueError("fields no puede estar vacío")
+    desconocidos = pedidos.difference(disponibles)
+    if desconocidos:
+        raise ValueError(f"fields no soportados: {', '.join(sorted(desconocidos))}")
+    return [campo for campo in disponibles if campo in pedidos]
+
+def columnas_proyeccion(expresiones, campos):
+    """Columnas etiquetadas con el nombre de cada campo, para un SELECT proyectado.
+
+    Una expresión puede ser una función sin argumentos, que se evalúa en cada
+    consulta (para las que dependen del día, como el estado efectivo).
+    """
+    return [(expresiones[campo]() if callable(expresiones[campo]) else expresiones[campo]).label(campo)
+            for campo in campos]
+
+def proyectar(fila, campos, formatos=None):
+    """Dict con solo `campos` de una fila con columnas etiquetadas."""
+    valores = fila._mapping
+    if not formatos:
+        return {campo: valores[campo] for campo in campos}
+    return {campo: formatos[campo](valores[campo]) if campo in formatos else valores[campo]
+            for campo in campos}
+
+def consulta_productos(args, campos=None):
+    """Construye la consulta filtrada y ordenada del listado de productos.
+
+    Devuelve (query, orden, descendente). Sin `campos` trae entidades
+    Producto con la categoría en la misma consulta (LEFT JOIN) para que
+    to_dict() no dispare lazy loads. Con `campos` (?fields=) selecciona solo
+    esas columnas, más el id y la columna del orden que necesita el cursor,
+    y hace el JOIN con categoría solo si se pidió.
+    """
+    sort = args.get('sort', 'id')
+    descendente = sort.startswith('-')
+    campo = sort.lstrip('-')
+    if campo not in PRODUCTOS_SORT:
+        raise ValueError(f"sort no soportado: {sort}")
+    orden = PRODUCTOS_SORT[campo]
+
+    if campos is None:
+        query = (Producto.query
+                 .outerjoin(Producto.categoria)
+                 .options(contains_eager(Producto.categoria)))
+    else:
+        columnas = list(dict.fromkeys(['id', campo, *campos]))
+        query = db.session.query(*columnas_proyeccion(PRODUCTOS_CAMPOS, columnas)).select_from(Producto)
+        if 'categoria' in campos:
+            query = query.outerjoin(Categoria, Producto.categoria_id == Categoria.id)
+
+    nombre = args.get('nombre')
+    if nombre:
+        query = query.filter(Producto.nombre.ilike(f"%{nombre}%"))
+    sku = args.get('sku')
+    if sku:
+        query = query.filter(Producto.sku.ilike(f"%{sku}%"))
+    categoria_id = args.get('categoria_id')
+    if categoria_id:
+        query = query.filter(Producto.categoria_id == int(categoria_id))
+    if args.get('bajo_stock', '').lower() in ('1', 'true', 'si', 'sí'):
+        query = query.filter(Producto.cantidad <= Producto.umbral_reorden)
+
+    return query, orden, descendente
+
+def iterar_bloques(query, tamano):
+    """Recorre un SELECT con un cursor del lado del servidor, por bloques de filas."""
+    resultado = db.session.execute(
+        query.execution_options(stream_results=True, yield_per=tamano))
+    try:
+        yield from resultado.partitions()
+    finally:
+        resultado.close()
+
+def paginar_keyset(query, orden, descendente, cursor, limit, sort='id'):
+    """Aplica el cursor (sort, valor_orden, id) y devuelve (filas, next_cursor).
+
+    El cursor guarda el orden (campo y sentido) con el que se generó: usarlo
+    con otro `sort` compararía la columna con un valor de otro tipo.
+    """
+    columna, valor_cursor = orden
+    clave = tuple_(columna, Producto.id)
+    sort = ('-' if descendente else '') + sort.lstrip('-')
+    if cursor:
+        sort_cursor, valor, ultimo_id = decode_cursor(cursor, largo=3)
+        if sort_cursor != sort:
+            raise ValueError(f"El cursor es de otro orden ({sort_cursor}), no de {sort}")
+        if not isinstance(ultimo_id, int) or isinstance(ultimo_id, bool):
+            raise ValueError("Cursor inválido")
+        query = query.filter(clave < tuple_(literal(valor), literal(ultimo_id)) if descendente
+                             else clave > tuple_(literal(valor), literal(ultimo_id)))
+    if descendente:
+        query = query.order_by(columna.desc(), Producto.id.desc())
+    else:
+        query = query.order_by(columna.asc(), Producto.id.asc())
+
+    filas = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        ultimo = filas[-1]
+        next_cursor = encode_cursor([sort, valor_cursor(ultimo), ultimo.id])
+    return filas, next_cursor
+
 # Endpoints de Productos
 @app.route('/api/productos', methods=['GET'])
 def obtener_productos():
-    logger.info("Obteniendo lista de productos", extra={
-        'type': 'product_list',
-        'method': 'GET'
-    })
+    eventos.info('product_list', "Obteniendo lista de productos", {'method': 'GET'})
     try:
-        productos = Producto.query.all()
-        logger.debug(f"Productos encontrados: {len(productos)}", extra={
-            'type': 'product_list',
-            'count': len(productos)
+        try:
+            limit = parse_limit(request.args.get('limit'), PRODUCTOS_LIMIT_DEFAULT, PRODUCTOS_LIMIT_MAX)
+            campos = parse_fields(request.args.get('fields'), PRODUCTOS_CAMPOS)
+            query, orden, descendente = consulta_productos(request.args, campos)
+            productos, next_cursor = paginar_keyset(
+                query, orden, descendente, request.args.get('cursor'), limit, request.args.get('sort', 'id'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        eventos.debug('product_list', lambda: f"Productos encontrados: {len(productos)}",
+                      lambda: {'count': len(productos)})
+        return jsonify({
+            'items': ([p.to_dict() for p in productos] if campos is None
+                      else [proyectar(p, campos) for p in productos]),
+            'next_cursor': next_cursor
         })
-        return jsonify([p.to_dict() for p in productos])
     except Exception as e:
         logger.error(f"Error al obtener productos: {str(e)}", extra={
             'type': 'server_error',
@@ -396,21 +1085,118 @@ def obtener_productos():
         })
         return jsonify({"error": "Error al obtener productos"}), 500
 
+# Exportación completa del catálogo
+EXPORT_CHUNK = 5000
+EXPORT_COLUMNAS = ['id', 'nombre', 'sku', 'precio_costo', 'precio_venta', 'descripcion',
+                   'cantidad', 'umbral_reorden', 'categoria_id', 'categoria',
+                   'fecha_creacion', 'fecha_actualizacion']
+
+def consulta_export_productos():
+    # Los precios se redondean en SQL a la escala de la columna (en init.sql
+    # son NUMERIC sin escala) para que encajen en el decimal de Parquet
+    return (select(Producto.id, Producto.nombre, Producto.sku,
+                   cast(Producto.precio_costo, db.Numeric(10, 2)),
+                   cast(Producto.precio_venta, db.Numeric(10, 2)),
+                   Producto.descripcion,
+                   Producto.cantidad, Producto.umbral_reorden, Producto.categoria_id,
+                   Categoria.nombre_categoria, Producto.fecha_creacion,
+                   Producto.fecha_actualizacion)
+            .select_from(Producto)
+            .outerjoin(Categoria, Producto.categoria_id == Categoria.id)
+            .order_by(Producto.id))
+
+def schema_export_productos():
+    import pyarrow as pa
+    return pa.schema([
+        ('id', pa.int32()),
+        ('nombre', pa.string()),
+        ('sku', pa.string()),
+        ('precio_costo', pa.decimal128(10, 2)),
+        ('precio_venta', pa.decimal128(10, 2)),
+        ('descripcion', pa.string()),
+        ('cantidad', pa.int32()),
+        ('umbral_reorden', pa.int32()),
+        ('categoria_id', pa.int32()),
+        ('categoria', pa.string()),
+        ('fecha_creacion', pa.timestamp('us')),
+        ('fecha_actualizacion', pa.timestamp('us')),
+    ])
+
+@app.route('/api/productos/export', methods=['GET'])
+def exportar_productos():
+    formato = request.args.get('formato', 'csv')
+    bloques = iterar_bloques(consulta_export_productos(), EXPORT_CHUNK)
+    if formato == 'csv':
+        return Response(stream_with_context(csv_stream(bloques, EXPORT_COLUMNAS)),
+                        mimetype='text/csv',
+                        headers={'Content-Disposition': 'attachment; filename=productos.csv'})
+    if formato == 'parquet':
+        return Response(stream_with_context(parquet_stream(bloques, schema_export_productos())),
+                        mimetype='application/vnd.apache.parquet',
+                        headers={'Content-Disposition': 'attachment; filename=productos.parquet'})
+    return jsonify({"error": "Formato no soportado"}), 400
+
+# Búsqueda de productos por nombre, sku o descripción
+BUSQUEDA_LIMIT_DEFAULT = 20
+BUSQUEDA_LIMIT_MAX = 100
+# Fracción mínima de los trigramas de la consulta que debe tener un producto
+BUSQUEDA_SIMILITUD_MINIMA = 0.4
+
+def buscar_productos(q, limit):
+    """[(producto, relevancia)] para `q`, ordenados por relevancia."""
+    resultados = indice_busqueda.buscar(q, limit, BUSQUEDA_SIMILITUD_MINIMA)
+    if not resultados:
+        return []
+    productos = {
+        p.id: p for p in (Producto.query
+                          .outerjoin(Producto.categoria)
+                          .options(contains_eager(Producto.categoria))
+                          .filter(Producto.id.in_([producto_id for producto_id, _ in resultados])))
+    }
+    # Un producto recién borrado puede seguir en el índice hasta la próxima sincronización
+    return [(productos[producto_id], relevancia) for producto_id, relevancia in resultados
+            if producto_id in productos]
+
+@app.route('/api/productos/buscar', methods=['GET'])
+def buscar_productos_endpoint():
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({"error": "El parámetro q es requerido"}), 400
+    try:
+        limit = parse_limit(request.args.get('limit'), BUSQUEDA_LIMIT_DEFAULT, BUSQUEDA_LIMIT_MAX)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({'items': [
+        {**producto.to_dict(), 'relevancia': round(relevancia, 3)}
+        for producto, relevancia in buscar_productos(q, limit)
+    ]})
+
+# El stock cambia con cada movimiento: se lee siempre de la base y de la
+# caché sale solo la ficha de catálogo (nombre, precios, categoría), que se
+# invalida únicamente al editar productos o categorías
+PRODUCTO_CAMPOS_VIVOS = ('cantidad', 'fecha_actualizacion')
+
+def ficha_producto(id):
+    ficha = Producto.query.get_or_404(id).to_dict()
+    for campo in PRODUCTO_CAMPOS_VIVOS:
+        del ficha[campo]
+    return ficha
+
 @app.route('/api/productos/<int:id>', methods=['GET'])
 def obtener_producto(id):
-    logger.info(f"Obteniendo producto con ID: {id}", extra={
-        'type': 'product_get',
-        'method': 'GET',
-        'product_id': id
-    })
+    eventos.info('product_get', lambda: f"Obteniendo producto con ID: {id}",
+                 lambda: {'method': 'GET', 'product_id': id})
     try:
-        producto = Producto.query.get_or_404(id)
-        logger.debug(f"Producto encontrado: {producto.to_dict()}", extra={
-            'type': 'product_get',
-            'product_id': id,
-            'data': producto.to_dict()
-        })
-        return jsonify(producto.to_dict())
+        vivo = db.session.execute(
+            select(Producto.cantidad, Producto.fecha_actualizacion).where(Producto.id == id)).one_or_none()
+        if vivo is None:
+            return jsonify({"error": "Recurso no encontrado"}), 404
+        ficha = catalogo_cache.get_or_load('producto', (id,), lambda: ficha_producto(id))
+        producto = {**ficha, 'cantidad': vivo.cantidad,
+                    'fecha_actualizacion': vivo.fecha_actualizacion.isoformat()}
+        eventos.debug('product_get', lambda: f"Producto encontrado: {producto}",
+                      lambda: {'product_id': id, 'data': producto})
+        return jsonify(producto)
     except Exception as e:
         logger.error(f"Error al obtener producto {id}: {str(e)}", extra={
             'type': 'server_error',
@@ -427,10 +1213,7 @@ def crear_producto():
     })
     try:
         data = request.get_json()
-        logger.debug(f"Datos recibidos: {data}", extra={
-            'type': 'product_data',
-            'data': data
-        })
+        eventos.debug('product_data', lambda: f"Datos recibidos: {data}", lambda: {'data': data})
         
         # Validar datos requeridos
         required_fields = ['nombre', 'sku', 'precio_costo', 'precio_venta']
@@ -472,7 +1255,11 @@ def crear_producto():
         )
         
         db.session.add(nuevo_producto)
+        db.session.flush()
+        actualizar_resumen([(None, estado_resumen(nuevo_producto))])
+        registrar_cambios_busqueda([nuevo_producto.id])
         db.session.commit()
+        invalidar_catalogo('producto')
         
         logger.info(f"Producto creado exitosamente: {nuevo_producto.to_dict()}", extra={
             'type': 'product_created',
@@ -497,6 +1284,126 @@ def crear_producto():
         db.session.rollback()
         return jsonify({"error": f"Error interno del servidor: {str(e)}"}), 500
 
+# Importación masiva de productos
+IMPORT_MAX_ERRORES = 1000
+IMPORT_COLUMNAS = ['nombre', 'sku', 'precio_costo', 'precio_venta', 'descripcion',
+                   'cantidad', 'umbral_reorden', 'categoria_id']
+IMPORT_DEFAULTS = {'descripcion': '', 'cantidad': 0, 'umbral_reorden': 10, 'categoria_id': None}
+
+def cargar_staging(import_id, validos):
+    columnas = [c for c in IMPORT_COLUMNAS if c in validos.columns]
+    registros = validos[columnas].astype(object).where(validos[columnas].notna(), None)
+    filas = [
+        {'import_id': import_id, 'fila': int(linea), **dict(zip(columnas, valores))}
+        for linea, valores in zip(registros.index, registros.itertuples(index=False, name=None))
+    ]
+    if filas:
+        db.session.execute(insert(ProductoStaging), filas)
+    return columnas
+
+def upsert_desde_staging(import_id, columnas):
+    """Inserta o actualiza por sku todas las filas del staging.
+
+    Si un sku aparece varias veces en el archivo gana la última fila. En los
+    productos existentes solo se actualizan las columnas presentes en el
+    archivo y una celda vacía conserva el valor actual. En los productos
+    nuevos las columnas ausentes o vacías toman los mismos valores por
+    defecto que en crear_producto (IMPORT_DEFAULTS).
+    """
+    ultima_fila = (select(func.max(ProductoStaging.fila))
+                   .where(ProductoStaging.import_id == import_id)
+                   .group_by(ProductoStaging.sku))
+    del_import = (ProductoStaging.import_id == import_id, ProductoStaging.fila.in_(ultima_fila))
+    ahora = datetime.utcnow()
+
+    # Existentes: UPDATE ... FROM staging; el coalesce con el valor de la
+    # fila se evalúa con la fila bloqueada, así una celda vacía no pisa un
+    # stock que otra transacción acaba de cambiar
+    actualizadas = db.session.execute(
+        update(Producto)
+        .where(Producto.sku == ProductoStaging.sku, *del_import)
+        .values({**{c: func.coalesce(getattr(ProductoStaging, c), getattr(Producto, c))
+                    for c in columnas if c != 'sku'},
+                 'fecha_actualizacion': ahora})
+        .execution_options(synchronize_session=False)).rowcount
+
+    def valor_nuevo(c):
+        if c not in columnas:
+            return literal(IMPORT_DEFAULTS[c])
+        if IMPORT_DEFAULTS.get(c) is not None:
+            return func.coalesce(getattr(ProductoStaging, c), IMPORT_DEFAULTS[c])
+        return getattr(ProductoStaging, c)
+
+    # Nuevos: los sku que ya existen (recién actualizados) se saltean
+    origen = select(*[valor_nuevo(c) for c in IMPORT_COLUMNAS], literal(ahora), literal(ahora)
+                    ).where(*del_import)
+    sentencia = upsert_insert(Producto).from_select(
+        IMPORT_COLUMNAS + ['fecha_creacion', 'fecha_actualizacion'], origen)
+    insertadas = db.session.execute(sentencia.on_conflict_do_nothing(index_elements=['sku'])).rowcount
+    db.session.execute(delete(ProductoStaging).where(ProductoStaging.import_id == import_id))
+    return actualizadas + insertadas
+
+@app.route('/api/productos/import', methods=['POST'])
+@require_jwt('admin')
+def importar_productos():
+    archivo = request.files.get('archivo')
+    if archivo is None or not archivo.filename:
+        return jsonify({"error": "Archivo requerido (campo 'archivo')"}), 400
+    logger.info(f"Importando productos desde {archivo.filename}", extra={
+        'type': 'product_import',
+        'file_name': archivo.filename
+    })
+
+    import_id = str(uuid.uuid4())
+    total = 0
+    errores = []
+    total_errores = 0
+    columnas = []
+    try:
+        categorias_validas = set(db.session.execute(select(Categoria.id)).scalars())
+        for bloque in leer_bloques(archivo.stream, archivo.filename):
+            validos, errores_bloque = validar_bloque(bloque, producto_schema, categorias_validas)
+            total += len(bloque)
+            total_errores += len(errores_bloque)
+            for linea, detalle in errores_bloque.items():
+                if len(errores) < IMPORT_MAX_ERRORES:
+                    errores.append({'fila': linea, 'errores': detalle})
+            columnas = cargar_staging(import_id, validos) or columnas
+        importadas = upsert_desde_staging(import_id, columnas) if columnas else 0
+        if importadas:
+            # Una importación toca miles de productos: es más simple y barato
+            # recalcular el resumen completo que aplicar un delta por fila
+            reconstruir_resumen()
+            # Lo mismo con el índice de búsqueda: cada proceso lo recarga
+            registrar_cambios_busqueda(None)
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error al importar productos: {str(e)}", extra={
+            'type': 'server_error',
+            'error': str(e)
+        })
+        return jsonify({"error": "Error al importar productos"}), 500
+
+    if importadas:
+        invalidar_catalogo('producto')
+    logger.info(f"Importación {import_id}: {importadas} productos, {total_errores} filas con error", extra={
+        'type': 'product_import',
+        'import_id': import_id,
+        'imported': importadas,
+        'errors': total_errores
+    })
+    return jsonify({
+        'import_id': import_id,
+        'filas': total,
+        'importadas': importadas,
+        'con_errores': total_errores,
+        'errores': errores
+    }), 200
+
 @app.route('/api/productos/<int:id>', methods=['PUT'])
 @require_jwt('admin')
 def actualizar_producto(id):
@@ -507,13 +1414,11 @@ def actualizar_producto(id):
     })
     try:
         data = request.get_json()
-        logger.debug(f"Datos recibidos para actualización: {data}", extra={
-            'type': 'product_update',
-            'product_id': id,
-            'data': data
-        })
+        eventos.debug('product_update', lambda: f"Datos recibidos para actualización: {data}",
+                      lambda: {'product_id': id, 'data': data})
         
         producto = Producto.query.get_or_404(id)
+        antes = estado_resumen(producto)
         
         # Validar datos
         try:
@@ -534,7 +1439,10 @@ def actualizar_producto(id):
             })
             return jsonify({"error": f"Error de validación: {str(e)}"}), 400
         
+        actualizar_resumen([(antes, estado_resumen(producto))])
+        registrar_cambios_busqueda([id])
         db.session.commit()
+        invalidar_catalogo('producto')
         logger.info(f"Producto {id} actualizado exitosamente", extra={
             'type': 'product_updated',
             'product_id': id,
@@ -560,8 +1468,11 @@ def eliminar_producto(id):
     })
     try:
         producto = Producto.query.get_or_404(id)
+        actualizar_resumen([(estado_resumen(producto), None)])
+        registrar_cambios_busqueda([id])
         db.session.delete(producto)
         db.session.commit()
+        invalidar_catalogo('producto')
         logger.info(f"Producto {id} eliminado exitosamente", extra={
             'type': 'product_deleted',
             'product_id': id
@@ -579,13 +1490,15 @@ def eliminar_producto(id):
 # Endpoints de Proveedores
 @app.route('/api/proveedores', methods=['GET'])
 def obtener_proveedores():
-    proveedores = Proveedor.query.all()
-    return jsonify([p.to_dict() for p in proveedores])
+    proveedores = catalogo_cache.get_or_load(
+        'proveedor', ('lista',), lambda: [p.to_dict() for p in Proveedor.query.all()])
+    return jsonify(proveedores)
 
 @app.route('/api/proveedores/<int:id>', methods=['GET'])
 def obtener_proveedor(id):
-    proveedor = Proveedor.query.get_or_404(id)
-    return jsonify(proveedor.to_dict())
+    proveedor = catalogo_cache.get_or_load(
+        'proveedor', (id,), lambda: Proveedor.query.get_or_404(id).to_dict())
+    return jsonify(proveedor)
 
 @app.route('/api/proveedores', methods=['POST'])
 @require_jwt('admin')
@@ -598,6 +1511,7 @@ def crear_proveedor():
     )
     db.session.add(nuevo)
     db.session.commit()
+    invalidar_catalogo('proveedor')
     return jsonify(nuevo.to_dict()), 201
 
 @app.route('/api/proveedores/<int:id>', methods=['PUT'])
@@ -609,6 +1523,7 @@ def actualizar_proveedor(id):
     proveedor.email = data.get('email')
     proveedor.telefono = data.get('telefono')
     db.session.commit()
+    invalidar_catalogo('proveedor')
     return jsonify(proveedor.to_dict())
 
 @app.route('/api/proveedores/<int:id>', methods=['DELETE'])
@@ -617,19 +1532,238 @@ def eliminar_proveedor(id):
     proveedor = Proveedor.query.get_or_404(id)
     db.session.delete(proveedor)
     db.session.commit()
+    invalidar_catalogo('proveedor')
     return '', 204
 
 # Endpoints de Órdenes de Compra
+def consulta_ordenes_compra():
+    """Consulta de órdenes con proveedor, items y producto de cada item precargados.
+
+    Emite siempre dos sentencias: órdenes + proveedor (JOIN) e items + nombre
+    del producto (SELECT ... IN), sin importar cuántas órdenes o líneas haya.
+    """
+    return OrdenCompra.query.options(
+        joinedload(OrdenCompra.proveedor),
+        selectinload(OrdenCompra.items)
+        .joinedload(OrdenCompraItem.producto)
+        .load_only(Producto.id, Producto.nombre)
+    )
+
+# ?fields=: campo -> expresión del SELECT (mismas claves que OrdenCompra.to_dict());
+# 'items' se trae aparte, en un solo SELECT para todas las órdenes de la página.
+# El estado se construye en cada petición: su CASE compara con el inicio de hoy
+ORDENES_CAMPOS = {
+    'id': OrdenCompra.id,
+    'proveedor_id': OrdenCompra.proveedor_id,
+    'proveedor': Proveedor.nombre,
+    'fecha_creacion': OrdenCompra.fecha_creacion,
+    'fecha_entrega': OrdenCompra.fecha_entrega,
+    'estado': lambda: OrdenCompra.estado_efectivo,
+    'total': OrdenCompra.total,
+    'items': None,
+}
+ORDENES_ITEMS_CAMPOS = {
+    'id': OrdenCompraItem.id,
+    'orden_compra_id': OrdenCompraItem.orden_compra_id,
+    'producto_id': OrdenCompraItem.producto_id,
+    'producto': Producto.nombre,
+    'cantidad': OrdenCompraItem.cantidad,
+    'precio_unitario': OrdenCompraItem.precio_unitario,
+    'subtotal': OrdenCompraItem.subtotal,
+}
+
+def consulta_ordenes_proyectada(campos):
+    """SELECT de las columnas pedidas de las órdenes (más el id del cursor), con el
+    JOIN a proveedor solo si se pidió su nombre."""
+    columnas = list(dict.fromkeys(['id', *(c for c in campos if c != 'items')]))
+    query = db.session.query(*columnas_proyeccion(ORDENES_CAMPOS, columnas)).select_from(OrdenCompra)
+    if 'proveedor' in campos:
+        query = query.outerjoin(Proveedor, OrdenCompra.proveedor_id == Proveedor.id)
+    return query
+
+def items_por_orden(ids):
+    """{orden_id: [item]} con los items de todas las órdenes en una sola sentencia."""
+    items = {orden_id: [] for orden_id in ids}
+    if not ids:
+        return items
+    filas = db.session.execute(
+        select(*columnas_proyeccion(ORDENES_ITEMS_CAMPOS, ORDENES_ITEMS_CAMPOS))
+        .select_from(OrdenCompraItem)
+        .outerjoin(Producto, OrdenCompraItem.producto_id == Producto.id)
+        .where(OrdenCompraItem.orden_compra_id.in_(ids))
+        .order_by(OrdenCompraItem.id))
+    for fila in filas:
+        items[fila.orden_compra_id].append(proyectar(fila, ORDENES_ITEMS_CAMPOS))
+    return items
+
+ORDENES_LIMIT_DEFAULT = 50
+ORDENES_LIMIT_MAX = 500
+ORDENES_ESTADOS = ('pendiente', 'vencida', 'completada', 'cancelada')
+
+def filtros_ordenes_compra(args):
+    """Condiciones de proveedor y rango de fecha de creación del listado de órdenes."""
+    condiciones = []
+    if args.get('proveedor_id'):
+        condiciones.append(OrdenCompra.proveedor_id == int(args['proveedor_id']))
+    if args.get('desde'):
+        condiciones.append(OrdenCompra.fecha_creacion >= datetime.fromisoformat(args['desde']))
+    if args.get('hasta'):
+        condiciones.append(OrdenCompra.fecha_creacion <= datetime.fromisoformat(args['hasta']))
+    return condiciones
+
 @app.route('/api/ordenes-compra', methods=['GET'])
 def obtener_ordenes_compra():
-    ordenes = OrdenCompra.query.all()
-    return jsonify([o.to_dict() for o in ordenes])
+    try:
+        limit = parse_limit(request.args.get('limit'), ORDENES_LIMIT_DEFAULT, ORDENES_LIMIT_MAX)
+        campos = parse_fields(request.args.get('fields'), ORDENES_CAMPOS)
+        condiciones = filtros_ordenes_compra(request.args)
+        estado = request.args.get('estado')
+        if estado:
+            if estado not in ORDENES_ESTADOS:
+                raise ValueError(f"estado no soportado: {estado}")
+            condiciones.append(OrdenCompra.filtro_estado(estado))
+        cursor = request.args.get('cursor')
+        if cursor:
+            ultimo_id, = decode_cursor(cursor, largo=1)
+            condiciones.append(OrdenCompra.id > int(ultimo_id))
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = consulta_ordenes_compra() if campos is None else consulta_ordenes_proyectada(campos)
+    ordenes = (query
+               .filter(*condiciones)
+               .order_by(OrdenCompra.id)
+               .limit(limit + 1)
+               .all())
+    next_cursor = None
+    if len(ordenes) > limit:
+        ordenes = ordenes[:limit]
+        next_cursor = encode_cursor([ordenes[-1].id])
+    if campos is None:
+        items = [o.to_dict() for o in ordenes]
+    else:
+        items = [proyectar(o, [c for c in campos if c != 'items']) for o in ordenes]
+        if 'items' in campos:
+            por_orden = items_por_orden([o.id for o in ordenes])
+            for orden, item in zip(ordenes, items):
+                item['items'] = por_orden[orden.id]
+    return jsonify({
+        'items': items,
+        'next_cursor': next_cursor
+    })
+
+@app.route('/api/ordenes-compra/conteos', methods=['GET'])
+def contar_ordenes_compra():
+    """Órdenes por estado efectivo, con los mismos filtros que el listado."""
+    try:
+        condiciones = filtros_ordenes_compra(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # La misma expresión en el SELECT y en el GROUP BY (mismos parámetros)
+    estado = OrdenCompra.estado_efectivo
+    conteos = dict.fromkeys(ORDENES_ESTADOS, 0)
+    conteos.update(db.session.execute(
+        select(estado, func.count(OrdenCompra.id)).where(*condiciones).group_by(estado)).all())
+    return jsonify(conteos)
 
 @app.route('/api/ordenes-compra/<int:id>', methods=['GET'])
 def obtener_orden_compra(id):
-    orden = OrdenCompra.query.get_or_404(id)
+    orden = consulta_ordenes_compra().filter(OrdenCompra.id == id).first_or_404()
     return jsonify(orden.to_dict())
 
+CENTAVO = Decimal('0.01')
+
+def lineas_orden(items):
+    """Valida las líneas de una orden y calcula los importes en una sola pasada.
+
+    Devuelve (filas, total): una fila por línea con producto_id, cantidad,
+    precio_unitario y subtotal (Decimal redondeado a centavos, como la
+    columna) y el total de la orden. Lanza ValueError con el número de la
+    primera línea inválida.
+    """
+    if not isinstance(items, list) or not items:
+        raise ValueError("items debe ser una lista con al menos una línea")
+    filas = []
+    total = Decimal(0)
+    for indice, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise ValueError(f"Línea {indice}: debe ser un objeto")
+        try:
+            producto_id = int(item['producto_id'])
+            cantidad = int(item['cantidad'])
+            precio = Decimal(str(item['precio_unitario'])).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+        except KeyError as e:
+            raise ValueError(f"Línea {indice}: campo requerido faltante: {e.args[0]}")
+        except (TypeError, ValueError, InvalidOperation):
+            raise ValueError(f"Línea {indice}: producto_id, cantidad y precio_unitario deben ser numéricos")
+        if cantidad <= 0:
+            raise ValueError(f"Línea {indice}: la cantidad debe ser mayor que 0")
+        if precio < 0:
+            raise ValueError(f"Línea {indice}: el precio no puede ser negativo")
+        subtotal = cantidad * precio
+        total += subtotal
+        filas.append({'producto_id': producto_id, 'cantidad': cantidad,
+                      'precio_unitario': precio, 'subtotal': subtotal})
+    return filas, total
+
+def productos_inexistentes(filas):
+    """Ids de producto de las líneas que no existen, resueltos con una sola consulta."""
+    ids = {fila['producto_id'] for fila in filas}
+    existentes = set(db.session.execute(select(Producto.id).where(Producto.id.in_(ids))).scalars())
+    return sorted(ids - existentes)
+
+def sincronizar_items(orden_id, filas):
+    """Deja los items guardados de la orden iguales a `filas` con escrituras en bloque.
+
+    Cada línea reutiliza un item existente del mismo producto: primero uno
+    idéntico, que no se toca, y si no hay, otro que se actualiza. Los items
+    que sobran se borran con un DELETE y las líneas sin item se insertan con
+    un INSERT de varias filas.
+    """
+    existentes = {}
+    for item in db.session.execute(
+            select(OrdenCompraItem.id, OrdenCompraItem.producto_id,
+                   OrdenCompraItem.cantidad, OrdenCompraItem.precio_unitario)
+            .where(OrdenCompraItem.orden_compra_id == orden_id)
+            .order_by(OrdenCompraItem.id)):
+        existentes.setdefault(item.producto_id, []).append(item)
+
+    # Primera pasada: las líneas sin cambios conservan su item
+    pendientes = []
+    for fila in filas:
+        candidatos = existentes.get(fila['producto_id'], [])
+        igual = next((c for c in candidatos if c.cantidad == fila['cantidad']
+                      and c.precio_unitario == fila['precio_unitario']), None)
+        if igual is not None:
+            candidatos.remove(igual)
+        else:
+            pendientes.append(fila)
+
+    actualizar = []
+    insertar = []
+    for fila in pendientes:
+        candidatos = existentes.get(fila['producto_id'])
+        if candidatos:
+            actualizar.append({'id': candidatos.pop(0).id, 'cantidad': fila['cantidad'],
+                               'precio_unitario': fila['precio_unitario'], 'subtotal': fila['subtotal']})
+        else:
+            insertar.append({'orden_compra_id': orden_id, **fila})
+    borrar = [item.id for candidatos in existentes.values() for item in candidatos]
+
+    if borrar:
+        db.session.execute(delete(OrdenCompraItem).where(OrdenCompraItem.id.in_(borrar))
+                           .execution_options(synchronize_session=False))
+    if actualizar:
+        db.session.execute(update(OrdenCompraItem), actualizar)
+    if insertar:
+        db.session.execute(insert(OrdenCompraItem), insertar)
+    return {'sin_cambios': len(filas) - len(pendientes), 'actualizados': len(actualizar),
+            'insertados': len(insertar), 'borrados': len(borrar)}
+
+def orden_compra_dict(id):
+    # Con items y productos precargados: sin una consulta por línea
+    return consulta_ordenes_compra().filter(OrdenCompra.id == id).one().to_dict()
+
 @app.route('/api/ordenes-compra', methods=['POST'])
 @require_jwt('admin')
 def crear_orden_compra():
@@ -639,6 +1773,13 @@ def crear_orden_compra():
         errors = orden_compra_schema.validate(data)
         if errors:
             return jsonify({"error": "Datos inválidos", "detalles": errors}), 400
+        try:
+            filas, total = lineas_orden(data['items'])
+        except ValueError as e:
+            return jsonify({"error": "Datos inválidos", "detalles": {'items': [str(e)]}}), 400
+        faltantes = productos_inexistentes(filas)
+        if faltantes:
+            return jsonify({"error": "Productos no encontrados", "producto_ids": faltantes}), 404
             
         logger.info(f"Creando nueva orden de compra para proveedor: {data['proveedor_id']}")
         
@@ -646,28 +1787,17 @@ def crear_orden_compra():
             nueva_orden = OrdenCompra(
                 proveedor_id=data['proveedor_id'],
                 fecha_entrega=datetime.fromisoformat(data['fecha_entrega']) if data.get('fecha_entrega') else None,
-                estado=data.get('estado', 'pendiente')
+                estado=data.get('estado', 'pendiente'),
+                total=total
             )
-            
-            total = 0
-            for item_data in data['items']:
-                producto = Producto.query.get_or_404(item_data['producto_id'])
-                subtotal = item_data['cantidad'] * item_data['precio_unitario']
-                item = OrdenCompraItem(
-                    producto_id=producto.id,
-                    cantidad=item_data['cantidad'],
-                    precio_unitario=item_data['precio_unitario'],
-                    subtotal=subtotal
-                )
-                nueva_orden.items.append(item)
-                total += subtotal
-            
-            nueva_orden.total = total
             db.session.add(nueva_orden)
+            db.session.flush()
+            db.session.execute(insert(OrdenCompraItem),
+                               [{'orden_compra_id': nueva_orden.id, **fila} for fila in filas])
             
         db.session.commit()
         logger.info(f"Orden de compra creada exitosamente: {nueva_orden.id}")
-        return jsonify(nueva_orden.to_dict()), 201
+        return jsonify(orden_compra_dict(nueva_orden.id)), 201
         
     except Exception as e:
         db.session.rollback()
@@ -685,7 +1815,17 @@ def actualizar_orden_compra(id):
     if 'estado' in data and len(data.keys()) == 1:
         orden.estado = data['estado']
         db.session.commit()
-        return jsonify(orden.to_dict())
+        return jsonify(orden_compra_dict(id))
+
+    # Las líneas se validan y sus productos se resuelven antes de modificar nada
+    if 'items' in data:
+        try:
+            filas, total = lineas_orden(data['items'])
+        except ValueError as e:
+            return jsonify({"error": "Datos inválidos", "detalles": {'items': [str(e)]}}), 400
+        faltantes = productos_inexistentes(filas)
+        if faltantes:
+            return jsonify({"error": "Productos no encontrados", "producto_ids": faltantes}), 404
 
     # Si se envían más campos, realiza la actualización completa
     if 'proveedor_id' in data:
@@ -695,29 +1835,14 @@ def actualizar_orden_compra(id):
     if 'estado' in data:
         orden.estado = data['estado']
 
-    # Si se envían items, actualiza los items
+    # Si se envían items, se aplican solo las diferencias con los guardados
     if 'items' in data:
-        # Eliminar items existentes
-        for item in orden.items:
-            db.session.delete(item)
-        # Agregar nuevos items
-        total = 0
-        for item_data in data['items']:
-            producto = Producto.query.get_or_404(item_data['producto_id'])
-            subtotal = item_data['cantidad'] * item_data['precio_unitario']
-            item = OrdenCompraItem(
-                orden_compra_id=orden.id,
-                producto_id=producto.id,
-                cantidad=item_data['cantidad'],
-                precio_unitario=item_data['precio_unitario'],
-                subtotal=subtotal
-            )
-            orden.items.append(item)
-            total += subtotal
+        cambios = sincronizar_items(orden.id, filas)
         orden.total = total
+        logger.info(f"Items de la orden de compra {id} sincronizados: {cambios}")
 
     db.session.commit()
-    return jsonify(orden.to_dict())
+    return jsonify(orden_compra_dict(id))
 
 @app.route('/api/ordenes-compra/<int:id>', methods=['DELETE'])
 @require_jwt('admin')
@@ -727,50 +1852,211 @@ def eliminar_orden_compra(id):
     db.session.commit()
     return '', 204
 
+@app.route('/api/reportes/resumen')
+def obtener_resumen_inventario():
+    filas = db.session.execute(
+        select(ResumenInventario, Categoria.nombre_categoria)
+        .outerjoin(Categoria, ResumenInventario.categoria_clave == Categoria.id)
+        .order_by(ResumenInventario.categoria_clave)
+    ).all()
+    filas = [(resumen, nombre) for resumen, nombre in filas if resumen.productos]
+    return jsonify({
+        'categorias': [{
+            'categoria_id': resumen.categoria_clave or None,
+            'categoria': nombre,
+            'productos': resumen.productos,
+            'unidades': resumen.unidades,
+            'valor_total': float(resumen.valor_total),
+            'bajo_stock': resumen.bajo_stock
+        } for resumen, nombre in filas],
+        'totales': {
+            'productos': sum(r.productos for r, _ in filas),
+            'unidades': sum(r.unidades for r, _ in filas),
+            'valor_total': float(sum((r.valor_total for r, _ in filas), Decimal(0))),
+            'bajo_stock': sum(r.bajo_stock for r, _ in filas)
+        }
+    })
+
+# Reporte de movimientos
+MOVIMIENTOS_CHUNK = 1000
+# campo -> expresión del SELECT (también las columnas del CSV y el orden de ?fields=)
+MOVIMIENTOS_CAMPOS = {
+    'fecha': MovimientoInventario.fecha,
+    'producto': Producto.nombre,
+    'tipo': MovimientoInventario.tipo,
+    'cantidad': MovimientoInventario.cantidad,
+    'usuario': MovimientoInventario.usuario,
+}
+# Mismo formato que MovimientoInventario.to_dict()
+MOVIMIENTOS_FORMATOS = {
+    'fecha': lambda fecha: fecha.strftime('%Y-%m-%d'),
+    'usuario': lambda usuario: usuario or '',
+}
+
+def consulta_movimientos(fecha_inicio=None, fecha_fin=None, campos=None):
+    """SELECT de movimientos con el nombre del producto resuelto en SQL.
+
+    Con `campos` selecciona solo esas columnas y omite el JOIN con producto
+    si no se pidió su nombre.
+    """
+    campos = campos or list(MOVIMIENTOS_CAMPOS)
+    query = (select(*columnas_proyeccion(MOVIMIENTOS_CAMPOS, campos))
+             .select_from(MovimientoInventario))
+    if 'producto' in campos:
+        query = query.outerjoin(Producto, MovimientoInventario.producto_id == Producto.id)
+    if fecha_inicio:
+        query = query.where(MovimientoInventario.fecha >= datetime.fromisoformat(fecha_inicio))
+    if fecha_fin:
+        query = query.where(MovimientoInventario.fecha <= datetime.fromisoformat(fecha_fin))
+    return query.order_by(MovimientoInventario.fecha.desc(), MovimientoInventario.id.desc())
+
+def movimiento_fila_dict(fila, campos=None):
+    return proyectar(fila, campos or MOVIMIENTOS_CAMPOS, MOVIMIENTOS_FORMATOS)
+
+def iterar_movimientos(query, campos=None):
+    for bloque in iterar_bloques(query, MOVIMIENTOS_CHUNK):
+        yield [movimiento_fila_dict(fila, campos) for fila in bloque]
+
+def movimientos_csv(query, campos=None):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=campos or list(MOVIMIENTOS_CAMPOS))
+    writer.writeheader()
+    for bloque in iterar_movimientos(query, campos):
+        writer.writerows(bloque)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def movimientos_ndjson(query, campos=None):
+    for bloque in iterar_movimientos(query, campos):
+        yield ''.join(json.dumps(fila, ensure_ascii=False) + '\n' for fila in bloque)
+
 @app.route('/api/reportes/movimientos')
 def obtener_movimientos():
-    from datetime import datetime
     try:
-        fecha_inicio = request.args.get('fecha_inicio')
-        fecha_fin = request.args.get('fecha_fin')
-        query = MovimientoInventario.query
-
-        if fecha_inicio:
-            query = query.filter(MovimientoInventario.fecha >= datetime.fromisoformat(fecha_inicio))
-        if fecha_fin:
-            query = query.filter(MovimientoInventario.fecha <= datetime.fromisoformat(fecha_fin))
-
-        movimientos = query.order_by(MovimientoInventario.fecha.desc()).all()
-        return jsonify([m.to_dict() for m in movimientos])
+        formato = request.args.get('formato', 'json')
+        if formato not in ('json', 'csv', 'ndjson'):
+            return jsonify({"error": "Formato no soportado"}), 400
+        try:
+            campos = parse_fields(request.args.get('fields'), MOVIMIENTOS_CAMPOS)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        query = consulta_movimientos(request.args.get('fecha_inicio'), request.args.get('fecha_fin'), campos)
+
+        if formato == 'csv':
+            return Response(stream_with_context(movimientos_csv(query, campos)),
+                            mimetype='text/csv',
+                            headers={'Content-Disposition': 'attachment; filename=movimientos.csv'})
+        if formato == 'ndjson':
+            return Response(stream_with_context(movimientos_ndjson(query, campos)),
+                            mimetype='application/x-ndjson')
+
+        movimientos = db.session.execute(query).all()
+        return jsonify([movimiento_fila_dict(m, campos) for m in movimientos])
     except Exception as e:
         print("ERROR REAL EN REPORTE:", str(e))
         return jsonify({"error": "Error al obtener movimientos"}), 500
 
+# Tendencia de movimientos desde el agregado diario
+GRANULARIDADES = {'dia': 'day', 'semana': 'week', 'mes': 'month'}
+
+def periodo_movimientos(granularidad):
+    """Expresión SQL con el primer día del período (semanas de lunes a domingo)."""
+    dia = MovimientoDiario.dia
+    if db.engine.dialect.name == 'postgresql':
+        return cast(func.date_trunc(GRANULARIDADES[granularidad], dia), db.Date)
+    if granularidad == 'semana':
+        return func.date(dia, 'weekday 0', '-6 days')
+    if granularidad == 'mes':
+        return func.strftime('%Y-%m-01', dia)
+    return dia
+
+@app.route('/api/reportes/movimientos/agregado')
+def obtener_movimientos_agregados():
+    granularidad = request.args.get('granularidad', 'dia')
+    if granularidad not in GRANULARIDADES:
+        return jsonify({"error": "granularidad debe ser dia, semana o mes"}), 400
+    try:
+        condiciones = []
+        if request.args.get('producto_id'):
+            condiciones.append(MovimientoDiario.producto_id == int(request.args['producto_id']))
+        if request.args.get('tipo'):
+            condiciones.append(MovimientoDiario.tipo == request.args['tipo'])
+        if request.args.get('desde'):
+            condiciones.append(MovimientoDiario.dia >= datetime.fromisoformat(request.args['desde']).date())
+        if request.args.get('hasta'):
+            condiciones.append(MovimientoDiario.dia <= datetime.fromisoformat(request.args['hasta']).date())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    periodo = periodo_movimientos(granularidad)
+    filas = db.session.execute(
+        select(periodo, MovimientoDiario.tipo,
+               func.sum(MovimientoDiario.cantidad), func.sum(MovimientoDiario.movimientos))
+        .where(*condiciones)
+        .group_by(periodo, MovimientoDiario.tipo)
+        .order_by(periodo, MovimientoDiario.tipo)
+    ).all()
+    return jsonify({
+        'granularidad': granularidad,
+        'series': [{'periodo': str(p)[:10], 'tipo': tipo, 'cantidad': int(cantidad), 'movimientos': int(n)}
+                   for p, tipo, cantidad, n in filas]
+    })
+
+# Tipos de movimiento que suman o restan stock
+TIPOS_ENTRADA = ('entrada',)
+TIPOS_SALIDA = ('venta', 'salida', 'uso')
+MOVIMIENTOS_BATCH_MAX = 10000
+
 @app.route('/api/movimientos', methods=['POST'])
 def registrar_movimiento():
     try:
         data = request.json
-        producto = Producto.query.get_or_404(data['producto_id'])
+        producto_id = int(data['producto_id'])
         tipo = data['tipo']
         cantidad = int(data['cantidad'])
         usuario = data.get('usuario', 'admin')
 
-        if tipo == 'entrada':
-            producto.cantidad += cantidad
-        elif tipo in ['venta', 'salida', 'uso']:
-            if producto.cantidad < cantidad:
-                return jsonify({"error": "Stock insuficiente"}), 400
-            producto.cantidad -= cantidad
+        if tipo in TIPOS_ENTRADA:
+            cambio = cantidad
+        elif tipo in TIPOS_SALIDA:
+            cambio = -cantidad
         else:
             return jsonify({"error": "Tipo de movimiento no válido"}), 400
 
+        # Actualización condicional y atómica: la verificación de stock y la
+        # escritura ocurren en la misma sentencia, así dos ventas concurrentes
+        # sobre el mismo SKU no pueden pisarse ni dejar el stock negativo.
+        actualizado = db.session.execute(
+            update(Producto)
+            .where(Producto.id == producto_id)
+            .where(func.coalesce(Producto.cantidad, 0) + cambio >= 0)
+            .values(cantidad=func.coalesce(Producto.cantidad, 0) + cambio)
+            .returning(Producto.categoria_id, Producto.cantidad,
+                       Producto.precio_costo, Producto.umbral_reorden)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if actualizado is None:
+            db.session.rollback()
+            if db.session.get(Producto, producto_id) is None:
+                return jsonify({"error": "Recurso no encontrado"}), 404
+            return jsonify({"error": "Stock insuficiente"}), 400
+
+        categoria_id, nuevo_stock, precio_costo, umbral = actualizado
+        actualizar_resumen([((categoria_id, nuevo_stock - cambio, precio_costo, umbral),
+                             (categoria_id, nuevo_stock, precio_costo, umbral))])
+
         movimiento = MovimientoInventario(
-            producto_id=producto.id,
+            producto_id=producto_id,
+            fecha=datetime.utcnow(),
             tipo=tipo,
             cantidad=cantidad,
             usuario=usuario
         )
         db.session.add(movimiento)
+        acumular_movimientos([{'producto_id': producto_id, 'tipo': tipo, 'cantidad': cantidad,
+                               'fecha': movimiento.fecha}])
         db.session.commit()
         return jsonify(movimiento.to_dict()), 201
 
@@ -779,6 +2065,190 @@ def registrar_movimiento():
         db.session.rollback()
         return jsonify({"error": "Error al registrar movimiento"}), 500
 
+def validar_movimiento_batch(item):
+    """Valida un elemento del lote. Devuelve (producto_id, tipo, cantidad, usuario)."""
+    if not isinstance(item, dict):
+        raise ValueError("El movimiento debe ser un objeto")
+    try:
+        producto_id = int(item['producto_id'])
+        cantidad = int(item['cantidad'])
+    except KeyError as e:
+        raise ValueError(f"Campo requerido faltante: {e.args[0]}")
+    except (TypeError, ValueError):
+        raise ValueError("producto_id y cantidad deben ser enteros")
+    tipo = item.get('tipo')
+    if tipo not in TIPOS_ENTRADA + TIPOS_SALIDA:
+        raise ValueError("Tipo de movimiento no válido")
+    if cantidad <= 0:
+        raise ValueError("La cantidad debe ser mayor que 0")
+    return producto_id, tipo, cantidad, item.get('usuario', 'admin')
+
+@app.route('/api/movimientos/batch', methods=['POST'])
+@require_token
+def registrar_movimientos_batch():
+    """Registra un lote de movimientos en una sola transacción.
+
+    Los productos se leen (y bloquean) con una única consulta, el stock neto de
+    cada producto se aplica con un solo UPDATE y los movimientos válidos se
+    insertan en bloque. Los movimientos se evalúan en orden, así que una venta
+    puede usar el stock de una entrada anterior del mismo lote.
+    """
+    data = request.get_json(silent=True)
+    movimientos = data.get('movimientos') if isinstance(data, dict) else data
+    if not isinstance(movimientos, list) or not movimientos:
+        return jsonify({"error": "Se esperaba una lista de movimientos"}), 400
+    if len(movimientos) > MOVIMIENTOS_BATCH_MAX:
+        return jsonify({"error": f"Máximo {MOVIMIENTOS_BATCH_MAX} movimientos por lote"}), 400
+
+    try:
+        resultados = []
+        validos = []
+        for indice, item in enumerate(movimientos):
+            try:
+                validos.append((indice, *validar_movimiento_batch(item)))
+            except ValueError as e:
+                resultados.append({'indice': indice, 'estado': 'error', 'error': str(e)})
+
+        ids = {producto_id for _, producto_id, _, _, _ in validos}
+        productos = {
+            fila.id: fila for fila in db.session.execute(
+                select(Producto.id, func.coalesce(Producto.cantidad, 0).label('cantidad'),
+                       Producto.categoria_id, Producto.precio_costo, Producto.umbral_reorden)
+                .where(Producto.id.in_(ids))
+                # Bloqueos siempre en el mismo orden: dos lotes con productos
+                # en común no pueden quedar esperándose entre sí
+                .order_by(Producto.id)
+                .with_for_update()
+            )
+        } if ids else {}
+        stock = {producto_id: fila.cantidad for producto_id, fila in productos.items()}
+
+        delta = {}
+        filas = []
+        ahora = datetime.utcnow()
+        for indice, producto_id, tipo, cantidad, usuario in validos:
+            if producto_id not in stock:
+                resultados.append({'indice': indice, 'estado': 'error', 'error': 'Producto no encontrado'})
+                continue
+            cambio = cantidad if tipo in TIPOS_ENTRADA else -cantidad
+            if stock[producto_id] + cambio < 0:
+                resultados.append({'indice': indice, 'estado': 'error', 'error': 'Stock insuficiente'})
+                continue
+            stock[producto_id] += cambio
+            delta[producto_id] = delta.get(producto_id, 0) + cambio
+            filas.append({'producto_id': producto_id, 'fecha': ahora, 'tipo': tipo,
+                          'cantidad': cantidad, 'usuario': usuario})
+            resultados.append({'indice': indice, 'estado': 'ok'})
+
+        delta = {producto_id: cambio for producto_id, cambio in delta.items() if cambio}
+        if delta:
+            db.session.execute(
+                update(Producto)
+                .where(Producto.id.in_(delta))
+                .values(cantidad=func.coalesce(Producto.cantidad, 0) + case(delta, value=Producto.id))
+                .execution_options(synchronize_session=False)
+            )
+            actualizar_resumen([
+                ((productos[p].categoria_id, productos[p].cantidad, productos[p].precio_costo, productos[p].umbral_reorden),
+                 (productos[p].categoria_id, productos[p].cantidad + cambio, productos[p].precio_costo, productos[p].umbral_reorden))
+                for p, cambio in delta.items()
+            ])
+        if filas:
+            db.session.execute(insert(MovimientoInventario), filas)
+            acumular_movimientos(filas)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error al registrar lote de movimientos: {str(e)}", extra={
+            'type': 'server_error',
+            'error': str(e)
+        })
+        return jsonify({"error": "Error al registrar movimientos"}), 500
+
+    resultados.sort(key=lambda r: r['indice'])
+    return jsonify({
+        'registrados': len(filas),
+        'rechazados': len(resultados) - len(filas),
+        'resultados': resultados
+    }), 200
+
+# Sugerencias de reposición
+REPOSICION_DIAS_DEFAULT = 180
+REPOSICION_DIAS_MAX = 730
+
+def leer_datos_reposicion(dias_historia, proveedor_id=None):
+    """Trae en DataFrames todo lo que necesita el cálculo, una consulta por tabla.
+
+    La demanda llega sumada por producto y día desde SQL, así que el tamaño
+    no depende de cuántos movimientos hubo cada día.
+    """
+    conexion = db.session.connection()
+    dia = func.date(MovimientoInventario.fecha)
+    demanda = pd.read_sql(
+        select(MovimientoInventario.producto_id, dia.label('dia'),
+               func.sum(MovimientoInventario.cantidad).label('cantidad'))
+        .where(MovimientoInventario.tipo.in_(TIPOS_SALIDA),
+               MovimientoInventario.fecha >= inicio_de_hoy() - timedelta(days=dias_historia))
+        .group_by(MovimientoInventario.producto_id, dia),
+        conexion)
+    productos = pd.read_sql(
+        select(Producto.id, Producto.nombre, Producto.cantidad, Producto.umbral_reorden,
+               Producto.precio_costo), conexion)
+    # Proveedor y precio de la última línea de compra de cada producto
+    ultima_linea = (select(func.max(OrdenCompraItem.id))
+                    .join(OrdenCompra)
+                    .where(OrdenCompra.estado != 'cancelada')
+                    .group_by(OrdenCompraItem.producto_id))
+    proveedores = pd.read_sql(
+        select(OrdenCompraItem.producto_id, OrdenCompra.proveedor_id, OrdenCompraItem.precio_unitario)
+        .join(OrdenCompra)
+        .where(OrdenCompraItem.id.in_(ultima_linea)), conexion)
+    ordenes = pd.read_sql(
+        select(OrdenCompra.proveedor_id, OrdenCompra.fecha_creacion, OrdenCompra.fecha_entrega)
+        .where(OrdenCompra.estado != 'cancelada'), conexion)
+    en_camino = pd.read_sql(
+        select(OrdenCompraItem.producto_id, func.sum(OrdenCompraItem.cantidad).label('cantidad'))
+        .join(OrdenCompra)
+        .where(OrdenCompra.estado == 'pendiente')
+        .group_by(OrdenCompraItem.producto_id), conexion)
+    if proveedor_id is not None:
+        proveedores = proveedores[proveedores['proveedor_id'] == proveedor_id]
+        productos = productos[productos['id'].isin(proveedores['producto_id'])]
+    return demanda, productos, proveedores, ordenes, en_camino.set_index('producto_id')['cantidad']
+
+@app.route('/api/reposicion/sugerencias', methods=['GET'])
+def obtener_sugerencias_reposicion():
+    try:
+        dias = parse_limit(request.args.get('dias'), REPOSICION_DIAS_DEFAULT, REPOSICION_DIAS_MAX)
+        cobertura = int(request.args.get('cobertura', 14))
+        nivel_servicio = float(request.args.get('nivel_servicio', 0.95))
+        if not 0.5 <= nivel_servicio < 1:
+            raise ValueError("nivel_servicio debe estar entre 0.5 y 1")
+        if cobertura < 0:
+            raise ValueError("cobertura no puede ser negativa")
+        proveedor_id = int(request.args['proveedor_id']) if request.args.get('proveedor_id') else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    inicio = time.perf_counter()
+    demanda, productos, proveedores, ordenes, en_camino = leer_datos_reposicion(dias, proveedor_id)
+    sugerencias = sugerir(
+        productos,
+        estadisticas_demanda(demanda, inicio_de_hoy(), dias),
+        proveedores,
+        plazos_por_proveedor(ordenes),
+        en_camino,
+        cobertura=cobertura,
+        nivel_servicio=nivel_servicio)
+    nombres = dict(db.session.execute(select(Proveedor.id, Proveedor.nombre)).all())
+    ordenes_borrador = borradores(sugerencias, nombres)
+    logger.info(f"Sugerencias de reposición: {len(sugerencias)} productos", extra={
+        'type': 'reorder_suggestions',
+        'products': len(sugerencias),
+        'duration_ms': round((time.perf_counter() - inicio) * 1000, 1)
+    })
+    return jsonify({'ordenes': ordenes_borrador})
+
 # Utilidad para crear JWT
 def create_jwt(user):
     payload = {
@@ -799,11 +2269,22 @@ def login():
     if not username or not password:
         return jsonify({'error': 'Usuario y contraseña requeridos'}), 400
     user = Usuario.query.filter_by(username=username).first()
-    if not user or not user.verify_password(password):
-        return jsonify({'error': 'Credenciales inválidas'}), 401
+    try:
+        if not user or not user.verify_password(password):
+            return jsonify({'error': 'Credenciales inválidas'}), 401
+        # Rehash transparente si el hash guardado usa otro coste
+        if password_verifier.needs_rehash(user.password_hash):
+            user.password_hash = password_verifier.hash(password)
+            db.session.commit()
+    except VerificacionSaturada:
+        logger.warning("Cola de verificación de contraseñas llena", extra={
+            'type': 'login_overloaded'
+        })
+        return jsonify({'error': 'Demasiados inicios de sesión simultáneos, intente de nuevo'}), 503, {'Retry-After': '1'}
     token = create_jwt(user)
     return jsonify({'token': token, 'user': user.to_dict()})
 
 if __name__ == '__main__':
     logger.info("Iniciando aplicación")
+    precalentar_busqueda()
     app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
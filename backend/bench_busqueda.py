@@ -0,0 +1,108 @@
+"""Latencia de la búsqueda por trigramas frente a un ILIKE sobre el catálogo.
+
+Carga `--productos` productos sintéticos (si la tabla tiene menos), construye
+el índice en memoria y mide para cada consulta de prueba la búsqueda de
+/api/productos/buscar (índice + lectura de los productos encontrados) y el
+equivalente con `nombre ILIKE '%q%' OR sku ILIKE '%q%' OR descripcion ILIKE '%q%'`.
+También mide cuánto tarda en aplicarse la escritura de un producto.
+
+Uso:
+    python bench_busqueda.py --productos 100000
+    DATABASE_URL=postgresql://... python bench_busqueda.py --productos 100000
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from sqlalchemy import insert, or_, select  # noqa: E402
+
+from app import app, db, Producto, buscar_productos, indice_busqueda, registrar_cambios_busqueda  # noqa: E402
+
+PALABRAS = ['tornillo', 'tuerca', 'arandela', 'martillo', 'destornillador', 'taladro',
+            'cable', 'enchufe', 'bombilla', 'pintura', 'brocha', 'cinta', 'pegamento',
+            'manguera', 'llave', 'alicate', 'sierra', 'lija', 'clavo', 'candado']
+ADJETIVOS = ['acero', 'inoxidable', 'grande', 'chico', 'blanco', 'negro', 'rojo',
+             'galvanizado', 'reforzado', 'industrial', 'premium', 'económico']
+CONSULTAS = ['tornillo', 'tornilo', 'destornilador acero', 'llave', 'SKU-0012345',
+             'pegamnto', 'cinta negra', 'galvanizado']
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def sembrar(total):
+    existentes = db.session.execute(select(db.func.count(Producto.id))).scalar()
+    aleatorio = random.Random(42)
+    for inicio in range(existentes, total, 5000):
+        filas = []
+        for i in range(inicio, min(inicio + 5000, total)):
+            nombre = f"{aleatorio.choice(PALABRAS)} {aleatorio.choice(ADJETIVOS)} {aleatorio.randint(1, 500)}"
+            filas.append({'nombre': nombre.capitalize(), 'sku': f"SKU-{i:07d}",
+                          'precio_costo': 1, 'precio_venta': 2, 'cantidad': 0, 'umbral_reorden': 10,
+                          'descripcion': f"{aleatorio.choice(PALABRAS)} {aleatorio.choice(ADJETIVOS)}"})
+        db.session.execute(insert(Producto), filas)
+    db.session.commit()
+    inicio = time.perf_counter()
+    indice_busqueda.recargar()
+    print(f"{total} productos, índice construido en {time.perf_counter() - inicio:.1f} s")
+
+
+def medir_actualizacion():
+    producto = db.session.get(Producto, 1)
+    producto.nombre = 'Zapatilla deportiva'
+    registrar_cambios_busqueda([producto.id])
+    db.session.commit()
+    inicio = time.perf_counter()
+    encontrados = buscar_productos('zapatilla', 5)
+    print(f"búsqueda tras escribir un producto: {(time.perf_counter() - inicio) * 1000:.1f} ms "
+          f"(encontrado: {any(p.id == 1 for p, _ in encontrados)})")
+
+
+def ilike(q, limit):
+    patron = f"%{q}%"
+    return db.session.execute(
+        select(Producto)
+        .where(or_(Producto.nombre.ilike(patron), Producto.sku.ilike(patron),
+                   Producto.descripcion.ilike(patron)))
+        .order_by(Producto.id)
+        .limit(limit)
+    ).scalars().all()
+
+
+def medir(funcion, q, repeticiones, limit):
+    latencias = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultados = funcion(q, limit)
+        latencias.append(time.perf_counter() - inicio)
+        db.session.rollback()
+    return latencias, len(resultados)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--productos', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        sembrar(args.productos)
+        print(f"{'consulta':<24}{'trigramas p50':>14}{'p95':>8}{'n':>5}{'ILIKE p50':>12}{'p95':>8}{'n':>5}")
+        for q in CONSULTAS:
+            indice, n_indice = medir(buscar_productos, q, args.repeticiones, args.limit)
+            escaneo, n_ilike = medir(ilike, q, args.repeticiones, args.limit)
+            print(f"{q:<24}{percentil(indice, 50) * 1000:>11.1f} ms{percentil(indice, 95) * 1000:>8.1f}"
+                  f"{n_indice:>5}{percentil(escaneo, 50) * 1000:>9.1f} ms{percentil(escaneo, 95) * 1000:>8.1f}"
+                  f"{n_ilike:>5}")
+        medir_actualizacion()
+
+
+if __name__ == '__main__':
+    main()
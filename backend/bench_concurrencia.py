@@ -0,0 +1,113 @@
+"""Carga sobre los endpoints existentes con distintos perfiles de gunicorn.
+
+Para cada perfil (clase de worker x procesos x hilos) levanta gunicorn con
+gunicorn.conf.py, lanza `--clientes` clientes concurrentes durante
+`--duracion` segundos repartidos entre los endpoints de lectura y reporta
+throughput y latencias. Al final de cada corrida se lee /api/health/pool de
+los workers para ver en uso, desborde y espera por conexión.
+
+Uso (con la base ya sembrada, p. ej. con bench_indices.py --sembrar):
+    DATABASE_URL=postgresql://... python bench_concurrencia.py \\
+        --perfiles sync:2:1 gthread:2:4 gthread:2:8 --clientes 32 --duracion 20
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ENDPOINTS = ['/api/productos', '/api/productos/1', '/api/categorias', '/api/proveedores',
+             '/api/reportes/resumen', '/api/ordenes-compra?limit=50',
+             '/api/productos/buscar?q=tornillo']
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def levantar(perfil, puerto):
+    worker_class, workers, threads = perfil.split(':')
+    env = dict(os.environ, GUNICORN_WORKER_CLASS=worker_class, WEB_CONCURRENCY=workers,
+               GUNICORN_THREADS=threads, PORT=str(puerto))
+    proceso = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+                               cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{puerto}"
+    for _ in range(100):
+        try:
+            requests.get(f"{url}/api/health", timeout=1)
+            return proceso, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    proceso.terminate()
+    raise RuntimeError(f"gunicorn no arrancó con el perfil {perfil}")
+
+
+def cargar(url, clientes, duracion):
+    latencias = []
+    estados = Counter()
+    lock = threading.Lock()
+    hasta = time.monotonic() + duracion
+
+    def cliente(n):
+        session = requests.Session()
+        i = n
+        while time.monotonic() < hasta:
+            inicio = time.perf_counter()
+            try:
+                estado = session.get(url + ENDPOINTS[i % len(ENDPOINTS)], timeout=60).status_code
+            except requests.RequestException:
+                estado = 'error'
+            with lock:
+                latencias.append(time.perf_counter() - inicio)
+                estados[estado] += 1
+            i += 1
+
+    with ThreadPoolExecutor(max_workers=clientes) as executor:
+        for n in range(clientes):
+            executor.submit(cliente, n)
+    return latencias, estados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--perfiles', nargs='+', default=['sync:1:1', 'sync:2:1', 'gthread:2:4', 'gthread:2:8'],
+                        help='clase:procesos:hilos')
+    parser.add_argument('--clientes', type=int, default=32)
+    parser.add_argument('--duracion', type=float, default=20.0)
+    parser.add_argument('--puerto', type=int, default=5055)
+    args = parser.parse_args()
+
+    print(f"{'perfil':<14}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errores':>9}"
+          f"{'espera pool ms':>16}{'timeouts':>10}")
+    for perfil in args.perfiles:
+        proceso, url = levantar(perfil, args.puerto)
+        try:
+            cargar(url, 2, 2)  # calentamiento: índices y cachés de cada worker
+            latencias, estados = cargar(url, args.clientes, args.duracion)
+            # Cada petición cae en algún worker; varias lecturas cubren a todos
+            pools = {}
+            for _ in range(4 * int(perfil.split(':')[1])):
+                stats = requests.get(f"{url}/api/health/pool", timeout=5).json()
+                pools[stats['pid']] = stats
+        finally:
+            proceso.terminate()
+            proceso.wait()
+        errores = sum(n for estado, n in estados.items() if estado == 'error' or estado >= 500)
+        espera = max((p.get('espera_maxima_ms', 0.0) for p in pools.values()), default=0.0)
+        timeouts = sum(p.get('timeouts', 0) for p in pools.values())
+        print(f"{perfil:<14}{len(latencias) / args.duracion:>9.1f}{percentil(latencias, 50) * 1000:>9.1f}"
+              f"{percentil(latencias, 95) * 1000:>9.1f}{percentil(latencias, 99) * 1000:>9.1f}"
+              f"{errores:>9}{espera:>16.1f}{timeouts:>10}")
+
+
+if __name__ == '__main__':
+    main()
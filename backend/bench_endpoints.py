@@ -0,0 +1,179 @@
+"""Latencia y throughput de los endpoints reales sobre un backend levantado.
+
+Cada escenario (listado, detalle, reporte, alta de movimiento, login) corre
+`--duracion` segundos con `--concurrencia` clientes HTTP y se guarda en un
+JSON con p50/p95/p99, media, throughput y códigos de estado. Con --comparar
+se contrastan dos corridas (p. ej. antes y después de un cambio) y se marcan
+los escenarios cuyo p95 o throughput empeoró más allá de la tolerancia.
+
+Uso (con datos de generar_datos.py):
+    python generar_datos.py --productos 50000 --movimientos 2000000
+    gunicorn -c gunicorn.conf.py app:app &
+    python bench_endpoints.py --url http://localhost:5000 --concurrencia 16 --salida v1.json
+    python bench_endpoints.py --comparar v1.json v2.json
+"""
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+
+# Un escenario empeora si su p95 supera al anterior (o su throughput cae) en este factor
+TOLERANCIA = 1.2
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def escenarios(args, ids):
+    """{nombre: función(session, aleatorio) -> respuesta}."""
+    hasta = args.hasta
+    desde = hasta - timedelta(days=args.dias_reporte)
+    url = args.url
+    return {
+        'listado': lambda s, r: s.get(f"{url}/api/productos", params={'limit': 50}),
+        'detalle': lambda s, r: s.get(f"{url}/api/productos/{r.choice(ids)}"),
+        'reporte': lambda s, r: s.get(f"{url}/api/reportes/movimientos", params={
+            'fecha_inicio': desde.isoformat(), 'fecha_fin': hasta.isoformat()}),
+        'reporte_agregado': lambda s, r: s.get(f"{url}/api/reportes/movimientos/agregado", params={
+            'granularidad': 'semana', 'producto_id': r.choice(ids)}),
+        'movimiento': lambda s, r: s.post(f"{url}/api/movimientos", json={
+            'producto_id': r.choice(ids), 'tipo': 'entrada', 'cantidad': 1, 'usuario': 'bench'}),
+        'login': lambda s, r: s.post(f"{url}/api/login", json={
+            'username': args.usuario, 'password': args.password}),
+    }
+
+
+def correr(peticion, concurrencia, duracion, semilla):
+    latencias = []
+    estados = Counter()
+    lock = threading.Lock()
+    hasta = time.monotonic() + duracion
+
+    def cliente(n):
+        session = requests.Session()
+        aleatorio = random.Random(semilla * 1000 + n)
+        while time.monotonic() < hasta:
+            inicio = time.perf_counter()
+            try:
+                estado = peticion(session, aleatorio).status_code
+            except requests.RequestException:
+                estado = 'error'
+            with lock:
+                latencias.append(time.perf_counter() - inicio)
+                estados[estado] += 1
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+        for n in range(concurrencia):
+            executor.submit(cliente, n)
+    transcurrido = time.perf_counter() - inicio
+    errores = sum(n for estado, n in estados.items() if estado == 'error' or estado >= 500)
+    return {
+        'peticiones': len(latencias),
+        'errores': errores,
+        'estados': {str(estado): n for estado, n in sorted(estados.items(), key=str)},
+        'throughput': round(len(latencias) / transcurrido, 2),
+        'media_ms': round(statistics.fmean(latencias) * 1000, 3) if latencias else 0.0,
+        'p50_ms': round(percentil(latencias, 50) * 1000, 3),
+        'p95_ms': round(percentil(latencias, 95) * 1000, 3),
+        'p99_ms': round(percentil(latencias, 99) * 1000, 3),
+    }
+
+
+def version():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def medir(args):
+    ids = [p['id'] for p in requests.get(f"{args.url}/api/productos", params={'limit': 500},
+                                         timeout=30).json()['items']]
+    if not ids:
+        sys.exit("No hay productos: generar datos con generar_datos.py")
+    todos = escenarios(args, ids)
+    elegidos = args.escenarios or list(todos)
+    resultados = {}
+    print(f"{'escenario':<18}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errores':>9}")
+    for nombre in elegidos:
+        correr(todos[nombre], 1, args.calentamiento, args.semilla)
+        r = correr(todos[nombre], args.concurrencia, args.duracion, args.semilla)
+        resultados[nombre] = r
+        print(f"{nombre:<18}{r['throughput']:>9.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+              f"{r['p99_ms']:>9.1f}{r['errores']:>9}")
+    salida = {
+        'version': version(),
+        'fecha': datetime.utcnow().isoformat(),
+        'url': args.url,
+        'concurrencia': args.concurrencia,
+        'duracion': args.duracion,
+        'escenarios': resultados,
+    }
+    with open(args.salida, 'w') as archivo:
+        json.dump(salida, archivo, indent=2)
+
+
+def comparar(ruta_antes, ruta_despues):
+    with open(ruta_antes) as a, open(ruta_despues) as b:
+        antes, despues = json.load(a), json.load(b)
+    print(f"{antes.get('version')} -> {despues.get('version')}")
+    regresiones = 0
+    print(f"{'escenario':<18}{'p95 antes':>11}{'p95 después':>13}{'req/s antes':>13}{'req/s después':>15}"
+          f"  observaciones")
+    for nombre, d in despues['escenarios'].items():
+        a = antes['escenarios'].get(nombre)
+        if a is None:
+            continue
+        notas = []
+        if d['p95_ms'] > a['p95_ms'] * TOLERANCIA:
+            notas.append("p95 más alto")
+        if d['throughput'] * TOLERANCIA < a['throughput']:
+            notas.append("menos throughput")
+        if d['errores'] > a['errores']:
+            notas.append("más errores")
+        regresiones += bool(notas)
+        print(f"{nombre:<18}{a['p95_ms']:>11.1f}{d['p95_ms']:>13.1f}{a['throughput']:>13.1f}"
+              f"{d['throughput']:>15.1f}  {', '.join(notas) or 'ok'}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--escenarios', nargs='+',
+                        choices=['listado', 'detalle', 'reporte', 'reporte_agregado', 'movimiento', 'login'])
+    parser.add_argument('--concurrencia', type=int, default=16)
+    parser.add_argument('--duracion', type=float, default=20.0, help='segundos por escenario')
+    parser.add_argument('--calentamiento', type=float, default=2.0)
+    parser.add_argument('--hasta', type=datetime.fromisoformat, default=datetime(2026, 1, 1),
+                        help='fin del rango del reporte (el --hasta de generar_datos.py)')
+    parser.add_argument('--dias-reporte', type=int, default=7)
+    parser.add_argument('--usuario', default='bench')
+    parser.add_argument('--password', default='bench123')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--salida', default='bench_endpoints.json')
+    parser.add_argument('--comparar', nargs=2, metavar=('ANTES', 'DESPUES'))
+    args = parser.parse_args()
+
+    if args.comparar:
+        sys.exit(1 if comparar(*args.comparar) else 0)
+    medir(args)
+
+
+if __name__ == '__main__':
+    main()
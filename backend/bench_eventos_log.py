@@ -0,0 +1,128 @@
+"""CPU por petición de los logs de los caminos calientes, antes y después de StructuredLogger.
+
+Reproduce los logs de obtener_producto, require_token y el handler de 404
+tal como se escribían antes (f-strings, `dict(request.headers)` y el
+producto formateado aunque el DEBUG se descarte) y con la fachada
+perezosa, con el logger en INFO y un handler que formatea como Logstash.
+También mide require_token con muestreo de los eventos `auth`.
+
+Uso:
+    python bench_eventos_log.py --iteraciones 20000
+"""
+import argparse
+import logging
+import os
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app import app, cabeceras_seguras  # noqa: E402
+from logging_config import StructuredLogger  # noqa: E402
+
+CABECERAS = {
+    'Host': 'backend:5000', 'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36',
+    'Accept': 'application/json, text/plain, */*', 'Accept-Language': 'es-AR,es;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br', 'Authorization': 'Bearer ' + 'x' * 180,
+    'X-API-Token': 't' * 32, 'Origin': 'http://localhost:8080', 'Referer': 'http://localhost:8080/',
+    'Connection': 'keep-alive', 'X-Forwarded-For': '10.0.0.12', 'X-Request-ID': 'a' * 32,
+}
+PRODUCTO = {'id': 123, 'nombre': 'Tornillo acero inoxidable 6mm', 'sku': 'TOR-000123', 'precio_costo': 1.25,
+            'precio_venta': 2.1, 'descripcion': 'Tornillo de acero inoxidable, caja x100 ' * 4,
+            'cantidad': 340, 'umbral_reorden': 50, 'categoria_id': 4, 'categoria': 'Ferretería',
+            'fecha_creacion': '2025-03-01T10:00:00', 'fecha_actualizacion': '2025-09-12T16:20:00'}
+
+
+class Sumidero(logging.Handler):
+    """Formatea cada registro como lo haría el envío a Logstash y lo descarta."""
+
+    def emit(self, record):
+        self.format(record)
+
+
+def preparar_logger():
+    logger = logging.getLogger('bench_eventos')
+    logger.handlers.clear()
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    try:
+        from logstash.formatter import LogstashFormatterVersion1
+        formatter = LogstashFormatterVersion1()
+    except ImportError:
+        formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
+    handler = Sumidero()
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+    return logger
+
+
+def antes_obtener_producto(logger, eventos, request, id=123, producto=PRODUCTO):
+    logger.info(f"Obteniendo producto con ID: {id}", extra={'type': 'product_get', 'method': 'GET', 'product_id': id})
+    logger.debug(f"Producto encontrado: {producto}", extra={'type': 'product_get', 'product_id': id, 'data': producto})
+
+
+def despues_obtener_producto(logger, eventos, request, id=123, producto=PRODUCTO):
+    eventos.info('product_get', lambda: f"Obteniendo producto con ID: {id}",
+                 lambda: {'method': 'GET', 'product_id': id})
+    eventos.debug('product_get', lambda: f"Producto encontrado: {producto}",
+                  lambda: {'product_id': id, 'data': producto})
+
+
+def antes_require_token(logger, eventos, request):
+    logger.info(f"Validando token para ruta: {request.path}", extra={
+        'type': 'auth', 'method': request.method, 'path': request.path, 'headers': dict(request.headers)})
+    logger.info("Token válido, procediendo con la petición", extra={'type': 'auth_success'})
+
+
+def despues_require_token(logger, eventos, request):
+    eventos.info('auth', lambda: f"Validando token para ruta: {request.path}",
+                 lambda: {'method': request.method, 'path': request.path},
+                 detalle=lambda: {'headers': cabeceras_seguras()})
+    eventos.info('auth_success', "Token válido, procediendo con la petición")
+
+
+def antes_not_found(logger, eventos, request):
+    logger.error(f"Recurso no encontrado: {request.path}", extra={
+        'type': 'not_found', 'path': request.path, 'method': request.method, 'headers': dict(request.headers)})
+
+
+def despues_not_found(logger, eventos, request):
+    eventos.error('not_found', lambda: f"Recurso no encontrado: {request.path}",
+                  lambda: {'path': request.path, 'method': request.method},
+                  detalle=lambda: {'headers': cabeceras_seguras()})
+
+
+def medir(funcion, logger, eventos, request, iteraciones):
+    for _ in range(200):
+        funcion(logger, eventos, request)
+    inicio = time.process_time()
+    for _ in range(iteraciones):
+        funcion(logger, eventos, request)
+    return (time.process_time() - inicio) / iteraciones * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iteraciones', type=int, default=20000)
+    parser.add_argument('--muestreo-auth', type=float, default=0.01)
+    args = parser.parse_args()
+
+    logger = preparar_logger()
+    eventos = StructuredLogger(logger)
+    muestreados = StructuredLogger(logger, {'auth': args.muestreo_auth, 'auth_success': args.muestreo_auth})
+    casos = [
+        ('obtener_producto', antes_obtener_producto, despues_obtener_producto, eventos),
+        ('require_token', antes_require_token, despues_require_token, eventos),
+        (f"require_token (muestreo {args.muestreo_auth:g})", antes_require_token, despues_require_token, muestreados),
+        ('404', antes_not_found, despues_not_found, eventos),
+    ]
+    print(f"{'camino':<34}{'antes µs':>10}{'después µs':>12}{'ahorro µs':>11}")
+    with app.test_request_context('/api/movimientos/batch', method='POST', headers=CABECERAS):
+        from flask import request
+        for nombre, antes, despues, fachada in casos:
+            t_antes = medir(antes, logger, fachada, request, args.iteraciones)
+            t_despues = medir(despues, logger, fachada, request, args.iteraciones)
+            print(f"{nombre:<34}{t_antes:>10.1f}{t_despues:>12.1f}{t_antes - t_despues:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""Planes y tiempos de las consultas frecuentes, antes y después de los índices.
+
+Ejecuta EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) sobre las consultas que
+construye la propia aplicación (reporte de movimientos, historial de un
+producto, búsqueda de productos por nombre/sku y órdenes pendientes) y guarda
+el plan, el tipo de acceso a cada tabla y los tiempos en un JSON. Con
+--comparar se contrastan dos corridas y se marcan las regresiones: una tabla
+que vuelve a leerse con Seq Scan o una consulta que tarda más que antes.
+
+La corrida "antes" usa --sin-indices: borra los índices de la revisión
+b71f3e9c2d58 dentro de una transacción que se revierte al terminar, así el
+esquema queda como estaba (mientras dura, esas tablas quedan bloqueadas para
+otras sesiones). No conviene `flask db downgrade 8a4d6c0b7e21`:
+además de esos índices borra las tablas de las revisiones posteriores
+(producto_busqueda_cambio, movimiento_diario) con sus datos.
+
+Necesita PostgreSQL (DATABASE_URL). Uso:
+    python bench_indices.py --sembrar --productos 200000 --movimientos 5000000
+    python bench_indices.py --sin-indices --salida antes.json
+    python bench_indices.py --salida despues.json
+    python bench_indices.py --comparar antes.json despues.json
+"""
+import argparse
+import json
+import statistics
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app import app, db, MovimientoInventario, OrdenCompra, Producto, consulta_movimientos, consulta_productos
+
+# Índices creados por la revisión b71f3e9c2d58 (indices_consultas_frecuentes)
+INDICES_MIGRACION = [
+    'ix_movimiento_inventario_fecha',
+    'ix_movimiento_inventario_producto_id_fecha',
+    'ix_orden_compra_estado_fecha_entrega',
+    'ix_orden_compra_proveedor_id',
+    'ix_orden_compra_item_orden_compra_id',
+    'ix_orden_compra_item_producto_id',
+    'ix_producto_categoria_id',
+    'ix_producto_nombre_id',
+    'ix_producto_nombre_trgm',
+    'ix_producto_sku_trgm',
+]
+# Una consulta se considera más lenta si supera al tiempo anterior en este factor
+TOLERANCIA = 1.2
+
+SEMILLA_SQL = [
+    """INSERT INTO categoria (nombre_categoria)
+       SELECT 'Bench categoría ' || g FROM generate_series(1, :categorias) g
+       ON CONFLICT (nombre_categoria) DO NOTHING""",
+    """INSERT INTO proveedor (nombre, email, fecha_creacion, fecha_actualizacion)
+       SELECT 'Bench proveedor ' || g, 'p' || g || '@bench.local', now(), now()
+       FROM generate_series(1, :proveedores) g""",
+    """INSERT INTO producto (nombre, sku, precio_costo, precio_venta, descripcion, cantidad,
+                             umbral_reorden, categoria_id, fecha_creacion, fecha_actualizacion)
+       SELECT 'Producto ' || substr(md5(g::text), 1, 10), 'BENCH-' || g,
+              (random() * 100)::numeric(10, 2), (random() * 150)::numeric(10, 2), '',
+              (random() * 500)::int, 10,
+              (SELECT min(id) FROM categoria) + g % :categorias, now(), now()
+       FROM generate_series(1, :productos) g""",
+    """INSERT INTO orden_compra (proveedor_id, fecha_creacion, fecha_entrega, estado, total)
+       SELECT (SELECT min(id) FROM proveedor) + g % :proveedores,
+              now() - (g % 365) * interval '1 day',
+              now() + ((g % 60) - 30) * interval '1 day',
+              (ARRAY['pendiente', 'completada', 'cancelada'])[1 + g % 3], 0
+       FROM generate_series(1, :ordenes) g""",
+    """INSERT INTO movimiento_inventario (producto_id, fecha, tipo, cantidad, usuario)
+       SELECT p.min_id + g % :productos,
+              now() - (g % (365 * 24 * 60)) * interval '1 minute',
+              (ARRAY['entrada', 'venta', 'uso', 'salida'])[1 + g % 4], 1 + g % 20, 'bench'
+       FROM generate_series(1, :movimientos) g,
+            (SELECT min(id) AS min_id FROM producto WHERE sku LIKE 'BENCH-%') p""",
+]
+
+
+def consultas(args):
+    """(nombre, sentencia) de cada consulta, construidas con el código de la app."""
+    hasta = datetime.utcnow()
+    desde = hasta - timedelta(days=args.dias)
+    producto_id = db.session.query(db.func.min(Producto.id)).scalar() or 1
+
+    def listado(filtros):
+        query, (columna, _), _ = consulta_productos(filtros)
+        return query.order_by(columna, Producto.id).limit(51).statement
+
+    return [
+        ('reporte_movimientos_rango',
+         consulta_movimientos(desde.isoformat(), hasta.isoformat())),
+        ('movimientos_producto_fecha',
+         db.select(MovimientoInventario)
+         .where(MovimientoInventario.producto_id == producto_id,
+                MovimientoInventario.fecha >= desde)
+         .order_by(MovimientoInventario.fecha.desc())),
+        ('productos_nombre_ilike', listado({'nombre': args.texto})),
+        ('productos_sku_ilike', listado({'sku': args.sku})),
+        ('productos_categoria', listado({'categoria_id': str(args.categoria_id)})),
+        ('ordenes_pendientes_vencidas',
+         db.select(OrdenCompra)
+         .where(OrdenCompra.estado == 'pendiente', OrdenCompra.fecha_entrega < hasta)
+         .order_by(OrdenCompra.fecha_entrega)),
+    ]
+
+
+def accesos(nodo, encontrados=None):
+    """{tabla: [tipos de nodo]} para cada lectura de tabla del plan."""
+    encontrados = {} if encontrados is None else encontrados
+    if 'Relation Name' in nodo:
+        encontrados.setdefault(nodo['Relation Name'], []).append(nodo['Node Type'])
+    for hijo in nodo.get('Plans', []):
+        accesos(hijo, encontrados)
+    return encontrados
+
+
+def explicar(conexion, sentencia, repeticiones):
+    compilada = sentencia.compile(dialect=conexion.dialect)
+    sql = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + str(compilada)
+    tiempos = []
+    plan = None
+    for _ in range(repeticiones):
+        plan = conexion.exec_driver_sql(sql, compilada.params).scalar()[0]
+        tiempos.append(plan['Execution Time'])
+    return {
+        'sql': str(compilada),
+        'accesos': accesos(plan['Plan']),
+        'planning_ms': plan['Planning Time'],
+        'execution_ms_mediana': statistics.median(tiempos),
+        'execution_ms': tiempos,
+        'shared_hit': plan['Plan'].get('Shared Hit Blocks'),
+        'shared_read': plan['Plan'].get('Shared Read Blocks'),
+        'plan': plan['Plan'],
+    }
+
+
+def sembrar(args):
+    parametros = {nombre: getattr(args, nombre) for nombre in
+                  ('categorias', 'proveedores', 'productos', 'ordenes', 'movimientos')}
+    with db.engine.begin() as conexion:
+        for sql in SEMILLA_SQL:
+            inicio = datetime.utcnow()
+            conexion.execute(text(sql), parametros)
+            print(f"{sql.split()[2]:<24}{(datetime.utcnow() - inicio).total_seconds():>8.1f} s")
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conexion:
+        conexion.exec_driver_sql('VACUUM ANALYZE')
+
+
+def medir(args):
+    with db.engine.connect() as conexion:
+        revision = conexion.exec_driver_sql('SELECT version_num FROM alembic_version').scalar()
+        transaccion = conexion.begin()
+        try:
+            if args.sin_indices:
+                # El DDL de PostgreSQL es transaccional: el rollback los restaura
+                for indice in INDICES_MIGRACION:
+                    conexion.exec_driver_sql(f'DROP INDEX IF EXISTS {indice}')
+                revision += ' sin índices de b71f3e9c2d58'
+            resultados = {nombre: explicar(conexion, sentencia, args.repeticiones)
+                          for nombre, sentencia in consultas(args)}
+        finally:
+            transaccion.rollback()
+    salida = {'revision': revision, 'fecha': datetime.utcnow().isoformat(), 'consultas': resultados}
+    with open(args.salida, 'w') as archivo:
+        json.dump(salida, archivo, indent=2, default=str)
+
+    print(f"revisión {revision}")
+    print(f"{'consulta':<32}{'mediana ms':>12}  accesos")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<32}{r['execution_ms_mediana']:>12.2f}  {r['accesos']}")
+
+
+def comparar(ruta_antes, ruta_despues):
+    with open(ruta_antes) as a, open(ruta_despues) as b:
+        antes, despues = json.load(a)['consultas'], json.load(b)['consultas']
+    regresiones = 0
+    print(f"{'consulta':<32}{'antes ms':>10}{'después ms':>12}  observaciones")
+    for nombre, d in despues.items():
+        a = antes.get(nombre)
+        if a is None:
+            continue
+        notas = []
+        for tabla, tipos in d['accesos'].items():
+            if 'Seq Scan' in tipos and 'Seq Scan' not in a['accesos'].get(tabla, []):
+                notas.append(f"Seq Scan nuevo en {tabla}")
+        if d['execution_ms_mediana'] > a['execution_ms_mediana'] * TOLERANCIA:
+            notas.append("más lenta")
+        regresiones += bool(notas)
+        print(f"{nombre:<32}{a['execution_ms_mediana']:>10.2f}{d['execution_ms_mediana']:>12.2f}"
+              f"  {', '.join(notas) or 'ok'}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sembrar', action='store_true', help='inserta datos sintéticos y sale')
+    parser.add_argument('--categorias', type=int, default=50)
+    parser.add_argument('--proveedores', type=int, default=500)
+    parser.add_argument('--productos', type=int, default=200000)
+    parser.add_argument('--ordenes', type=int, default=200000)
+    parser.add_argument('--movimientos', type=int, default=5000000)
+    parser.add_argument('--dias', type=int, default=7, help='rango de fechas del reporte')
+    parser.add_argument('--texto', default='a1b', help='filtro de nombre para la búsqueda')
+    parser.add_argument('--sku', default='BENCH-1234')
+    parser.add_argument('--categoria-id', type=int, default=1)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--sin-indices', action='store_true',
+                        help='mide sin los índices de b71f3e9c2d58 (se restauran al terminar)')
+    parser.add_argument('--salida', default='explain.json')
+    parser.add_argument('--comparar', nargs=2, metavar=('ANTES', 'DESPUES'))
+    args = parser.parse_args()
+
+    if args.comparar:
+        sys.exit(1 if comparar(*args.comparar) else 0)
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            parser.error("DATABASE_URL debe apuntar a PostgreSQL")
+        if args.sembrar:
+            sembrar(args)
+        else:
+            medir(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Tiempo de serialización y bytes transferidos de los listados de la API.
+
+Para cada listado toma la respuesta real (vía el cliente de pruebas de Flask,
+sin red) y mide cuánto tarda en serializarse con el proveedor JSON de Flask
+basado en el módulo json y con orjson, y cuántos bytes ocupa sin comprimir,
+con gzip y con brotli (con el costo de comprimir). Los listados con ?fields=
+muestran lo que ahorra pedir solo las columnas que usa la pantalla; la
+columna "petición ms" es la petición completa (consulta incluida).
+
+Uso (con datos de generar_datos.py):
+    DATABASE_URL=sqlite:///bench.db python generar_datos.py --crear-tablas --productos 5000 --movimientos 200000
+    DATABASE_URL=sqlite:///bench.db python bench_json.py --repeticiones 50
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from app import app
+from json_rapido import OrjsonProvider, StdlibProvider, brotli, comprimir
+
+
+def listados(args):
+    hasta = args.hasta
+    desde = hasta - timedelta(days=args.dias_reporte)
+    return {
+        'productos': ('/api/productos', {'limit': 500}),
+        'productos ?fields': ('/api/productos', {'limit': 500, 'fields': 'id,nombre,sku,cantidad'}),
+        'proveedores': ('/api/proveedores', {}),
+        'ordenes-compra': ('/api/ordenes-compra', {'limit': 500}),
+        'ordenes ?fields': ('/api/ordenes-compra', {'limit': 500, 'fields': 'id,proveedor,estado,total'}),
+        'reporte movimientos': ('/api/reportes/movimientos', {
+            'fecha_inicio': desde.isoformat(), 'fecha_fin': hasta.isoformat()}),
+    }
+
+
+def tiempo(funcion, repeticiones):
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def serializar(proveedor, datos):
+    return lambda: proveedor.response(datos).get_data()
+
+
+def comprimido(cuerpo, codificacion):
+    return lambda: comprimir(app.response_class(cuerpo, mimetype='application/json'),
+                             codificacion, minimo=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=30)
+    parser.add_argument('--hasta', type=datetime.fromisoformat, default=datetime(2026, 1, 1),
+                        help='fin del rango del reporte (el --hasta de generar_datos.py)')
+    parser.add_argument('--dias-reporte', type=int, default=7)
+    args = parser.parse_args()
+
+    proveedores = {'json': StdlibProvider(app), 'orjson': OrjsonProvider(app)}
+    codificaciones = ['gzip'] + (['br'] if brotli is not None else [])
+    cliente = app.test_client()
+
+    print(f"{'listado':<21}{'filas':>7}{'petición ms':>13}{'json ms':>9}{'orjson ms':>11}{'x':>6}{'KB':>9}"
+          + ''.join(f"{c + ' KB':>9}{c + ' ms':>9}" for c in codificaciones))
+    with app.test_request_context():
+        for nombre, (ruta, parametros) in listados(args).items():
+            respuesta = cliente.get(ruta, query_string=parametros)
+            if respuesta.status_code != 200:
+                print(f"{nombre:<21}HTTP {respuesta.status_code}")
+                continue
+            datos = respuesta.get_json()
+            filas = len(datos['items'] if isinstance(datos, dict) else datos)
+            t_peticion = tiempo(lambda: cliente.get(ruta, query_string=parametros), args.repeticiones)
+            t_json = tiempo(serializar(proveedores['json'], datos), args.repeticiones)
+            t_orjson = tiempo(serializar(proveedores['orjson'], datos), args.repeticiones)
+            cuerpo = proveedores['orjson'].response(datos).get_data()
+            linea = (f"{nombre:<21}{filas:>7}{t_peticion:>13.2f}{t_json:>9.2f}{t_orjson:>11.2f}{t_json / t_orjson:>6.1f}"
+                     f"{len(cuerpo) / 1024:>9.1f}")
+            for codificacion in codificaciones:
+                funcion = comprimido(cuerpo, codificacion)
+                t_comprimir = tiempo(funcion, args.repeticiones)
+                bytes_ = len(funcion().get_data())
+                linea += f"{bytes_ / 1024:>9.1f}{t_comprimir:>9.2f}"
+            print(linea)
+
+
+if __name__ == '__main__':
+    main()
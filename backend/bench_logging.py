@@ -0,0 +1,85 @@
+"""Benchmark de latencia de peticiones con un destino de logs lento.
+
+Compara GET /api/productos (que emite registros INFO) en tres escenarios:
+sin destino remoto, con el destino lento conectado de forma síncrona (como
+estaba TCPLogstashHandler) y con el mismo destino detrás de AsyncBatchHandler.
+
+Uso:
+    python bench_logging.py --peticiones 200 --retardo-ms 5
+"""
+import argparse
+import logging
+import os
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app import app, db, Producto  # noqa: E402
+from logging_config import AsyncBatchHandler  # noqa: E402
+
+
+class SlowHandler(logging.Handler):
+    """Simula un Logstash lento: cada escritura tarda `retardo` segundos."""
+
+    def __init__(self, retardo):
+        super().__init__()
+        self.retardo = retardo
+
+    def emit(self, record):
+        time.sleep(self.retardo)
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def medir(client, peticiones):
+    latencias = []
+    for _ in range(peticiones):
+        inicio = time.perf_counter()
+        client.get('/api/productos')
+        latencias.append(time.perf_counter() - inicio)
+    return latencias
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--peticiones', type=int, default=200)
+    parser.add_argument('--retardo-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    root = logging.getLogger()
+    # La salida por consola no es lo que se mide
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(Producto(nombre='Bench', sku='BENCH-1', precio_costo=1, precio_venta=2))
+        db.session.commit()
+
+    client = app.test_client()
+    retardo = args.retardo_ms / 1000
+    escenarios = [
+        ('sin destino', None),
+        ('síncrono lento', SlowHandler(retardo)),
+        ('asíncrono lento', AsyncBatchHandler(SlowHandler(retardo), capacity=1000)),
+    ]
+
+    print(f"{'escenario':<18}{'p50 ms':>10}{'p99 ms':>10}{'descartados':>13}")
+    for nombre, handler in escenarios:
+        if handler is not None:
+            root.addHandler(handler)
+        latencias = medir(client, args.peticiones)
+        if handler is not None:
+            root.removeHandler(handler)
+        descartados = handler.stats()['dropped'] if isinstance(handler, AsyncBatchHandler) else 0
+        print(f"{nombre:<18}{percentil(latencias, 50) * 1000:>10.2f}"
+              f"{percentil(latencias, 99) * 1000:>10.2f}{descartados:>13}")
+        if isinstance(handler, AsyncBatchHandler):
+            handler.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark de latencia de endpoints normales durante una avalancha de logins.
+
+Mide la latencia de GET /api/categorias primero en reposo y después mientras
+`--logins` clientes concurrentes hacen POST /api/login en bucle (el escenario
+del inicio de turno). Con la verificación acotada, los logins que no caben en
+la cola reciben 503 y el resto del tráfico sigue respondiendo.
+
+Uso (con el backend levantado, p. ej. gunicorn con hilos):
+    python bench_login.py --url http://localhost:5001 --usuario admin \\
+        --password admin123 --logins 200 --duracion 10
+"""
+import argparse
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def medir_lecturas(url, hasta, clientes):
+    latencias = []
+    lock = threading.Lock()
+
+    def cliente():
+        session = requests.Session()
+        while time.monotonic() < hasta:
+            inicio = time.perf_counter()
+            session.get(f"{url}/api/categorias", timeout=30)
+            with lock:
+                latencias.append(time.perf_counter() - inicio)
+
+    with ThreadPoolExecutor(max_workers=clientes) as executor:
+        for _ in range(clientes):
+            executor.submit(cliente)
+    return latencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5001')
+    parser.add_argument('--usuario', default='admin')
+    parser.add_argument('--password', default='admin123')
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--lectores', type=int, default=4)
+    parser.add_argument('--duracion', type=float, default=10.0)
+    args = parser.parse_args()
+
+    reposo = medir_lecturas(args.url, time.monotonic() + args.duracion / 2, args.lectores)
+
+    hasta = time.monotonic() + args.duracion
+    estados = Counter()
+    lock = threading.Lock()
+
+    def login():
+        session = requests.Session()
+        while time.monotonic() < hasta:
+            try:
+                respuesta = session.post(f"{args.url}/api/login", json={
+                    'username': args.usuario, 'password': args.password}, timeout=30)
+                estado = respuesta.status_code
+            except requests.RequestException:
+                estado = 'error'
+            with lock:
+                estados[estado] += 1
+
+    with ThreadPoolExecutor(max_workers=args.logins) as executor:
+        for _ in range(args.logins):
+            executor.submit(login)
+        tormenta = medir_lecturas(args.url, hasta, args.lectores)
+
+    print(f"{'GET /api/categorias':<22}{'n':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for nombre, latencias in (('en reposo', reposo), ('durante logins', tormenta)):
+        print(f"{nombre:<22}{len(latencias):>8}{percentil(latencias, 50) * 1000:>10.1f}"
+              f"{percentil(latencias, 99) * 1000:>10.1f}")
+    print("Respuestas de /api/login:", dict(estados))
+
+
+if __name__ == '__main__':
+    main()
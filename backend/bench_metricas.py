@@ -0,0 +1,89 @@
+"""Costo por petición de las métricas de Prometheus.
+
+Mide el trabajo que metricas.py agrega a una petición: los hooks antes y
+después de la petición más los eventos de `--sentencias` sentencias SQL, en
+modo multiproceso (archivos mmap, como bajo gunicorn) o de un solo proceso.
+Al final compara una petición real del test client con y sin los hooks.
+
+Uso:
+    python bench_metricas.py --iteraciones 20000 --sentencias 5
+    python bench_metricas.py --un-proceso
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iteraciones', type=int, default=20000)
+    parser.add_argument('--sentencias', type=int, default=5)
+    parser.add_argument('--rondas', type=int, default=7)
+    parser.add_argument('--un-proceso', action='store_true', help='sin PROMETHEUS_MULTIPROC_DIR')
+    args = parser.parse_args()
+
+    if not args.un_proceso:
+        os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='metricas-')
+
+    from flask import Response
+    from app import app, db, metricas
+
+    class Conexion:
+        info = {}
+
+    conexion = Conexion()
+    respuesta = Response(status=200)
+    with app.test_request_context('/api/productos/1'):
+        from flask import request
+        request.url_rule = app.url_map.bind('localhost').match('/api/productos/1', return_rule=True)[0]
+        for _ in range(1000):
+            metricas._antes()
+            metricas._despues(respuesta)
+        inicio = time.perf_counter()
+        for _ in range(args.iteraciones):
+            metricas._antes()
+            for _ in range(args.sentencias):
+                metricas._antes_sql(conexion, None, None, None, None, False)
+                metricas._despues_sql(conexion, None, None, None, None, False)
+            metricas._despues(respuesta)
+        por_peticion = (time.perf_counter() - inicio) / args.iteraciones
+
+    modo = 'un proceso' if args.un_proceso else 'multiproceso'
+    print(f"hooks + {args.sentencias} sentencias ({modo}): {por_peticion * 1e6:.1f} µs por petición")
+
+    # Petición completa con y sin los hooks de Flask
+    with app.app_context():
+        db.create_all()
+    cliente = app.test_client()
+
+    def medir():
+        inicio = time.perf_counter()
+        for _ in range(1000):
+            cliente.get('/api/categorias')
+        return (time.perf_counter() - inicio) / 1000
+
+    # Rondas alternadas y el mínimo de cada caso, para que el ruido del
+    # sistema no se confunda con el costo de las métricas
+    antes, despues = app.before_request_funcs[None], app.after_request_funcs[None]
+    posicion = despues.index(metricas._despues)
+    medir()
+    con_hooks, sin_hooks = [], []
+    for _ in range(args.rondas):
+        con_hooks.append(medir())
+        antes.remove(metricas._antes)
+        despues.remove(metricas._despues)
+        sin_hooks.append(medir())
+        antes.append(metricas._antes)
+        despues.insert(posicion, metricas._despues)
+    con_hooks, sin_hooks = min(con_hooks), min(sin_hooks)
+    print(f"GET /api/categorias: {con_hooks * 1e6:.0f} µs con métricas, {sin_hooks * 1e6:.0f} µs sin "
+          f"({(con_hooks - sin_hooks) * 1e6:+.0f} µs)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
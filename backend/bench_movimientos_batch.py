@@ -0,0 +1,117 @@
+"""Throughput de POST /api/movimientos/batch sobre un backend levantado.
+
+Envía `--lotes` lotes de `--lote` movimientos con `--concurrencia` clientes
+HTTP. Los lotes se generan con `--semilla` sobre los productos existentes
+(con popularidad sesgada, así los lotes concurrentes comparten productos y
+compiten por los mismos bloqueos) y mezclan entradas y ventas. Informa los
+movimientos registrados por segundo, la latencia por lote y los rechazos, y
+sale con código 1 si el throughput queda por debajo de `--objetivo`.
+
+Uso (con datos de generar_datos.py y el backend bajo gunicorn):
+    python generar_datos.py --productos 50000 --movimientos 0
+    gunicorn -c gunicorn.conf.py app:app &
+    API_TOKEN=... python bench_movimientos_batch.py --url http://localhost:5000 --token $API_TOKEN \\
+        --lotes 400 --lote 500 --concurrencia 8 --objetivo 10000
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def generar_lotes(args, ids):
+    aleatorio = random.Random(args.semilla)
+    pesos = [1 / (i + 1) for i in range(len(ids))]
+    lotes = []
+    for _ in range(args.lotes):
+        productos = aleatorio.choices(ids, weights=pesos, k=args.lote)
+        lotes.append([
+            {'producto_id': producto_id, 'usuario': 'bench',
+             **({'tipo': 'venta', 'cantidad': aleatorio.randint(1, 3)}
+                if aleatorio.random() < args.proporcion_ventas
+                else {'tipo': 'entrada', 'cantidad': aleatorio.randint(5, 20)})}
+            for producto_id in productos
+        ])
+    return lotes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--token', default=os.getenv('API_TOKEN'), help='X-API-Token (por defecto API_TOKEN)')
+    parser.add_argument('--lotes', type=int, default=200)
+    parser.add_argument('--lote', type=int, default=500, help='movimientos por lote')
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--productos', type=int, default=500, help='productos distintos usados')
+    parser.add_argument('--proporcion-ventas', type=float, default=0.5)
+    parser.add_argument('--objetivo', type=float, default=10000, help='movimientos/s mínimos')
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    ids = [p['id'] for p in requests.get(f"{args.url}/api/productos", timeout=30, params={
+        'fields': 'id', 'limit': min(args.productos, 500)}).json()['items']]
+    if not ids:
+        sys.exit("No hay productos: generar datos con generar_datos.py")
+    lotes = generar_lotes(args, ids)
+
+    local = threading.local()
+    lock = threading.Lock()
+    latencias = []
+    totales = {'registrados': 0, 'rechazados': 0, 'errores': 0}
+
+    def enviar(lote):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        inicio = time.perf_counter()
+        try:
+            respuesta = local.session.post(f"{args.url}/api/movimientos/batch", json=lote,
+                                           headers={'X-API-Token': args.token or ''}, timeout=120)
+            cuerpo = respuesta.json() if respuesta.status_code == 200 else None
+        except (requests.RequestException, ValueError):
+            cuerpo = None
+        duracion = time.perf_counter() - inicio
+        with lock:
+            latencias.append(duracion)
+            if cuerpo is None:
+                totales['errores'] += 1
+            else:
+                totales['registrados'] += cuerpo['registrados']
+                totales['rechazados'] += cuerpo['rechazados']
+
+    enviar(lotes[0][:10])  # calentamiento: conexión y caché del worker
+    latencias.clear()
+    totales.update(registrados=0, rechazados=0, errores=0)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrencia) as executor:
+        list(executor.map(enviar, lotes))
+    transcurrido = time.perf_counter() - inicio
+    throughput = totales['registrados'] / transcurrido
+
+    print(f"Lotes:               {args.lotes} x {args.lote} ({args.concurrencia} clientes, {len(ids)} productos)")
+    print(f"Registrados:         {totales['registrados']}")
+    print(f"Rechazados:          {totales['rechazados']}")
+    print(f"Lotes con error:     {totales['errores']}")
+    print(f"Throughput:          {throughput:.0f} movimientos/s (objetivo {args.objetivo:.0f})")
+    print(f"Latencia lote p50:   {percentil(latencias, 50) * 1000:.1f} ms")
+    print(f"Latencia lote p95:   {percentil(latencias, 95) * 1000:.1f} ms")
+    if totales['errores'] or throughput < args.objetivo:
+        print("FALLO: por debajo del objetivo o con lotes fallidos")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Tiempo del cálculo de sugerencias de reposición sobre datos sintéticos.
+
+Genera la demanda ya agregada por producto y día (lo que devuelve la consulta
+de /api/reposicion/sugerencias) para `--productos` productos y `--dias` días,
+y mide cada etapa de reposicion.py.
+
+Uso:
+    python bench_reposicion.py --productos 50000 --dias 730 --densidad 0.3
+"""
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from reposicion import borradores, estadisticas_demanda, plazos_por_proveedor, sugerir
+
+
+def generar(productos, dias, densidad, proveedores, semilla=42):
+    aleatorio = np.random.default_rng(semilla)
+    hoy = datetime(2026, 1, 1)
+    filas = int(productos * dias * densidad)
+    # Pares (producto, día) únicos, como los del GROUP BY
+    celdas = np.unique(aleatorio.integers(0, productos * dias, size=filas))
+    demanda = pd.DataFrame({
+        'producto_id': celdas // dias + 1,
+        'dia': pd.Timestamp(hoy) - pd.to_timedelta(celdas % dias + 1, unit='D'),
+        'cantidad': aleatorio.poisson(4, size=len(celdas)) + 1,
+    })
+    ids = np.arange(1, productos + 1)
+    tabla_productos = pd.DataFrame({
+        'id': ids,
+        'nombre': [f"Producto {i}" for i in ids],
+        'cantidad': aleatorio.integers(0, 200, size=productos),
+        'umbral_reorden': aleatorio.integers(5, 30, size=productos),
+        'precio_costo': aleatorio.uniform(1, 100, size=productos).round(2),
+    })
+    tabla_proveedores = pd.DataFrame({
+        'producto_id': ids,
+        'proveedor_id': aleatorio.integers(1, proveedores + 1, size=productos),
+        'precio_unitario': aleatorio.uniform(1, 100, size=productos).round(2),
+    })
+    creadas = hoy - pd.to_timedelta(aleatorio.integers(1, 700, size=proveedores * 20), unit='D')
+    ordenes = pd.DataFrame({
+        'proveedor_id': np.repeat(np.arange(1, proveedores + 1), 20),
+        'fecha_creacion': creadas,
+        'fecha_entrega': creadas + pd.to_timedelta(aleatorio.integers(2, 20, size=len(creadas)), unit='D'),
+    })
+    en_camino = pd.Series(aleatorio.integers(0, 50, size=productos // 10),
+                          index=aleatorio.choice(ids, size=productos // 10, replace=False))
+    return hoy, demanda, tabla_productos, tabla_proveedores, ordenes, en_camino
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--productos', type=int, default=50000)
+    parser.add_argument('--dias', type=int, default=730)
+    parser.add_argument('--densidad', type=float, default=0.3, help='fracción de días con ventas')
+    parser.add_argument('--proveedores', type=int, default=200)
+    args = parser.parse_args()
+
+    hoy, demanda, productos, proveedores, ordenes, en_camino = generar(
+        args.productos, args.dias, args.densidad, args.proveedores)
+    print(f"{len(demanda)} filas de demanda (producto, día)")
+
+    etapas = []
+    inicio = time.perf_counter()
+    estadisticas = estadisticas_demanda(demanda, hoy, args.dias)
+    etapas.append(('estadisticas_demanda', time.perf_counter() - inicio))
+    inicio = time.perf_counter()
+    plazos = plazos_por_proveedor(ordenes)
+    sugerencias = sugerir(productos, estadisticas, proveedores, plazos, en_camino)
+    etapas.append(('sugerir', time.perf_counter() - inicio))
+    inicio = time.perf_counter()
+    resultado = borradores(sugerencias, {i: f"Proveedor {i}" for i in range(1, args.proveedores + 1)})
+    etapas.append(('borradores', time.perf_counter() - inicio))
+
+    for nombre, segundos in etapas:
+        print(f"{nombre:<24}{segundos:>8.2f} s")
+    print(f"{'total':<24}{sum(s for _, s in etapas):>8.2f} s")
+    print(f"{len(sugerencias)} productos a reponer en {len(resultado)} órdenes en borrador")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""Índice de trigramas para la búsqueda de productos tolerante a errores de tipeo.
+
+El texto se normaliza (minúsculas, sin acentos, solo letras y dígitos) y cada
+palabra se rellena con espacios antes de partirla en trigramas, así que
+"tornillo" y "tornilo" comparten la mayoría de sus trigramas y una búsqueda
+por prefijo ("torn") coincide con el comienzo de la palabra.
+
+El índice invertido vive en memoria de cada proceso: por trigrama, un array
+de numpy con los documentos que lo contienen y su peso. Puntuar una consulta
+es un `bincount` sobre la concatenación de esas listas.
+"""
+import logging
+import re
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+N = 3
+# Peso de un trigrama según el campo donde aparece; si aparece en varios
+# campos se queda el mayor
+PESOS = {'nombre': 3, 'sku': 3, 'descripcion': 1}
+# Solo se indexan los primeros caracteres de la descripción
+MAX_CARACTERES_DESCRIPCION = 500
+
+logger = logging.getLogger(__name__)
+
+_NO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+_VACIO = (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int8))
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return _NO_ALFANUMERICO.sub(' ', texto.lower()).strip()
+
+
+def trigramas(texto):
+    grupos = set()
+    for palabra in normalizar(texto).split():
+        palabra = f"  {palabra} "
+        grupos.update(palabra[i:i + N] for i in range(len(palabra) - N + 1))
+    return grupos
+
+
+def texto_indexado(nombre, sku, descripcion):
+    """(nombre, sku, descripcion) con la descripción recortada a lo que se indexa."""
+    return nombre, sku, (descripcion or '')[:MAX_CARACTERES_DESCRIPCION]
+
+
+def trigramas_producto(nombre, sku, descripcion):
+    """{trigrama: peso} de los campos buscables de un producto."""
+    pesos = {}
+    nombre, sku, descripcion = texto_indexado(nombre, sku, descripcion)
+    campos = (('descripcion', descripcion), ('nombre', nombre), ('sku', sku))
+    for campo, texto in campos:
+        for trigrama in trigramas(texto):
+            pesos[trigrama] = max(pesos.get(trigrama, 0), PESOS[campo])
+    return pesos
+
+
+class IndiceTrigramas:
+    """Índice invertido en memoria, actualizable producto a producto.
+
+    Cada producto recibe un número de documento denso para poder puntuar con
+    `np.bincount`. Los cambios se acumulan por trigrama y se aplican a su
+    array la próxima vez que una búsqueda lo necesita.
+    """
+
+    def __init__(self):
+        self._documentos = {}      # producto_id -> documento
+        self._productos = []       # documento -> producto_id (None si se borró)
+        self._largos = np.zeros(0, dtype=np.int32)   # trigramas por documento
+        self._textos = {}          # producto_id -> texto_indexado(...)
+        self._listas = {}          # trigrama -> (documentos, pesos)
+        self._pendientes = {}      # trigrama -> {documento: peso}; 0 = quitar
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._documentos)
+
+    def _documento(self, producto_id):
+        documento = self._documentos.get(producto_id)
+        if documento is None:
+            documento = len(self._productos)
+            self._documentos[producto_id] = documento
+            self._productos.append(producto_id)
+            if documento >= len(self._largos):
+                self._largos = np.resize(self._largos, max(1024, 2 * len(self._largos)))
+        return documento
+
+    def cargar(self, filas):
+        """Llena un índice vacío con filas (id, nombre, sku, descripcion)."""
+        listas = {}
+        with self._lock:
+            for producto_id, *texto in filas:
+                pesos = trigramas_producto(*texto)
+                documento = self._documento(producto_id)
+                self._textos[producto_id] = texto_indexado(*texto)
+                self._largos[documento] = len(pesos)
+                for trigrama, peso in pesos.items():
+                    lista = listas.setdefault(trigrama, ([], []))
+                    lista[0].append(documento)
+                    lista[1].append(peso)
+            self._listas = {t: (np.array(d, dtype=np.int32), np.array(p, dtype=np.int8))
+                            for t, (d, p) in listas.items()}
+
+    def actualizar(self, producto_id, texto):
+        """Reindexa un producto; `texto` None lo quita del índice."""
+        with self._lock:
+            anterior = self._textos.pop(producto_id, None)
+            if anterior is None and texto is None:
+                return
+            viejos = trigramas_producto(*anterior) if anterior else {}
+            nuevos = trigramas_producto(*texto) if texto else {}
+            documento = self._documento(producto_id)
+            for trigrama in viejos.keys() - nuevos.keys():
+                self._pendientes.setdefault(trigrama, {})[documento] = 0
+            for trigrama, peso in nuevos.items():
+                if viejos.get(trigrama) != peso:
+                    self._pendientes.setdefault(trigrama, {})[documento] = peso
+            if texto is None:
+                del self._documentos[producto_id]
+                self._productos[documento] = None
+            else:
+                self._textos[producto_id] = texto_indexado(*texto)
+                self._largos[documento] = len(nuevos)
+
+    def _lista(self, trigrama):
+        documentos, pesos = self._listas.get(trigrama, _VACIO)
+        pendientes = self._pendientes.pop(trigrama, None)
+        if pendientes:
+            cambiados = np.fromiter(pendientes, dtype=np.int32, count=len(pendientes))
+            conservar = ~np.isin(documentos, cambiados)
+            altas = [(d, p) for d, p in pendientes.items() if p]
+            documentos = np.concatenate([documentos[conservar],
+                                         np.array([d for d, _ in altas], dtype=np.int32)])
+            pesos = np.concatenate([pesos[conservar], np.array([p for _, p in altas], dtype=np.int8)])
+            self._listas[trigrama] = (documentos, pesos)
+        return documentos, pesos
+
+    def buscar(self, q, limit, similitud_minima):
+        """[(producto_id, relevancia)] ordenados de mayor a menor relevancia.
+
+        Un producto es candidato si tiene al menos `similitud_minima` de los
+        trigramas de `q`; la relevancia es la suma de sus pesos sobre el
+        máximo posible. Los empates se resuelven a favor del texto más corto.
+        """
+        grupos = trigramas(q)
+        if not grupos:
+            return []
+        minimo = max(1, int(np.ceil(len(grupos) * similitud_minima)))
+        with self._lock:
+            listas = [self._lista(t) for t in grupos]
+            documentos = np.concatenate([d for d, _ in listas])
+            pesos = np.concatenate([p for _, p in listas])
+            total = len(self._productos)
+            puntaje = np.bincount(documentos, weights=pesos, minlength=total)
+            coincidencias = np.bincount(documentos, minlength=total)
+            candidatos = np.flatnonzero(coincidencias >= minimo)
+            orden = np.lexsort((candidatos, self._largos[candidatos], -puntaje[candidatos]))
+            mejores = candidatos[orden[:limit]]
+            maximo = max(PESOS.values()) * len(grupos)
+            return [(self._productos[d], float(puntaje[d]) / maximo) for d in mejores]
+
+
+class IndiceSincronizado:
+    """IndiceTrigramas de este proceso, al día con las escrituras de todos.
+
+    Cada escritura de productos deja el id en un registro de cambios en la
+    base de datos (en la misma transacción). Antes de buscar, como mucho cada
+    `intervalo` segundos, se leen los cambios nuevos y se reindexan solo esos
+    productos; un cambio sin producto (None) pide recargar todo.
+
+    - `leer_productos(ids)`: filas (id, nombre, sku, descripcion); todas si ids es None
+    - `ultimo_cambio()`: id del último cambio registrado (0 si no hay)
+    - `leer_cambios(desde)`: [(id, producto_id)] posteriores a `desde` más los
+      de los últimos segundos, o None si el registro ya no llega a `desde`
+
+    Los cambios recientes se releen en cada sincronización porque un id menor
+    puede confirmarse después de uno mayor; `_vistos` evita aplicarlos dos veces.
+    """
+
+    def __init__(self, leer_productos, ultimo_cambio, leer_cambios, intervalo=1.0):
+        self.indice = None
+        self.intervalo = intervalo
+        self._leer_productos = leer_productos
+        self._ultimo_cambio = ultimo_cambio
+        self._leer_cambios = leer_cambios
+        self._aplicado = 0
+        self._vistos = set()
+        self._ultimo_chequeo = 0.0
+        self._lock = threading.Lock()
+
+    def invalidar(self):
+        self._ultimo_chequeo = 0.0
+
+    def sincronizar(self):
+        ahora = time.monotonic()
+        if self.indice is not None and ahora - self._ultimo_chequeo < self.intervalo:
+            return self.indice
+        with self._lock:
+            cambios = self._leer_cambios(self._aplicado) if self.indice is not None else None
+            nuevos = [c for c in cambios or () if c[0] not in self._vistos]
+            if cambios is None or any(producto_id is None for _, producto_id in nuevos):
+                self.recargar()
+            elif nuevos:
+                ids = {producto_id for _, producto_id in nuevos}
+                textos = {fila[0]: fila[1:] for fila in self._leer_productos(ids)}
+                for producto_id in ids:
+                    self.indice.actualizar(producto_id, textos.get(producto_id))
+                self._aplicado = max(self._aplicado, max(cambio_id for cambio_id, _ in nuevos))
+            if cambios is not None:
+                self._vistos = {cambio_id for cambio_id, _ in cambios}
+            self._ultimo_chequeo = ahora
+        return self.indice
+
+    def recargar(self):
+        # El último cambio se lee antes que los productos: lo que se escriba
+        # en el medio se vuelve a aplicar en la siguiente sincronización
+        aplicado = self._ultimo_cambio()
+        indice = IndiceTrigramas()
+        indice.cargar(self._leer_productos(None))
+        self.indice, self._aplicado, self._vistos = indice, aplicado, set()
+
+    def precalentar(self, contexto):
+        """Carga el índice en un hilo de fondo, para que no lo pague la primera búsqueda.
+
+        `contexto` es un context manager (el app context de Flask) dentro del
+        cual corren las lecturas. Si falla, el índice se carga en la primera
+        búsqueda como siempre.
+        """
+        def cargar():
+            try:
+                with contexto():
+                    self.sincronizar()
+            except Exception:
+                logger.exception("No se pudo precargar el índice de búsqueda")
+
+        hilo = threading.Thread(target=cargar, name='precalentar-busqueda', daemon=True)
+        hilo.start()
+        return hilo
+
+    def buscar(self, q, limit, similitud_minima):
+        return self.sincronizar().buscar(q, limit, similitud_minima)
+
+    def stats(self):
+        return {'productos': len(self.indice) if self.indice is not None else None,
+                'ultimo_cambio': self._aplicado}
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Caché en memoria del proceso, acotada por tamaño (LRU) y con expiración.
+
+    Cada entrada guarda el instante (time.time()) en que expira; `None` indica
+    que no expira. Las operaciones son seguras entre hilos.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entrada = self._data.get(key)
+            if entrada is not None:
+                valor, expira = entrada
+                if expira is None or expira > time.time():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return valor
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, expira=None):
+        with self._lock:
+            self._data[key] = (value, expira)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0
+        }
+
+
+class VersionedCache:
+    """Caché read-through con invalidación coherente entre procesos.
+
+    Cada espacio de nombres ('categoria', 'producto', ...) tiene un contador de
+    versión guardado en la base de datos; la versión forma parte de la clave,
+    así que al incrementarla las entradas viejas dejan de usarse en todos los
+    workers y réplicas. Las versiones se releen como mucho cada
+    `intervalo_version` segundos; el proceso que escribe ve su propio cambio
+    de inmediato.
+
+    `leer_versiones()` devuelve {nombre: version} e `incrementar_versiones(nombres)`
+    incrementa los contadores y devuelve los nuevos valores.
+    """
+
+    def __init__(self, leer_versiones, incrementar_versiones, maxsize=2048,
+                 ttl=300, intervalo_version=1.0):
+        self.cache = LRUCache(maxsize=maxsize)
+        self.ttl = ttl
+        self.intervalo_version = intervalo_version
+        self._leer_versiones = leer_versiones
+        self._incrementar_versiones = incrementar_versiones
+        self._versiones = {}
+        self._ultimo_chequeo = 0.0
+        self._lock = threading.Lock()
+
+    def version(self, nombre):
+        ahora = time.monotonic()
+        if ahora - self._ultimo_chequeo >= self.intervalo_version:
+            versiones = self._leer_versiones()
+            with self._lock:
+                self._versiones = versiones
+                self._ultimo_chequeo = ahora
+        return self._versiones.get(nombre, 0)
+
+    def get_or_load(self, nombre, clave, cargar):
+        clave_completa = (nombre, self.version(nombre)) + tuple(clave)
+        valor = self.cache.get(clave_completa, _MISS)
+        if valor is _MISS:
+            valor = cargar()
+            self.cache.set(clave_completa, valor, expira=time.time() + self.ttl)
+        return valor
+
+    def invalidate(self, *nombres):
+        versiones = self._incrementar_versiones(nombres)
+        with self._lock:
+            self._versiones = {**self._versiones, **versiones}
+
+    def stats(self):
+        return {**self.cache.stats(), 'versions': dict(self._versiones)}
+
+
+_MISS = object()
@@ -0,0 +1,112 @@
+"""Perfil de concurrencia de gunicorn y pool de conexiones a la base de datos.
+
+gunicorn.conf.py y app.py leen el mismo perfil de las variables de entorno,
+así el pool de SQLAlchemy de cada worker se dimensiona con la cantidad de
+peticiones que ese worker atiende a la vez:
+
+- GUNICORN_WORKER_CLASS: 'gthread' (por defecto) o 'sync'
+- GUNICORN_THREADS: hilos por worker con gthread (4)
+- WEB_CONCURRENCY: procesos worker (2)
+- DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
+"""
+import os
+import threading
+import time
+
+from sqlalchemy.pool import QueuePool
+
+WORKER_CLASSES = ('gthread', 'sync')
+
+
+def perfil_desde_env():
+    worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+    if worker_class not in WORKER_CLASSES:
+        raise ValueError(f"GUNICORN_WORKER_CLASS no soportada: {worker_class}")
+    threads = int(os.getenv('GUNICORN_THREADS', '4')) if worker_class == 'gthread' else 1
+    return {
+        'worker_class': worker_class,
+        'workers': int(os.getenv('WEB_CONCURRENCY', '2')),
+        'threads': threads,
+    }
+
+
+def opciones_engine(database_url, perfil):
+    """SQLALCHEMY_ENGINE_OPTIONS para un worker con este perfil.
+
+    Cada petición usa una sola conexión, así que el pool fijo es de una
+    conexión por hilo; el desborde cubre conexiones abiertas fuera de una
+    petición (comandos, hilos de fondo). SQLite usa su propio pool.
+    """
+    if database_url.startswith('sqlite'):
+        return {}
+    return {
+        'poolclass': QueuePoolMedido,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', str(perfil['threads']))),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '2')),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        # Conexiones cortadas por PostgreSQL o por un balanceador se
+        # descartan antes de usarlas
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+    }
+
+
+class QueuePoolMedido(QueuePool):
+    """QueuePool que mide cuánto esperan las peticiones por una conexión."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._medicion = threading.Lock()
+        self.esperas = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.timeouts = 0
+        # Función que recibe cada espera en segundos (p. ej. un histograma)
+        self.observar_espera = None
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._medicion:
+                self.timeouts += 1
+            raise
+        finally:
+            espera = time.perf_counter() - inicio
+            with self._medicion:
+                self.esperas += 1
+                self.espera_total += espera
+                self.espera_maxima = max(self.espera_maxima, espera)
+            if self.observar_espera is not None:
+                self.observar_espera(espera)
+
+    def recreate(self):
+        # pool_recycle/invalidate pueden recrear el pool: se conservan las métricas
+        nuevo = super().recreate()
+        nuevo.esperas, nuevo.espera_total = self.esperas, self.espera_total
+        nuevo.espera_maxima, nuevo.timeouts = self.espera_maxima, self.timeouts
+        nuevo.observar_espera = self.observar_espera
+        return nuevo
+
+    def stats(self):
+        with self._medicion:
+            esperas, total, maxima, timeouts = self.esperas, self.espera_total, self.espera_maxima, self.timeouts
+        return {
+            'tamano': self.size(),
+            'en_uso': self.checkedout(),
+            'libres': self.checkedin(),
+            'desborde': max(self.overflow(), 0),
+            'max_desborde': self._max_overflow,
+            'esperas': esperas,
+            'espera_media_ms': round(total / esperas * 1000, 3) if esperas else 0.0,
+            'espera_maxima_ms': round(maxima * 1000, 3),
+            'timeouts': timeouts,
+        }
+
+
+def stats_pool(engine):
+    pool = engine.pool
+    if isinstance(pool, QueuePoolMedido):
+        return pool.stats()
+    return {'clase': type(pool).__name__, 'estado': pool.status()}
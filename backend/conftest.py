@@ -0,0 +1,61 @@
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+from sqlalchemy import event
+
+# Los tests usan SQLite en memoria; debe fijarse antes de importar app
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app import app as flask_app, db
+
+
+@pytest.fixture
+def app():
+    flask_app.config['TESTING'] = True
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def capturar_sentencias(app):
+    """`with capturar_sentencias() as sentencias:` junta el SQL ejecutado en el bloque."""
+    @contextmanager
+    def capturar():
+        sentencias = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield sentencias
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return capturar
+
+
+@pytest.fixture
+def jwt_headers(app):
+    """Cabeceras con un JWT válido: jwt_headers('usuario'), admin por defecto."""
+    def headers(rol='admin'):
+        token = jwt.encode({'user_id': 1, 'username': rol, 'rol': rol,
+                            'exp': datetime.utcnow() + timedelta(hours=1)},
+                           app.config['SECRET_KEY'], algorithm='HS256')
+        return {'Authorization': f'Bearer {token}'}
+    return headers
+
+
+@pytest.fixture
+def admin_headers(jwt_headers):
+    return jwt_headers('admin')
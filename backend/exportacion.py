@@ -0,0 +1,73 @@
+"""Escritura incremental de exportaciones (CSV y Parquet).
+
+Ambos generadores reciben un iterable de bloques (listas de filas) y van
+devolviendo bytes a medida que escriben, para poder mandarlos en una
+respuesta en streaming sin tener el archivo completo en memoria.
+"""
+import csv
+import io
+
+
+def csv_stream(bloques, columnas):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columnas)
+    for bloque in bloques:
+        writer.writerows(bloque)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+class _SalidaIncremental(io.RawIOBase):
+    """Destino de escritura que entrega lo escrito y lo olvida.
+
+    `tell()` devuelve el total de bytes escritos desde el principio, que es lo
+    que el escritor de Parquet usa para calcular los offsets del footer.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._partes = []
+        self._posicion = 0
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def parquet_stream(bloques, schema):
+    """Escribe cada bloque como un row group de Parquet.
+
+    `schema` es un pyarrow.Schema; las filas de cada bloque deben venir en el
+    mismo orden de columnas.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    salida = _SalidaIncremental()
+    writer = pq.ParquetWriter(salida, schema, compression='snappy')
+    try:
+        for bloque in bloques:
+            columnas = list(zip(*bloque)) if bloque else [[] for _ in schema]
+            tabla = pa.Table.from_arrays(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(columnas, schema)],
+                schema=schema)
+            writer.write_table(tabla)
+            yield salida.vaciar()
+    finally:
+        writer.close()
+    yield salida.vaciar()
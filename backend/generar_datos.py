@@ -0,0 +1,266 @@
+"""Datos sintéticos a escala de producción, reproducibles a partir de una semilla.
+
+Crea categorías, proveedores, productos, órdenes de compra con sus items y
+movimientos de inventario con inserciones masivas por bloques. La misma
+semilla y los mismos parámetros generan siempre los mismos datos: cada tabla
+usa su propio generador aleatorio y las fechas se calculan desde `--hasta`,
+no desde el reloj. La popularidad de los productos sigue una ley de potencia
+(pocos productos concentran la mayoría de los movimientos), como en una
+tienda real.
+
+Al terminar recalcula las tablas derivadas (resumen de inventario, agregado
+diario de movimientos), pide recargar el índice de búsqueda y crea un
+usuario para los benchmarks.
+
+Uso:
+    python generar_datos.py --productos 50000 --movimientos 5000000 --semilla 42
+    DATABASE_URL=sqlite:///bench.db python generar_datos.py --crear-tablas --productos 1000
+"""
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import func, insert, select, text
+
+from app import (app, db, Categoria, MovimientoInventario, OrdenCompra, OrdenCompraItem, Producto,
+                 Proveedor, Usuario, invalidar_catalogo, password_verifier, reconstruir_movimientos_diarios,
+                 reconstruir_resumen, registrar_cambios_busqueda)
+
+# Los movimientos se generan en bloques de tamaño fijo (independiente de
+# --chunk) para que el resultado no dependa del tamaño de las inserciones
+BLOQUE_MOVIMIENTOS = 100000
+
+PALABRAS = ['Tornillo', 'Tuerca', 'Arandela', 'Martillo', 'Destornillador', 'Taladro', 'Cable',
+            'Enchufe', 'Bombilla', 'Pintura', 'Brocha', 'Cinta', 'Pegamento', 'Manguera', 'Llave',
+            'Alicate', 'Sierra', 'Lija', 'Clavo', 'Candado', 'Cuaderno', 'Lapicero', 'Camisa',
+            'Arroz', 'Aceite', 'Detergente', 'Jabón', 'Toalla', 'Sartén', 'Vaso']
+ADJETIVOS = ['acero', 'inoxidable', 'grande', 'chico', 'blanco', 'negro', 'rojo', 'galvanizado',
+             'reforzado', 'industrial', 'premium', 'económico', 'x12', 'familiar', 'eco']
+# (tipo, probabilidad, cantidad mínima, cantidad máxima)
+TIPOS = [('venta', 0.70, 1, 12), ('uso', 0.08, 1, 5), ('salida', 0.02, 1, 20),
+         ('entrada', 0.15, 20, 300), ('ajuste_manual', 0.05, 1, 10)]
+TABLAS = ['categoria', 'proveedor', 'producto', 'orden_compra', 'orden_compra_item', 'movimiento_inventario']
+
+
+def generador(semilla, tabla):
+    return np.random.default_rng([semilla, TABLAS.index(tabla)])
+
+
+def siguiente_id(modelo):
+    return (db.session.execute(select(func.max(modelo.id))).scalar() or 0) + 1
+
+
+def insertar(modelo, columnas, chunk):
+    """Inserta por bloques de `chunk` filas; `columnas` es {nombre: array}."""
+    nombres = list(columnas)
+    total = len(columnas[nombres[0]])
+    for inicio in range(0, total, chunk):
+        valores = [np.asarray(columnas[n][inicio:inicio + chunk]).tolist() for n in nombres]
+        db.session.execute(insert(modelo), [dict(zip(nombres, fila)) for fila in zip(*valores)])
+        db.session.commit()
+    return total
+
+
+def fechas(generador_tabla, n, hasta, dias):
+    segundos = generador_tabla.integers(0, dias * 86400, size=n)
+    return np.datetime64(hasta, 's') - segundos.astype('timedelta64[s]')
+
+
+def generar_categorias(args, semilla):
+    primero = siguiente_id(Categoria)
+    ids = np.arange(primero, primero + args.categorias)
+    insertar(Categoria, {'id': ids, 'nombre_categoria': [f"{args.prefijo} categoría {i}" for i in ids]},
+             args.chunk)
+    return ids
+
+
+def generar_proveedores(args, semilla):
+    primero = siguiente_id(Proveedor)
+    ids = np.arange(primero, primero + args.proveedores)
+    rng = generador(semilla, 'proveedor')
+    creados = fechas(rng, len(ids), args.hasta, args.dias * 2)
+    insertar(Proveedor, {
+        'id': ids,
+        'nombre': [f"{args.prefijo} proveedor {i}" for i in ids],
+        'email': [f"ventas{i}@proveedor.example" for i in ids],
+        'telefono': [f"{a:03d}-{b:03d}-{c:04d}" for a, b, c in zip(
+            rng.integers(100, 999, len(ids)), rng.integers(100, 999, len(ids)), rng.integers(0, 9999, len(ids)))],
+        'fecha_creacion': creados,
+        'fecha_actualizacion': creados,
+    }, args.chunk)
+    return ids
+
+
+def generar_productos(args, semilla, categorias):
+    primero = siguiente_id(Producto)
+    ids = np.arange(primero, primero + args.productos)
+    n = len(ids)
+    rng = generador(semilla, 'producto')
+    palabras = rng.integers(0, len(PALABRAS), n)
+    adjetivos = rng.integers(0, len(ADJETIVOS), n)
+    medidas = rng.integers(1, 500, n)
+    costo = np.round(rng.lognormal(2.5, 1.0, n).clip(0.5, 5000), 2)
+    creados = fechas(rng, n, args.hasta, args.dias * 2)
+    insertar(Producto, {
+        'id': ids,
+        'nombre': [f"{PALABRAS[p]} {ADJETIVOS[a]} {m}" for p, a, m in zip(palabras, adjetivos, medidas)],
+        'sku': [f"{args.prefijo.upper()}-{i:08d}" for i in ids],
+        'precio_costo': costo,
+        'precio_venta': np.round(costo * rng.uniform(1.1, 1.8, n), 2),
+        'descripcion': [f"{PALABRAS[p]} {ADJETIVOS[a]}, presentación {m}" for p, a, m in
+                        zip(palabras, adjetivos, medidas)],
+        'cantidad': rng.integers(0, 500, n),
+        'umbral_reorden': rng.integers(5, 30, n),
+        'categoria_id': rng.choice(categorias, n),
+        'fecha_creacion': creados,
+        'fecha_actualizacion': creados,
+    }, args.chunk)
+    # Probabilidad de cada producto en ventas y compras, en un orden aleatorio
+    pesos = 1.0 / np.arange(1, n + 1) ** args.sesgo
+    rng.shuffle(pesos)
+    return ids, costo, pesos / pesos.sum()
+
+
+def generar_ordenes(args, semilla, proveedores, productos, costos, pesos):
+    rng = generador(semilla, 'orden_compra')
+    primero = siguiente_id(OrdenCompra)
+    ids = np.arange(primero, primero + args.ordenes)
+    n = len(ids)
+    creadas = np.sort(fechas(rng, n, args.hasta, args.dias))
+    entregas = creadas + rng.integers(2, 21, n).astype('timedelta64[D]')
+    antiguedad = (np.datetime64(args.hasta, 's') - creadas).astype('timedelta64[D]').astype(int)
+    sorteo = rng.random(n)
+    estados = np.where(antiguedad > 30, np.where(sorteo < 0.93, 'completada', 'cancelada'),
+                       np.where(sorteo < 0.7, 'pendiente', 'completada'))
+
+    # Items: cantidad de líneas por orden y luego una fila por línea
+    lineas = rng.poisson(args.items_por_orden - 1, n) + 1
+    orden_de_item = np.repeat(np.arange(n), lineas)
+    indice_producto = rng.choice(len(productos), len(orden_de_item), p=pesos)
+    cantidad = rng.integers(1, 100, len(orden_de_item))
+    # En centavos para que el total sea exactamente la suma de los subtotales
+    precio = np.round(costos[indice_producto] * rng.uniform(0.85, 1.0, len(orden_de_item)) * 100).astype(np.int64)
+    subtotal = cantidad * precio
+    total = np.bincount(orden_de_item, weights=subtotal, minlength=n)
+
+    insertar(OrdenCompra, {
+        'id': ids,
+        'proveedor_id': rng.choice(proveedores, n),
+        'fecha_creacion': creadas,
+        'fecha_entrega': entregas,
+        'estado': estados,
+        'total': total / 100,
+    }, args.chunk)
+    insertar(OrdenCompraItem, {
+        'orden_compra_id': ids[orden_de_item],
+        'producto_id': productos[indice_producto],
+        'cantidad': cantidad,
+        'precio_unitario': precio / 100,
+        'subtotal': subtotal / 100,
+    }, args.chunk)
+    return n, len(orden_de_item)
+
+
+def generar_movimientos(args, semilla, productos, pesos):
+    rng = generador(semilla, 'movimiento_inventario')
+    tipos = np.array([t[0] for t in TIPOS])
+    probabilidades = np.array([t[1] for t in TIPOS])
+    minimos = np.array([t[2] for t in TIPOS])
+    maximos = np.array([t[3] for t in TIPOS])
+    # Cada bloque ocupa su propia franja de tiempo, así los ids crecen con la fecha
+    inicio = np.datetime64(args.hasta, 's') - np.timedelta64(args.dias * 86400, 's')
+    bloques = max(1, -(-args.movimientos // BLOQUE_MOVIMIENTOS))
+    franja = args.dias * 86400 // bloques
+    generados = 0
+    for bloque in range(bloques):
+        n = min(BLOQUE_MOVIMIENTOS, args.movimientos - generados)
+        segundos = np.sort(rng.integers(0, max(franja, 1), n)) + bloque * franja
+        tipo = rng.choice(len(TIPOS), n, p=probabilidades)
+        insertar(MovimientoInventario, {
+            'producto_id': productos[rng.choice(len(productos), n, p=pesos)],
+            'fecha': inicio + segundos.astype('timedelta64[s]'),
+            'tipo': tipos[tipo],
+            'cantidad': rng.integers(minimos[tipo], maximos[tipo] + 1),
+            'usuario': np.full(n, args.prefijo.lower()),
+        }, args.chunk)
+        generados += n
+        print(f"  movimientos: {generados}/{args.movimientos}", end='\r', flush=True)
+    print()
+    return generados
+
+
+def ajustar_secuencias():
+    # Los ids se asignaron explícitamente: las secuencias de PostgreSQL deben
+    # seguir desde el máximo
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for tabla in TABLAS:
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), COALESCE((SELECT max(id) FROM {tabla}), 1))"))
+    db.session.commit()
+
+
+def crear_usuario(username, password):
+    if db.session.execute(select(Usuario.id).where(Usuario.username == username)).first() is None:
+        db.session.add(Usuario(username=username, password_hash=password_verifier.hash(password), rol='admin'))
+        db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--categorias', type=int, default=50)
+    parser.add_argument('--proveedores', type=int, default=200)
+    parser.add_argument('--productos', type=int, default=50000)
+    parser.add_argument('--ordenes', type=int, default=20000)
+    parser.add_argument('--items-por-orden', type=float, default=8, help='promedio de líneas por orden')
+    parser.add_argument('--movimientos', type=int, default=2000000)
+    parser.add_argument('--dias', type=int, default=730, help='historia generada hacia atrás desde --hasta')
+    parser.add_argument('--hasta', type=datetime.fromisoformat, default=datetime(2026, 1, 1),
+                        help='fecha de referencia (fija para que los datos sean reproducibles)')
+    parser.add_argument('--sesgo', type=float, default=1.1, help='exponente de la popularidad de los productos')
+    parser.add_argument('--prefijo', default='Gen', help='prefijo de nombres y SKU, para no chocar con datos existentes')
+    parser.add_argument('--chunk', type=int, default=5000, help='filas por INSERT y commit')
+    parser.add_argument('--usuario', default='bench')
+    parser.add_argument('--password', default='bench123')
+    parser.add_argument('--crear-tablas', action='store_true', help='db.create_all() antes de generar')
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.crear_tablas:
+            db.create_all()
+        etapas = []
+
+        def etapa(nombre, funcion, *parametros):
+            inicio = time.perf_counter()
+            resultado = funcion(*parametros)
+            etapas.append((nombre, time.perf_counter() - inicio))
+            return resultado
+
+        categorias = etapa('categorías', generar_categorias, args, args.semilla)
+        proveedores = etapa('proveedores', generar_proveedores, args, args.semilla)
+        productos, costos, pesos = etapa('productos', generar_productos, args, args.semilla, categorias)
+        ordenes, items = etapa('órdenes e items', generar_ordenes, args, args.semilla,
+                               proveedores, productos, costos, pesos)
+        movimientos = etapa('movimientos', generar_movimientos, args, args.semilla, productos, pesos)
+        ajustar_secuencias()
+
+        def derivadas():
+            reconstruir_resumen()
+            reconstruir_movimientos_diarios()
+            registrar_cambios_busqueda(None)
+            db.session.commit()
+            invalidar_catalogo('categoria', 'proveedor', 'producto')
+            crear_usuario(args.usuario, args.password)
+
+        etapa('tablas derivadas', derivadas)
+
+    for nombre, segundos in etapas:
+        print(f"{nombre:<20}{segundos:>8.1f} s")
+    print(f"{len(categorias)} categorías, {len(proveedores)} proveedores, {len(productos)} productos, "
+          f"{ordenes} órdenes con {items} items, {movimientos} movimientos")
+
+
+if __name__ == '__main__':
+    main()
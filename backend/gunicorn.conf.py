@@ -0,0 +1,62 @@
+"""Configuración de gunicorn para producción.
+
+gunicorn la carga sola si se arranca desde este directorio; el perfil
+(clase de worker, hilos, procesos) sale de concurrencia.perfil_desde_env y
+es el mismo con el que app.py dimensiona el pool de conexiones.
+"""
+import os
+import tempfile
+
+from concurrencia import perfil_desde_env
+
+# Directorio compartido de las métricas de todos los workers (ver metricas.py).
+# Se define y se vacía antes de que preload_app importe prometheus_client
+_metricas = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                                  os.path.join(tempfile.gettempdir(), 'metricas'))
+os.makedirs(_metricas, exist_ok=True)
+for _archivo in os.listdir(_metricas):
+    if _archivo.endswith('.db'):
+        os.remove(os.path.join(_metricas, _archivo))
+
+_perfil = perfil_desde_env()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+worker_class = _perfil['worker_class']
+workers = _perfil['workers']
+threads = _perfil['threads']
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+# La app se importa una vez en el master y los workers la heredan por fork
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+
+
+def child_exit(server, worker):
+    # Los gauges de un worker muerto dejan de sumarse
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    # Las conexiones abiertas por el master (p. ej. al importar la app) no
+    # pueden compartirse entre procesos: cada worker arranca con un pool vacío
+    if preload_app:
+        from app import app, db
+        with app.app_context():
+            db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    # El índice de búsqueda es por proceso: cada worker lo carga en segundo
+    # plano apenas arranca, en vez de en su primera búsqueda
+    from app import precalentar_busqueda
+    precalentar_busqueda()
+
+
+def when_ready(server):
+    # El master no atiende peticiones: sus gauges (creados al precargar la
+    # app) no deben aparecer como un worker más
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(os.getpid())
+    server.log.info("Perfil de concurrencia: %s", _perfil)
@@ -0,0 +1,135 @@
+"""Lectura por bloques y validación vectorizada de archivos de productos.
+
+Las reglas (campos requeridos, longitudes y rangos) se toman del
+ProductoSchema de marshmallow para que la importación masiva valide lo mismo
+que la API, pero se aplican a bloques enteros con pandas en lugar de fila a
+fila.
+"""
+import pandas as pd
+from marshmallow import fields, validate
+
+CHUNK_FILAS = 5000
+# Límites de las columnas en la base (NUMERIC(10, 2) e INTEGER)
+MAX_DECIMAL = 10 ** 8
+MAX_ENTERO = 2 ** 31 - 1
+
+
+def leer_bloques(archivo, nombre_archivo, chunksize=CHUNK_FILAS):
+    """Devuelve un iterador de DataFrames (todas las columnas como texto).
+
+    El índice de cada DataFrame es el número de línea en el archivo (la
+    cabecera es la línea 1), para poder reportar errores por fila.
+    """
+    extension = nombre_archivo.rsplit('.', 1)[-1].lower() if '.' in nombre_archivo else ''
+    if extension == 'csv':
+        return _bloques_csv(archivo, chunksize)
+    if extension == 'xlsx':
+        return _bloques_xlsx(archivo, chunksize)
+    raise ValueError("Formato no soportado: use .csv o .xlsx")
+
+
+def _normalizar(df, inicio):
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    df.index = pd.RangeIndex(inicio, inicio + len(df))
+    return df
+
+
+def _bloques_csv(archivo, chunksize):
+    lector = pd.read_csv(archivo, dtype=str, keep_default_na=False, chunksize=chunksize,
+                         encoding='utf-8-sig')
+    linea = 2
+    for df in lector:
+        yield _normalizar(df, linea)
+        linea += len(df)
+
+
+def _bloques_xlsx(archivo, chunksize):
+    from openpyxl import load_workbook
+
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        cabecera = next(filas, None)
+        if cabecera is None:
+            return
+        columnas = ['' if c is None else str(c) for c in cabecera]
+        linea = 2
+        bloque = []
+        for fila in filas:
+            bloque.append(['' if v is None else str(v) for v in fila[:len(columnas)]])
+            if len(bloque) == chunksize:
+                yield _normalizar(pd.DataFrame(bloque, columns=columnas, dtype=str), linea)
+                linea += len(bloque)
+                bloque = []
+        if bloque:
+            yield _normalizar(pd.DataFrame(bloque, columns=columnas, dtype=str), linea)
+    finally:
+        libro.close()
+
+
+def _limites(campo):
+    minimo = maximo = None
+    for validador in campo.validators:
+        if isinstance(validador, (validate.Length, validate.Range)):
+            minimo, maximo = validador.min, validador.max
+    return minimo, maximo
+
+
+def validar_bloque(df, schema, categorias_validas):
+    """Valida un bloque con las reglas de `schema`.
+
+    Devuelve (validos, errores): un DataFrame con las filas correctas y los
+    valores ya convertidos (solo con las columnas presentes en el archivo), y
+    un dict {linea: {campo: mensaje}} con las filas rechazadas.
+    """
+    errores = {}
+
+    def marcar(mascara, campo, mensaje):
+        for linea in df.index[mascara]:
+            errores.setdefault(int(linea), {}).setdefault(campo, mensaje)
+
+    validos = pd.DataFrame(index=df.index)
+    for nombre, campo in schema.fields.items():
+        if nombre not in df.columns:
+            if campo.required:
+                marcar(pd.Series(True, index=df.index), nombre, "Campo requerido")
+            continue
+        valores = df[nombre].fillna('').astype(str).str.strip()
+        vacio = valores == ''
+        if campo.required:
+            marcar(vacio, nombre, "Campo requerido")
+        minimo, maximo = _limites(campo)
+
+        if isinstance(campo, fields.String):
+            longitud = valores.str.len()
+            if minimo is not None:
+                marcar(~vacio & (longitud < minimo), nombre, f"Longitud mínima {minimo}")
+            if maximo is not None:
+                marcar(longitud > maximo, nombre, f"Longitud máxima {maximo}")
+            validos[nombre] = valores.where(~vacio, None)
+            continue
+
+        numeros = pd.to_numeric(valores.where(~vacio), errors='coerce')
+        marcar(~vacio & numeros.isna(), nombre, "Número no válido")
+        if isinstance(campo, fields.Integer):
+            marcar(numeros.notna() & (numeros % 1 != 0), nombre, "Debe ser un entero")
+        if minimo is not None:
+            marcar(numeros < minimo, nombre, f"Debe ser mayor o igual a {minimo}")
+        if maximo is not None:
+            marcar(numeros > maximo, nombre, f"Debe ser menor o igual a {maximo}")
+        limite = MAX_DECIMAL if isinstance(campo, fields.Decimal) else MAX_ENTERO
+        marcar(numeros.abs() >= limite, nombre, "Valor demasiado grande")
+        if isinstance(campo, fields.Decimal):
+            validos[nombre] = numeros.round(2)
+        else:
+            enteros = numeros.where((numeros % 1 == 0) & (numeros.abs() < limite))
+            validos[nombre] = enteros.astype('Int64')
+
+    if 'categoria_id' in validos.columns:
+        categorias = validos['categoria_id']
+        marcar(categorias.notna() & ~categorias.isin(list(categorias_validas)),
+               'categoria_id', "Categoría inexistente")
+
+    if errores:
+        validos = validos.drop(index=list(errores))
+    return validos, errores
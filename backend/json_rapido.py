@@ -0,0 +1,125 @@
+"""Serialización JSON y compresión de respuestas.
+
+OrjsonProvider reemplaza al proveedor JSON de Flask: serializa con orjson
+(datetime, date y UUID los resuelve en C) y convierte Decimal a número, así
+los to_dict() pueden devolver los valores de las columnas tal cual. Si orjson
+no está instalado se usa StdlibProvider, que produce la misma salida con el
+módulo json. En ambos casos el formato es el que la API devolvía antes:
+Decimal como número y fechas en ISO 8601 (no el formato HTTP de Flask).
+
+comprimir() negocia gzip o brotli con Accept-Encoding para las respuestas
+de texto que pasan de un tamaño mínimo.
+"""
+import gzip
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+TIPOS_COMPRIMIBLES = ('application/json', 'application/x-ndjson', 'text/')
+
+
+def _default(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return DefaultJSONProvider.default(valor)
+
+
+class StdlibProvider(DefaultJSONProvider):
+    """DefaultJSONProvider con Decimal como número y fechas en ISO 8601."""
+
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(StdlibProvider):
+    def _opciones(self, kwargs):
+        opciones = orjson.OPT_NON_STR_KEYS
+        if kwargs.pop('sort_keys', self.sort_keys):
+            opciones |= orjson.OPT_SORT_KEYS
+        if kwargs.pop('indent', None):
+            opciones |= orjson.OPT_INDENT_2
+        return opciones
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self._opciones(kwargs)).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self._app.debug if self.compact is None else not self.compact
+        # Los bytes de orjson van directo al cuerpo, sin pasar por str
+        cuerpo = orjson.dumps(obj, default=_default,
+                              option=self._opciones({'indent': indent}))
+        return self._app.response_class(cuerpo, mimetype=self.mimetype)
+
+
+def provider_from_env():
+    """Clase de proveedor según JSON_PROVIDER ('orjson' o 'stdlib')."""
+    nombre = os.getenv('JSON_PROVIDER', 'orjson')
+    if nombre not in ('orjson', 'stdlib'):
+        raise ValueError(f"JSON_PROVIDER no soportado: {nombre}")
+    return OrjsonProvider if nombre == 'orjson' and orjson is not None else StdlibProvider
+
+
+def codificaciones_aceptadas(accept_encoding):
+    """{codificación: q} de una cabecera Accept-Encoding."""
+    aceptadas = {}
+    for parte in (accept_encoding or '').split(','):
+        codificacion, _, parametros = parte.strip().partition(';')
+        q = 1.0
+        parametro = parametros.strip()
+        if parametro.startswith('q='):
+            try:
+                q = float(parametro[2:])
+            except ValueError:
+                q = 0.0
+        if codificacion:
+            aceptadas[codificacion.lower()] = q
+    return aceptadas
+
+
+def elegir_codificacion(accept_encoding):
+    aceptadas = codificaciones_aceptadas(accept_encoding)
+    comodin = aceptadas.get('*', 0.0)
+    candidatas = (['br'] if brotli is not None else []) + ['gzip']
+    # A igual q gana brotli (comprime más a igual costo)
+    mejor = max(candidatas, key=lambda c: aceptadas.get(c, comodin), default=None)
+    return mejor if mejor is not None and aceptadas.get(mejor, comodin) > 0 else None
+
+
+def comprimir(response, accept_encoding, minimo=1024, nivel_gzip=5, calidad_brotli=4):
+    """Comprime el cuerpo de `response` si conviene; devuelve la misma respuesta."""
+    if (response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or not (response.mimetype or '').startswith(TIPOS_COMPRIMIBLES)):
+        return response
+    response.vary.add('Accept-Encoding')
+    cuerpo = response.get_data()
+    if len(cuerpo) < minimo:
+        return response
+    codificacion = elegir_codificacion(accept_encoding)
+    if codificacion is None:
+        return response
+    if codificacion == 'br':
+        comprimido = brotli.compress(cuerpo, quality=calidad_brotli)
+    else:
+        comprimido = gzip.compress(cuerpo, compresslevel=nivel_gzip, mtime=0)
+    response.set_data(comprimido)
+    response.headers['Content-Encoding'] = codificacion
+    return response
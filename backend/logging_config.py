@@ -1,6 +1,10 @@
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, SocketHandler
 import os
+import atexit
+import queue
+import random
+import threading
 
 def setup_logging():
     # Configurar el logger raíz
@@ -33,4 +37,220 @@ def setup_logging():
     console_handler.setFormatter(console_formatter)
     logger.addHandler(console_handler)
 
-    logger.info("Configuración de logging completada") 
\ No newline at end of file
+    logger.info("Configuración de logging completada") 
+
+class AsyncBatchHandler(logging.Handler):
+    """Envía los registros a otro handler desde un hilo en segundo plano.
+
+    El hilo de la petición solo encola el registro; el hilo de envío los saca
+    en lotes de hasta `batch_size` (o cada `flush_interval` segundos) y los
+    escribe en el handler destino. Si el destino es un SocketHandler (como
+    TCPLogstashHandler) el lote entero se manda en una sola escritura.
+
+    La cola está acotada a `capacity` registros. Cuando se llena, la política
+    'drop' descarta el registro nuevo y 'block' espera hasta `block_timeout`
+    segundos antes de descartarlo. Un lote que no llega al socket (sin
+    conexión o error al escribir) se cuenta en `failed`, no en `sent`.
+    """
+
+    POLICIES = ('drop', 'block')
+
+    def __init__(self, target, capacity=10000, batch_size=100, flush_interval=0.5,
+                 policy='drop', block_timeout=0.05):
+        super().__init__()
+        if policy not in self.POLICIES:
+            raise ValueError(f"Política de cola no válida: {policy}")
+        self.target = target
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self._contadores = threading.Lock()
+        self._pid = None
+        self._start()
+        atexit.register(self.close)
+
+    def _start(self):
+        # Los hilos no sobreviven a un fork (gunicorn con preload_app), así que
+        # cada proceso arranca su propia cola e hilo de envío
+        self._pid = os.getpid()
+        self._contadores = threading.Lock()
+        self.queue = queue.Queue(maxsize=self.capacity)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='log-shipper', daemon=True)
+        self._thread.start()
+
+    def prepare(self, record):
+        # Resolver el mensaje en el hilo que loguea: los argumentos pueden
+        # cambiar antes de que el hilo de envío procese el registro
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def emit(self, record):
+        try:
+            if self._pid != os.getpid():
+                self._start()
+            record = self.prepare(record)
+            if self.policy == 'block':
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+            with self._contadores:
+                self.enqueued += 1
+        except queue.Full:
+            with self._contadores:
+                self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def _run(self):
+        while not self._stop.is_set() or not self.queue.empty():
+            batch = self._next_batch()
+            if batch:
+                self._ship(batch)
+
+    def _next_batch(self):
+        try:
+            batch = [self.queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _ship(self, batch):
+        try:
+            if isinstance(self.target, SocketHandler):
+                self._send_socket(b''.join(self.target.makePickle(r) for r in batch))
+            else:
+                for record in batch:
+                    self.target.handle(record)
+            with self._contadores:
+                self.sent += len(batch)
+        except Exception:
+            with self._contadores:
+                self.failed += len(batch)
+
+    def _send_socket(self, data):
+        # SocketHandler.send se traga los OSError (y no envía nada mientras
+        # espera para reintentar la conexión): se escribe en el socket
+        # directamente para que las pérdidas lleguen a `failed`
+        target = self.target
+        if target.sock is None:
+            target.createSocket()
+        if target.sock is None:
+            raise OSError("Sin conexión con el destino de logs")
+        try:
+            target.sock.sendall(data)
+        except OSError:
+            target.sock.close()
+            target.sock = None
+            raise
+
+    def stats(self):
+        with self._contadores:
+            contadores = {
+                'enqueued': self.enqueued,
+                'sent': self.sent,
+                'dropped': self.dropped,
+                'failed': self.failed,
+            }
+        return {
+            **contadores,
+            'queue_depth': self.queue.qsize(),
+            'capacity': self.capacity,
+            'policy': self.policy
+        }
+
+    def close(self):
+        if not self._stop.is_set():
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self.target.close()
+        super().close()
+
+
+def async_handler_from_env(target):
+    """Crea un AsyncBatchHandler configurado con las variables LOG_QUEUE_*."""
+    return AsyncBatchHandler(
+        target,
+        capacity=int(os.getenv('LOG_QUEUE_SIZE', '10000')),
+        batch_size=int(os.getenv('LOG_BATCH_SIZE', '100')),
+        flush_interval=float(os.getenv('LOG_FLUSH_INTERVAL', '0.5')),
+        policy=os.getenv('LOG_QUEUE_POLICY', 'drop'),
+        block_timeout=float(os.getenv('LOG_BLOCK_TIMEOUT', '0.05'))
+    )
+
+
+class StructuredLogger:
+    """Fachada de logging por eventos con payload perezoso y muestreo por tipo.
+
+    Cada evento tiene un `tipo` que se manda en el campo `type` (el que usa
+    logstash.conf). El mensaje y los campos pueden ser funciones: solo se
+    evalúan si el nivel está habilitado y el evento no se descarta por
+    muestreo, así un log de DEBUG no cuesta nada en producción.
+
+    - `campos`: se agregan al registro siempre que se emita
+    - `detalle`: solo se agrega si además está habilitado DEBUG (p. ej.
+      cabeceras o el cuerpo de la petición)
+
+    `muestreo` es {tipo: fracción}; los eventos muestreados llevan
+    `sample_rate` para poder reescalar los conteos en Kibana.
+    """
+
+    def __init__(self, logger, muestreo=None):
+        self.logger = logger
+        self.muestreo = dict(muestreo or {})
+
+    def enabled(self, nivel, tipo):
+        if not self.logger.isEnabledFor(nivel):
+            return False
+        tasa = self.muestreo.get(tipo)
+        return tasa is None or random.random() < tasa
+
+    def _log(self, nivel, tipo, mensaje, campos, detalle, exc_info):
+        if not self.enabled(nivel, tipo):
+            return
+        extra = {'type': tipo}
+        if campos is not None:
+            extra.update(campos() if callable(campos) else campos)
+        if detalle is not None and self.logger.isEnabledFor(logging.DEBUG):
+            extra.update(detalle() if callable(detalle) else detalle)
+        if tipo in self.muestreo:
+            extra['sample_rate'] = self.muestreo[tipo]
+        # stacklevel=3: el registro apunta a quien llamó a info()/error()/...
+        self.logger.log(nivel, mensaje() if callable(mensaje) else mensaje,
+                        extra=extra, exc_info=exc_info, stacklevel=3)
+
+    def debug(self, tipo, mensaje, campos=None, detalle=None, exc_info=None):
+        self._log(logging.DEBUG, tipo, mensaje, campos, detalle, exc_info)
+
+    def info(self, tipo, mensaje, campos=None, detalle=None, exc_info=None):
+        self._log(logging.INFO, tipo, mensaje, campos, detalle, exc_info)
+
+    def warning(self, tipo, mensaje, campos=None, detalle=None, exc_info=None):
+        self._log(logging.WARNING, tipo, mensaje, campos, detalle, exc_info)
+
+    def error(self, tipo, mensaje, campos=None, detalle=None, exc_info=None):
+        self._log(logging.ERROR, tipo, mensaje, campos, detalle, exc_info)
+
+
+def sampling_from_env():
+    """{tipo: fracción} de LOG_SAMPLING, p. ej. 'product_list=0.01,auth=0.1'."""
+    muestreo = {}
+    for par in filter(None, (p.strip() for p in os.getenv('LOG_SAMPLING', '').split(','))):
+        tipo, _, tasa = par.partition('=')
+        tasa = float(tasa)
+        if not 0 <= tasa <= 1:
+            raise ValueError(f"Tasa de muestreo fuera de [0, 1] para {tipo}: {tasa}")
+        muestreo[tipo.strip()] = tasa
+    return muestreo
@@ -0,0 +1,137 @@
+"""Métricas de la API en formato de texto de Prometheus.
+
+Por petición se observa la latencia (por método, ruta y estado) y cuántas
+sentencias SQL ejecutó y cuánto tiempo pasó en la base de datos; las
+sentencias se cuentan con eventos de SQLAlchemy en una variable del hilo y
+se vuelcan una sola vez al terminar la petición.
+
+Con varios workers de gunicorn, PROMETHEUS_MULTIPROC_DIR apunta a un
+directorio compartido: cada proceso escribe sus valores en archivos mmap y
+/api/metrics los suma al responder (gunicorn.conf.py lo define y lo vacía).
+Sin esa variable las métricas son las del proceso.
+"""
+import os
+import threading
+import time
+
+from flask import request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                               Histogram, generate_latest, multiprocess)
+from sqlalchemy import event
+
+from concurrencia import QueuePoolMedido
+
+SIN_RUTA = '<sin ruta>'
+INTERVALO_MEMORIA = 5.0
+
+LATENCIA = Histogram(
+    'http_request_duration_seconds', 'Latencia de las peticiones HTTP',
+    ['method', 'route', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+SENTENCIAS = Histogram(
+    'db_statements_per_request', 'Sentencias SQL ejecutadas por petición', ['route'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 500))
+SEGUNDOS_DB = Counter(
+    'db_duration_seconds', 'Tiempo en la base de datos de las peticiones', ['route'])
+POOL_EN_USO = Gauge(
+    'db_pool_checked_out', 'Conexiones del pool en uso', multiprocess_mode='livesum')
+# 'liveall' agrega la etiqueta pid en modo multiproceso
+POOL_DESBORDE = Gauge(
+    'db_pool_overflow', 'Conexiones abiertas por encima de pool_size', multiprocess_mode='liveall')
+POOL_ESPERA = Histogram(
+    'db_pool_wait_seconds', 'Espera por una conexión del pool',
+    buckets=(0.001, 0.005, 0.025, 0.1, 0.5, 1.0, 5.0))
+MEMORIA = Gauge(
+    'worker_resident_memory_bytes', 'Memoria residente de cada worker', multiprocess_mode='liveall')
+
+_peticion = threading.local()
+_pagina = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def memoria_residente():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * _pagina
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Metricas:
+    """Conecta las métricas a una app Flask y a su engine de SQLAlchemy."""
+
+    def __init__(self):
+        self._engine = None
+        self._memoria_medida = 0.0
+
+    def instrumentar(self, app, engine):
+        self._engine = engine
+        app.before_request(self._antes)
+        app.after_request(self._despues)
+        event.listen(engine, 'before_cursor_execute', self._antes_sql)
+        event.listen(engine, 'after_cursor_execute', self._despues_sql)
+        event.listen(engine, 'checkout', self._checkout)
+        event.listen(engine, 'checkin', self._checkin)
+        if isinstance(engine.pool, QueuePoolMedido):
+            engine.pool.observar_espera = POOL_ESPERA.observe
+
+    def _antes(self):
+        _peticion.inicio = time.perf_counter()
+        _peticion.sentencias = 0
+        _peticion.segundos_db = 0.0
+
+    def _despues(self, response):
+        inicio = getattr(_peticion, 'inicio', None)
+        if inicio is None:
+            return response
+        _peticion.inicio = None
+        ruta = request.url_rule.rule if request.url_rule is not None else SIN_RUTA
+        LATENCIA.labels(request.method, ruta, str(response.status_code)).observe(time.perf_counter() - inicio)
+        SENTENCIAS.labels(ruta).observe(_peticion.sentencias)
+        if _peticion.segundos_db:
+            SEGUNDOS_DB.labels(ruta).inc(_peticion.segundos_db)
+        self._medir_memoria()
+        return response
+
+    def _medir_memoria(self):
+        # Leer /proc en cada petición costaría más que todo lo demás
+        ahora = time.monotonic()
+        if ahora - self._memoria_medida >= INTERVALO_MEMORIA:
+            self._memoria_medida = ahora
+            MEMORIA.set(memoria_residente())
+
+    @staticmethod
+    def _antes_sql(conn, cursor, statement, parameters, context, executemany):
+        conn.info['inicio_sql'] = time.perf_counter()
+
+    @staticmethod
+    def _despues_sql(conn, cursor, statement, parameters, context, executemany):
+        inicio = conn.info.pop('inicio_sql', None)
+        if inicio is not None and getattr(_peticion, 'inicio', None) is not None:
+            _peticion.sentencias += 1
+            _peticion.segundos_db += time.perf_counter() - inicio
+
+    def _checkout(self, dbapi_connection, connection_record, connection_proxy):
+        POOL_EN_USO.inc()
+        self._medir_desborde()
+
+    def _checkin(self, dbapi_connection, connection_record):
+        POOL_EN_USO.dec()
+        self._medir_desborde()
+
+    def _medir_desborde(self):
+        # engine.pool cambia si el pool se recrea (dispose, pool_recycle)
+        pool = self._engine.pool
+        if isinstance(pool, QueuePoolMedido):
+            POOL_DESBORDE.set(max(pool.overflow(), 0))
+
+    @staticmethod
+    def exportar():
+        """(cuerpo, content type) con las métricas de todos los workers."""
+        if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
@@ -0,0 +1,33 @@
+"""cache_version
+
+Revision ID: 3c7a91d2e4f0
+Revises: 9df12bd7e139
+Create Date: 2026-10-18 10:40:12.514203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c7a91d2e4f0'
+down_revision = '9df12bd7e139'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cache_version = op.create_table('cache_version',
+    sa.Column('nombre', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('nombre')
+    )
+    op.bulk_insert(cache_version, [
+        {'nombre': 'categoria', 'version': 0},
+        {'nombre': 'proveedor', 'version': 0},
+        {'nombre': 'producto', 'version': 0},
+    ])
+
+
+def downgrade():
+    op.drop_table('cache_version')
@@ -0,0 +1,46 @@
+"""producto_staging
+
+Revision ID: 5e2b8f14c9a3
+Revises: 3c7a91d2e4f0
+Create Date: 2026-10-18 11:05:47.208113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b8f14c9a3'
+down_revision = '3c7a91d2e4f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # UNLOGGED: la tabla solo guarda datos transitorios de cada importación,
+    # no hace falta escribirlos en el WAL
+    prefijos = ['UNLOGGED'] if op.get_context().dialect.name == 'postgresql' else []
+    op.create_table('producto_staging',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('import_id', sa.String(length=36), nullable=False),
+    sa.Column('fila', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=True),
+    sa.Column('sku', sa.String(length=50), nullable=True),
+    sa.Column('precio_costo', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('precio_venta', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('descripcion', sa.Text(), nullable=True),
+    sa.Column('cantidad', sa.Integer(), nullable=True),
+    sa.Column('umbral_reorden', sa.Integer(), nullable=True),
+    sa.Column('categoria_id', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    prefixes=prefijos
+    )
+    with op.batch_alter_table('producto_staging', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_producto_staging_import_id'), ['import_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('producto_staging', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_producto_staging_import_id'))
+
+    op.drop_table('producto_staging')
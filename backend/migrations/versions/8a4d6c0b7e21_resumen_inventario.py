@@ -0,0 +1,43 @@
+"""resumen_inventario
+
+Revision ID: 8a4d6c0b7e21
+Revises: 5e2b8f14c9a3
+Create Date: 2026-10-18 11:32:09.771640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4d6c0b7e21'
+down_revision = '5e2b8f14c9a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('resumen_inventario',
+    sa.Column('categoria_clave', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('productos', sa.Integer(), nullable=False),
+    sa.Column('unidades', sa.BigInteger(), nullable=False),
+    sa.Column('valor_total', sa.Numeric(precision=16, scale=2), nullable=False),
+    sa.Column('bajo_stock', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('categoria_clave')
+    )
+    # Carga inicial; después se mantiene en cada escritura
+    # (y `flask reconstruir-resumen` la reconcilia)
+    op.execute("""
+        INSERT INTO resumen_inventario (categoria_clave, productos, unidades, valor_total, bajo_stock)
+        SELECT COALESCE(categoria_id, 0),
+               COUNT(*),
+               COALESCE(SUM(COALESCE(cantidad, 0)), 0),
+               COALESCE(SUM(COALESCE(cantidad, 0) * COALESCE(precio_costo, 0)), 0),
+               SUM(CASE WHEN COALESCE(cantidad, 0) <= umbral_reorden THEN 1 ELSE 0 END)
+        FROM producto
+        GROUP BY COALESCE(categoria_id, 0)
+    """)
+
+
+def downgrade():
+    op.drop_table('resumen_inventario')
@@ -0,0 +1,59 @@
+"""indices para las consultas frecuentes
+
+Revision ID: b71f3e9c2d58
+Revises: 8a4d6c0b7e21
+Create Date: 2026-10-18 11:58:30.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71f3e9c2d58'
+down_revision = '8a4d6c0b7e21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    es_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    # Reporte de movimientos: rango de fechas, y por producto + rango
+    op.create_index('ix_movimiento_inventario_fecha', 'movimiento_inventario', ['fecha'])
+    op.create_index('ix_movimiento_inventario_producto_id_fecha', 'movimiento_inventario',
+                    ['producto_id', 'fecha'])
+
+    # Filtro de órdenes por estado y vencimiento; joins de órdenes e items
+    op.create_index('ix_orden_compra_estado_fecha_entrega', 'orden_compra',
+                    ['estado', 'fecha_entrega'])
+    op.create_index('ix_orden_compra_proveedor_id', 'orden_compra', ['proveedor_id'])
+    op.create_index('ix_orden_compra_item_orden_compra_id', 'orden_compra_item',
+                    ['orden_compra_id'])
+    op.create_index('ix_orden_compra_item_producto_id', 'orden_compra_item', ['producto_id'])
+
+    # Join con categoría y paginación por cursor ordenada por nombre
+    op.create_index('ix_producto_categoria_id', 'producto', ['categoria_id'])
+    op.create_index('ix_producto_nombre_id', 'producto', ['nombre', 'id'])
+
+    # Búsqueda por subcadena (ILIKE '%...%') en nombre y sku
+    if es_postgres:
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index('ix_producto_nombre_trgm', 'producto', ['nombre'],
+                        postgresql_using='gin', postgresql_ops={'nombre': 'gin_trgm_ops'})
+        op.create_index('ix_producto_sku_trgm', 'producto', ['sku'],
+                        postgresql_using='gin', postgresql_ops={'sku': 'gin_trgm_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_producto_sku_trgm', table_name='producto')
+        op.drop_index('ix_producto_nombre_trgm', table_name='producto')
+    op.drop_index('ix_producto_nombre_id', table_name='producto')
+    op.drop_index('ix_producto_categoria_id', table_name='producto')
+    op.drop_index('ix_orden_compra_item_producto_id', table_name='orden_compra_item')
+    op.drop_index('ix_orden_compra_item_orden_compra_id', table_name='orden_compra_item')
+    op.drop_index('ix_orden_compra_proveedor_id', table_name='orden_compra')
+    op.drop_index('ix_orden_compra_estado_fecha_entrega', table_name='orden_compra')
+    op.drop_index('ix_movimiento_inventario_producto_id_fecha', table_name='movimiento_inventario')
+    op.drop_index('ix_movimiento_inventario_fecha', table_name='movimiento_inventario')
@@ -0,0 +1,34 @@
+"""producto_busqueda_cambio
+
+Revision ID: c4e8a1f6b392
+Revises: b71f3e9c2d58
+Create Date: 2026-10-18 12:20:41.553018
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a1f6b392'
+down_revision = 'b71f3e9c2d58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('producto_busqueda_cambio',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('producto_id', sa.Integer(), nullable=True),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('producto_busqueda_cambio', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_producto_busqueda_cambio_fecha'), ['fecha'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('producto_busqueda_cambio', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_producto_busqueda_cambio_fecha'))
+
+    op.drop_table('producto_busqueda_cambio')
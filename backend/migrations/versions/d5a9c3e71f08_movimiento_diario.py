@@ -0,0 +1,40 @@
+"""movimiento_diario
+
+Revision ID: d5a9c3e71f08
+Revises: c4e8a1f6b392
+Create Date: 2026-10-18 13:05:17.284310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a9c3e71f08'
+down_revision = 'c4e8a1f6b392'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('movimiento_diario',
+    sa.Column('producto_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('tipo', sa.String(length=20), nullable=False),
+    sa.Column('cantidad', sa.BigInteger(), nullable=False),
+    sa.Column('movimientos', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('producto_id', 'dia', 'tipo')
+    )
+    # Carga inicial; después se mantiene en cada movimiento
+    # (y `flask reconstruir-movimientos-diarios` la reconcilia)
+    op.execute("""
+        INSERT INTO movimiento_diario (producto_id, dia, tipo, cantidad, movimientos)
+        SELECT producto_id, DATE(fecha), tipo, SUM(cantidad), COUNT(*)
+        FROM movimiento_inventario
+        WHERE producto_id IS NOT NULL AND fecha IS NOT NULL AND tipo IS NOT NULL
+        GROUP BY producto_id, DATE(fecha), tipo
+    """)
+
+
+def downgrade():
+    op.drop_table('movimiento_diario')
@@ -0,0 +1,107 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class VerificacionSaturada(Exception):
+    """No hay hueco en la cola de verificación de contraseñas."""
+
+
+class VerificacionExpirada(VerificacionSaturada):
+    """La verificación no terminó dentro de `timeout` (se responde igual, 503)."""
+
+
+class PasswordVerifier:
+    """Verifica y genera hashes de contraseña en un pool de hilos acotado.
+
+    scrypt con N=32768 consume decenas de milisegundos de CPU. El pool limita
+    cuántas verificaciones corren a la vez en el proceso (`workers`) y la cola
+    de admisión cuántas pueden estar esperando (`max_pendientes`). Si la cola
+    está llena durante `espera_admision` segundos se lanza
+    VerificacionSaturada, para responder 503 en lugar de acaparar workers.
+    El lugar en la cola se libera cuando el hash termina (no cuando la
+    petición deja de esperarlo), así la admisión acota el trabajo real; si no
+    termina en `timeout` se cancela si aún no empezó y se lanza
+    VerificacionExpirada.
+
+    Cada login admitido ocupa un hilo de petición mientras espera, así que
+    `max_admitidas` (corriendo + en cola) debe quedar por debajo de los hilos
+    del worker de gunicorn; verifier_from_env lo deriva del perfil.
+    """
+
+    def __init__(self, workers=2, max_pendientes=8, espera_admision=0.5,
+                 timeout=10.0, metodo='scrypt:32768:8:1', max_admitidas=None):
+        self.workers = workers
+        self.max_pendientes = max_pendientes
+        self.max_admitidas = workers + max_pendientes if max_admitidas is None else max_admitidas
+        self.espera_admision = espera_admision
+        self.timeout = timeout
+        self.metodo = metodo
+        self.rechazadas = 0
+        self.expiradas = 0
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        # Un executor por proceso: los hilos no sobreviven al fork de gunicorn
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='password')
+                    self._admision = threading.BoundedSemaphore(self.max_admitidas)
+                    self._pid = os.getpid()
+        return self._pool
+
+    def _ejecutar(self, fn, *args):
+        pool = self._executor()
+        if not self._admision.acquire(timeout=self.espera_admision):
+            self.rechazadas += 1
+            raise VerificacionSaturada()
+        try:
+            futuro = pool.submit(fn, *args)
+        except BaseException:
+            self._admision.release()
+            raise
+        futuro.add_done_callback(lambda _: self._admision.release())
+        try:
+            return futuro.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            futuro.cancel()
+            self.expiradas += 1
+            raise VerificacionExpirada()
+
+    def verify(self, password_hash, password):
+        return self._ejecutar(check_password_hash, password_hash, password)
+
+    def hash(self, password):
+        return self._ejecutar(generate_password_hash, password, self.metodo)
+
+    def needs_rehash(self, password_hash):
+        return not password_hash.startswith(self.metodo + '$')
+
+
+def admitidas_para(workers, max_pendientes, hilos):
+    """Logins admitidos a la vez en un worker con `hilos` hilos de petición.
+
+    Siempre queda al menos un hilo libre para el resto del tráfico; con un
+    solo hilo (worker sync) no puede haber dos peticiones a la vez y se admite
+    la propia.
+    """
+    return max(1, min(workers + max_pendientes, hilos - 1))
+
+
+def verifier_from_env(hilos):
+    """`hilos`: hilos de petición por worker (perfil_desde_env()['threads'])."""
+    workers = int(os.getenv('LOGIN_HASH_WORKERS', '2'))
+    max_pendientes = int(os.getenv('LOGIN_MAX_PENDING', '8'))
+    return PasswordVerifier(
+        workers=workers,
+        max_pendientes=max_pendientes,
+        max_admitidas=admitidas_para(workers, max_pendientes, hilos),
+        espera_admision=float(os.getenv('LOGIN_ADMISSION_TIMEOUT', '0.5')),
+        timeout=float(os.getenv('LOGIN_HASH_TIMEOUT', '10')),
+        metodo=os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    )
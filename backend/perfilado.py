@@ -0,0 +1,205 @@
+"""Perfilado de peticiones a pedido y registro de consultas lentas.
+
+Perfilador: una petición se perfila con cProfile si un administrador manda la
+cabecera X-Profile o si cae en la muestra aleatoria (`tasa`). El perfil se
+guarda en `directorio` como <id>.prof (formato pstats, para snakeviz o
+`python -m pstats`) junto a <id>.json con la ruta y la duración; solo se
+conservan los `maximo` más recientes.
+
+ConsultasLentas: con eventos de cursor de SQLAlchemy registra cada sentencia
+que tarda más de `umbral_ms`, con sus parámetros y la ruta que la ejecutó, y
+agrega el plan (EXPLAIN, sin ejecutarla de nuevo) si pasa de `umbral_explain_ms`.
+Si no está configurado no se registra ningún evento.
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+_ID_VALIDO = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+MAX_PARAMETROS = 500
+
+
+class Perfilador:
+    def __init__(self, directorio, maximo=200, tasa=0.0):
+        self.directorio = directorio
+        self.maximo = maximo
+        self.tasa = tasa
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def debe_perfilar(self, pedido):
+        """`pedido`: la petición trae X-Profile de un administrador."""
+        return pedido or (self.tasa > 0 and random.random() < self.tasa)
+
+    def iniciar(self, perfil_id=None):
+        if perfil_id is None or not _ID_VALIDO.match(perfil_id):
+            perfil_id = uuid.uuid4().hex
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Otro perfilador activo en el proceso (Python 3.12+): se omite
+            return None
+        self._local.actual = (perfil_id, perfil, time.perf_counter())
+        return perfil_id
+
+    def activo(self):
+        return getattr(self._local, 'actual', None) is not None
+
+    def terminar(self, metadatos):
+        actual = getattr(self._local, 'actual', None)
+        if actual is None:
+            return None
+        self._local.actual = None
+        perfil_id, perfil, inicio = actual
+        perfil.disable()
+        os.makedirs(self.directorio, exist_ok=True)
+        perfil.dump_stats(self._ruta(perfil_id, '.prof'))
+        with open(self._ruta(perfil_id, '.json'), 'w') as archivo:
+            json.dump({'id': perfil_id, 'fecha': datetime.utcnow().isoformat(),
+                       'duracion_ms': round((time.perf_counter() - inicio) * 1000, 3), **metadatos}, archivo)
+        self._recortar()
+        return perfil_id
+
+    def descartar(self):
+        """Apaga un perfil que quedó abierto (la petición terminó con error)."""
+        actual = getattr(self._local, 'actual', None)
+        if actual is not None:
+            self._local.actual = None
+            actual[1].disable()
+
+    def _ruta(self, perfil_id, extension):
+        return os.path.join(self.directorio, perfil_id + extension)
+
+    def _recortar(self):
+        with self._lock:
+            perfiles = self._ordenados()
+            for perfil_id in perfiles[:max(len(perfiles) - self.maximo, 0)]:
+                for extension in ('.prof', '.json'):
+                    try:
+                        os.remove(self._ruta(perfil_id, extension))
+                    except FileNotFoundError:
+                        pass
+
+    def _ordenados(self):
+        """Ids de los perfiles guardados, del más viejo al más nuevo."""
+        try:
+            entradas = [e for e in os.scandir(self.directorio) if e.name.endswith('.json')]
+        except FileNotFoundError:
+            return []
+        # El directorio es compartido entre workers y el lock es por proceso:
+        # otro worker puede borrar un perfil entre el scandir y el stat
+        fechas = []
+        for entrada in entradas:
+            try:
+                fechas.append((entrada.stat().st_mtime, entrada.name[:-len('.json')]))
+            except FileNotFoundError:
+                continue
+        fechas.sort()
+        return [perfil_id for _, perfil_id in fechas]
+
+    def listar(self, limite=50):
+        resultado = []
+        for perfil_id in reversed(self._ordenados()[-limite:]):
+            try:
+                with open(self._ruta(perfil_id, '.json')) as archivo:
+                    resultado.append(json.load(archivo))
+            except (FileNotFoundError, ValueError):
+                continue
+        return resultado
+
+    def archivo(self, perfil_id):
+        """Ruta del .prof, o None si el id no existe (o ya salió del anillo)."""
+        if not _ID_VALIDO.match(perfil_id):
+            return None
+        ruta = self._ruta(perfil_id, '.prof')
+        return ruta if os.path.exists(ruta) else None
+
+    def resumen(self, perfil_id, orden='cumulative', limite=40):
+        ruta = self.archivo(perfil_id)
+        if ruta is None:
+            return None
+        salida = io.StringIO()
+        pstats.Stats(ruta, stream=salida).strip_dirs().sort_stats(orden).print_stats(limite)
+        return salida.getvalue()
+
+
+def perfilador_from_env():
+    return Perfilador(
+        directorio=os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'perfiles')),
+        maximo=int(os.getenv('PROFILE_MAX_FILES', '200')),
+        tasa=float(os.getenv('PROFILE_SAMPLE_RATE', '0')),
+    )
+
+
+class ConsultasLentas:
+    def __init__(self, umbral_ms, umbral_explain_ms=None):
+        self.umbral = umbral_ms / 1000
+        self.umbral_explain = umbral_explain_ms / 1000 if umbral_explain_ms is not None else None
+        self.registradas = 0
+
+    def instrumentar(self, engine):
+        event.listen(engine, 'before_cursor_execute', self._antes)
+        event.listen(engine, 'after_cursor_execute', self._despues)
+
+    @staticmethod
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info['inicio_consulta'] = time.perf_counter()
+
+    def _despues(self, conn, cursor, statement, parameters, context, executemany):
+        inicio = conn.info.pop('inicio_consulta', None)
+        if inicio is None or conn.info.get('explicando'):
+            return
+        duracion = time.perf_counter() - inicio
+        if duracion < self.umbral:
+            return
+        self.registradas += 1
+        ruta = (request.url_rule.rule if request.url_rule is not None else request.path) \
+            if has_request_context() else None
+        registro = {
+            'type': 'slow_query',
+            'route': ruta,
+            'duration_ms': round(duracion * 1000, 3),
+            'sql': statement,
+            'params': repr(parameters)[:MAX_PARAMETROS],
+        }
+        if (self.umbral_explain is not None and duracion >= self.umbral_explain and not executemany
+                and statement.lstrip().upper().startswith(('SELECT', 'WITH'))):
+            registro['plan'] = self._explicar(conn, statement, parameters)
+        logger.warning(f"Consulta lenta ({registro['duration_ms']} ms) en {ruta}", extra=registro)
+
+    @staticmethod
+    def _explicar(conn, statement, parameters):
+        prefijo = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+        conn.info['explicando'] = True
+        try:
+            filas = conn.exec_driver_sql(prefijo + statement, parameters).fetchall()
+            return '\n'.join(str(fila[0]) if len(fila) == 1 else ' '.join(map(str, fila)) for fila in filas)
+        except Exception as e:
+            return f"EXPLAIN falló: {e}"
+        finally:
+            conn.info.pop('explicando', None)
+
+
+def consultas_lentas_from_env():
+    """ConsultasLentas según SLOW_QUERY_MS; None si no está definida."""
+    umbral = os.getenv('SLOW_QUERY_MS')
+    if not umbral:
+        return None
+    explain = os.getenv('SLOW_QUERY_EXPLAIN_MS', '')
+    return ConsultasLentas(float(umbral), float(explain) if explain else None)
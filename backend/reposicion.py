@@ -0,0 +1,126 @@
+"""Sugerencias de reposición calculadas sobre el historial de movimientos.
+
+Todo el cálculo es columnar con pandas: la demanda llega ya sumada por
+producto y día, y las estadísticas por producto salen de groupby sobre esas
+sumas (los días sin ventas cuentan como demanda cero sin materializarlos).
+
+Para cada producto:
+- demanda diaria: el mayor entre el promedio de los últimos `dias_corto` días
+  y el de toda la ventana, para reaccionar a subidas recientes;
+- punto de reorden: demanda durante el plazo de entrega más un stock de
+  seguridad z·σ·√plazo, y nunca menos que `umbral_reorden`;
+- cantidad: lo que falta para cubrir el punto de reorden más `cobertura` días
+  de demanda, descontando lo que ya está pedido.
+"""
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+DIAS_CORTO = 28
+PLAZO_DEFAULT = 7
+
+
+def estadisticas_demanda(demanda, hoy, dias_historia, dias_corto=DIAS_CORTO):
+    """Promedios y desviación diaria por producto.
+
+    `demanda` tiene columnas producto_id, dia y cantidad (unidades que
+    salieron ese día). Devuelve un DataFrame indexado por producto_id con
+    media, media_corta y desviacion.
+    """
+    edad = (pd.Timestamp(hoy) - pd.to_datetime(demanda['dia'])).dt.days
+    demanda = demanda.assign(edad=edad)
+    demanda = demanda[(demanda['edad'] >= 0) & (demanda['edad'] < dias_historia)]
+    cantidad = demanda['cantidad'].astype('float64')
+    por_producto = pd.DataFrame({
+        'suma': cantidad.groupby(demanda['producto_id']).sum(),
+        'suma_cuadrados': (cantidad ** 2).groupby(demanda['producto_id']).sum(),
+        'suma_corta': cantidad.where(demanda['edad'] < dias_corto, 0.0).groupby(demanda['producto_id']).sum(),
+    })
+    n = float(dias_historia)
+    media = por_producto['suma'] / n
+    varianza = (por_producto['suma_cuadrados'] - n * media ** 2) / max(n - 1, 1)
+    return pd.DataFrame({
+        'media': media,
+        'media_corta': por_producto['suma_corta'] / min(dias_corto, dias_historia),
+        'desviacion': np.sqrt(varianza.clip(lower=0)),
+    })
+
+
+def plazos_por_proveedor(ordenes):
+    """Plazo medio de entrega en días por proveedor (fecha_entrega - fecha_creacion)."""
+    ordenes = ordenes.dropna(subset=['fecha_entrega', 'fecha_creacion'])
+    dias = (pd.to_datetime(ordenes['fecha_entrega']) - pd.to_datetime(ordenes['fecha_creacion'])).dt.days
+    dias = dias[dias > 0]
+    return dias.groupby(ordenes.loc[dias.index, 'proveedor_id']).mean()
+
+
+def sugerir(productos, estadisticas, proveedores, plazos, en_camino,
+            cobertura=14, nivel_servicio=0.95):
+    """Productos a reponer, con su proveedor y la cantidad sugerida.
+
+    - `productos`: id, nombre, cantidad, umbral_reorden, precio_costo
+    - `estadisticas`: salida de estadisticas_demanda
+    - `proveedores`: producto_id, proveedor_id, precio_unitario (última compra)
+    - `plazos`: Series proveedor_id -> días
+    - `en_camino`: Series producto_id -> unidades en órdenes pendientes
+    """
+    z = NormalDist().inv_cdf(nivel_servicio)
+    df = (productos.set_index('id')
+          .join(estadisticas, how='left')
+          .join(proveedores.set_index('producto_id'), how='left')
+          .fillna({'media': 0.0, 'media_corta': 0.0, 'desviacion': 0.0}))
+    # La serie puede llegar como object (vacía, o con los Decimal de SUM en
+    # PostgreSQL) y fillna sobre object está deprecado: se pasa a float antes
+    df['en_camino'] = en_camino.reindex(df.index).astype('float64').fillna(0).to_numpy()
+    df['plazo'] = df['proveedor_id'].map(plazos).fillna(PLAZO_DEFAULT)
+    df['demanda_diaria'] = np.maximum(df['media'], df['media_corta'])
+
+    stock = df['cantidad'].fillna(0)
+    umbral = df['umbral_reorden'].fillna(0)
+    posicion = stock + df['en_camino']
+    seguridad = z * df['desviacion'] * np.sqrt(df['plazo'])
+    punto = np.maximum(df['demanda_diaria'] * df['plazo'] + seguridad, umbral)
+    objetivo = np.maximum(punto + df['demanda_diaria'] * cobertura, umbral + 1)
+    df['stock'] = stock
+    df['punto_reorden'] = np.ceil(punto)
+    df['cantidad_sugerida'] = np.ceil(objetivo - posicion).clip(lower=0)
+
+    df = df[(posicion <= punto) & (df['cantidad_sugerida'] > 0)].copy()
+    # Igual que en_camino: sin historial de compras (o con Decimal) la columna
+    # es object, se pasa a float antes de fillna
+    df['precio_unitario'] = (df['precio_unitario'].astype('float64')
+                             .fillna(df['precio_costo'].astype('float64')).fillna(0))
+    return df.rename_axis('producto_id').reset_index()
+
+
+def borradores(sugerencias, nombres_proveedor):
+    """Agrupa las sugerencias en órdenes de compra en borrador por proveedor.
+
+    Cada borrador tiene la forma que acepta POST /api/ordenes-compra, más
+    los datos que justifican cada cantidad.
+    """
+    resultado = []
+    sugerencias = sugerencias.assign(
+        subtotal=(sugerencias['cantidad_sugerida'] * sugerencias['precio_unitario']).round(2))
+    for proveedor_id, grupo in sugerencias.groupby('proveedor_id', dropna=False, sort=True):
+        proveedor_id = None if pd.isna(proveedor_id) else int(proveedor_id)
+        grupo = grupo.sort_values('cantidad_sugerida', ascending=False)
+        resultado.append({
+            'proveedor_id': proveedor_id,
+            'proveedor': nombres_proveedor.get(proveedor_id),
+            'estado': 'borrador',
+            'total': round(float(grupo['subtotal'].sum()), 2),
+            'items': [{
+                'producto_id': int(fila.producto_id),
+                'producto': fila.nombre,
+                'cantidad': int(fila.cantidad_sugerida),
+                'precio_unitario': round(float(fila.precio_unitario), 2),
+                'subtotal': float(fila.subtotal),
+                'stock': int(fila.stock),
+                'en_camino': int(fila.en_camino),
+                'punto_reorden': int(fila.punto_reorden),
+                'demanda_diaria': round(float(fila.demanda_diaria), 3),
+            } for fila in grupo.itertuples(index=False)]
+        })
+    return resultado
@@ -0,0 +1,140 @@
+"""Prueba de estrés de movimientos concurrentes sobre un único SKU.
+
+Lanza N workers en paralelo contra POST /api/movimientos sobre el mismo
+producto, mezclando entradas y ventas, y al terminar comprueba que:
+
+    stock_final == stock_inicial + entradas_aceptadas - salidas_aceptadas
+
+Mientras corre, un hilo aparte lee el stock cada `--muestreo` segundos y la
+prueba falla si alguna lectura (o el stock final) es negativa. Es un
+muestreo: un valor negativo que dure menos que el intervalo puede no verse,
+aunque la invariante del final lo delataría. Informa el throughput y las
+latencias p50/p99.
+
+Uso (con el backend levantado):
+    python stress_movimientos.py --url http://localhost:5001 --producto-id 1 \\
+        --workers 32 --peticiones 2000
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def obtener_stock(session, url, producto_id):
+    respuesta = session.get(f"{url}/api/productos/{producto_id}", timeout=10)
+    respuesta.raise_for_status()
+    return respuesta.json()['cantidad']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5001')
+    parser.add_argument('--producto-id', type=int, required=True)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--peticiones', type=int, default=1000)
+    parser.add_argument('--proporcion-ventas', type=float, default=0.7,
+                        help='Fracción de movimientos que son ventas (el resto son entradas)')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--muestreo', type=float, default=0.05,
+                        help='segundos entre lecturas del stock durante la prueba')
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    movimientos = [
+        ('venta' if rng.random() < args.proporcion_ventas else 'entrada', rng.randint(1, 3))
+        for _ in range(args.peticiones)
+    ]
+
+    local = threading.local()
+    lock = threading.Lock()
+    latencias = []
+    aceptados = {'entrada': 0, 'venta': 0}
+    rechazados_stock = 0
+    errores = 0
+
+    def session():
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return local.session
+
+    def enviar(movimiento):
+        nonlocal rechazados_stock, errores
+        tipo, cantidad = movimiento
+        inicio = time.perf_counter()
+        try:
+            respuesta = session().post(f"{args.url}/api/movimientos", json={
+                'producto_id': args.producto_id,
+                'tipo': tipo,
+                'cantidad': cantidad,
+                'usuario': 'stress'
+            }, timeout=30)
+            estado = respuesta.status_code
+        except requests.RequestException:
+            estado = None
+        duracion = time.perf_counter() - inicio
+        with lock:
+            latencias.append(duracion)
+            if estado == 201:
+                aceptados[tipo] += cantidad
+            elif estado == 400:
+                rechazados_stock += 1
+            else:
+                errores += 1
+
+    terminado = threading.Event()
+    muestras = []
+
+    def muestrear():
+        sesion = requests.Session()
+        while not terminado.wait(args.muestreo):
+            try:
+                muestras.append(obtener_stock(sesion, args.url, args.producto_id))
+            except requests.RequestException:
+                pass
+
+    stock_inicial = obtener_stock(requests.Session(), args.url, args.producto_id)
+    muestreador = threading.Thread(target=muestrear, daemon=True)
+    muestreador.start()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(enviar, movimientos))
+    duracion_total = time.perf_counter() - inicio
+    terminado.set()
+    muestreador.join()
+    stock_final = obtener_stock(requests.Session(), args.url, args.producto_id)
+    stock_minimo = min(muestras + [stock_inicial, stock_final])
+
+    esperado = stock_inicial + aceptados['entrada'] - aceptados['venta']
+    print(f"Peticiones:          {args.peticiones} ({args.workers} workers)")
+    print(f"Rechazadas (stock):  {rechazados_stock}")
+    print(f"Errores:             {errores}")
+    print(f"Throughput:          {args.peticiones / duracion_total:.1f} req/s")
+    print(f"Latencia p50:        {percentil(latencias, 50) * 1000:.1f} ms")
+    print(f"Latencia p99:        {percentil(latencias, 99) * 1000:.1f} ms")
+    print(f"Stock inicial/final: {stock_inicial} -> {stock_final} (esperado {esperado})")
+    print(f"Stock mínimo leído:  {stock_minimo} ({len(muestras)} muestras)")
+
+    if stock_final != esperado or errores:
+        print("FALLO: el stock final no coincide con los movimientos aceptados")
+        sys.exit(1)
+    if stock_minimo < 0:
+        print("FALLO: el stock quedó negativo durante la prueba")
+        sys.exit(1)
+    print("OK: sin actualizaciones perdidas ni stock negativo")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import logging
+import socket
+import time
+from logging.handlers import SocketHandler
+
+from logging_config import AsyncBatchHandler
+
+
+def registro(mensaje):
+    return logging.LogRecord('prueba', logging.INFO, __file__, 1, mensaje, None, None)
+
+
+def esperar_envio(handler, total, segundos=5):
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        stats = handler.stats()
+        if stats['sent'] + stats['failed'] >= total:
+            return stats
+        time.sleep(0.01)
+    return handler.stats()
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_lotes_enviados_por_socket():
+    servidor = socket.socket()
+    servidor.bind(('127.0.0.1', 0))
+    servidor.listen(1)
+    handler = AsyncBatchHandler(SocketHandler('127.0.0.1', servidor.getsockname()[1]),
+                                batch_size=10, flush_interval=0.05)
+    try:
+        for i in range(25):
+            handler.emit(registro(f'mensaje {i}'))
+        stats = esperar_envio(handler, 25)
+        assert stats['sent'] == 25 and stats['failed'] == 0
+        conexion, _ = servidor.accept()
+        conexion.close()
+    finally:
+        handler.close()
+        servidor.close()
+
+
+def test_sin_conexion_los_lotes_cuentan_como_fallidos():
+    # Nadie escucha en el puerto: SocketHandler.send descartaría los lotes en silencio
+    handler = AsyncBatchHandler(SocketHandler('127.0.0.1', puerto_libre()),
+                                batch_size=10, flush_interval=0.05)
+    try:
+        for i in range(25):
+            handler.emit(registro(f'mensaje {i}'))
+        stats = esperar_envio(handler, 25)
+        assert stats['sent'] == 0 and stats['failed'] == 25
+        assert stats['enqueued'] == 25
+    finally:
+        handler.close()
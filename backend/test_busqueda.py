@@ -0,0 +1,90 @@
+import io
+
+import pytest
+
+from app import indice_busqueda, precalentar_busqueda
+from busqueda import MAX_CARACTERES_DESCRIPCION, IndiceTrigramas, trigramas
+
+
+def producto(nombre, sku, descripcion=''):
+    return {'nombre': nombre, 'sku': sku, 'precio_costo': 1, 'precio_venta': 2,
+            'descripcion': descripcion}
+
+
+def buscar(client, q):
+    return [p['sku'] for p in client.get('/api/productos/buscar', query_string={'q': q}).get_json()['items']]
+
+
+@pytest.fixture(autouse=True)
+def indice_vacio():
+    # Cada test crea la base de nuevo: el índice del proceso no debe sobrevivir
+    indice_busqueda.indice = None
+
+
+def test_trigramas_normaliza_acentos_y_mayusculas():
+    assert trigramas('Café') == trigramas('cafe') == {'  c', ' ca', 'caf', 'afe', 'fe '}
+
+
+def test_busqueda_tolera_errores_y_ordena_por_relevancia(app, client):
+    client.post('/api/productos', json=producto('Tornillo de acero', 'TOR-001'))
+    client.post('/api/productos', json=producto('Tuerca', 'TUE-001', 'Para tornillo de acero'))
+    client.post('/api/productos', json=producto('Martillo', 'MAR-001'))
+
+    assert buscar(client, 'tornilo') == ['TOR-001', 'TUE-001']
+    assert buscar(client, 'torn') == ['TOR-001', 'TUE-001']
+    assert buscar(client, 'tor-001')[0] == 'TOR-001'
+    assert buscar(client, 'xyz') == []
+    assert client.get('/api/productos/buscar').status_code == 400
+
+
+def test_indice_se_mantiene_en_cada_escritura(app, client, admin_headers):
+    headers = admin_headers
+    client.post('/api/productos', json=producto('Tornillo', 'TOR-001'))
+    client.post('/api/productos', json=producto('Martillo', 'MAR-001'))
+    assert buscar(client, 'martillo') == ['MAR-001']
+
+    client.put('/api/productos/2', json=producto('Destornillador', 'DES-001'), headers=headers)
+    assert buscar(client, 'martillo') == []
+    assert buscar(client, 'destornillador')[0] == 'DES-001'
+
+    client.delete('/api/productos/1', headers=headers)
+    assert 'TOR-001' not in buscar(client, 'tornillo')
+
+    contenido = "nombre,sku,precio_costo,precio_venta\nMartillo grande,MAR-002,1,2\n"
+    client.post('/api/productos/import', data={'archivo': (io.BytesIO(contenido.encode()), 'p.csv')},
+                headers=headers, content_type='multipart/form-data')
+    assert buscar(client, 'martillo grande')[0] == 'MAR-002'
+
+
+def test_indice_incremental_equivale_a_cargarlo_de_cero():
+    productos = {1: ('Tornillo', 'TOR-1', ''), 2: ('Tuerca', 'TUE-1', 'para tornillo'),
+                 3: ('Martillo', 'MAR-1', '')}
+    incremental = IndiceTrigramas()
+    incremental.cargar([(1, *productos[1]), (2, *productos[2])])
+    incremental.buscar('tornillo', 10, 0.4)
+    incremental.actualizar(3, productos[3])
+    incremental.actualizar(2, ('Tuerca', 'TUE-1', 'para martillo'))
+    incremental.actualizar(1, None)
+    productos[2] = ('Tuerca', 'TUE-1', 'para martillo')
+    del productos[1]
+
+    completo = IndiceTrigramas()
+    completo.cargar([(i, *texto) for i, texto in productos.items()])
+    for q in ('tornillo', 'martillo', 'tuerca', 'tue-1'):
+        assert incremental.buscar(q, 10, 0.4) == completo.buscar(q, 10, 0.4)
+
+
+def test_precalentar_carga_el_indice_en_segundo_plano(app, client):
+    client.post('/api/productos', json=producto('Tornillo', 'TOR-001'))
+    indice_busqueda.indice = None
+    precalentar_busqueda().join(5)
+    assert len(indice_busqueda.indice) == 1
+    assert buscar(client, 'tornillo') == ['TOR-001']
+
+
+def test_indice_guarda_la_descripcion_recortada():
+    largo = 'x' * (MAX_CARACTERES_DESCRIPCION * 4)
+    indice = IndiceTrigramas()
+    indice.cargar([(1, 'Tornillo', 'TOR-1', largo)])
+    indice.actualizar(2, ('Tuerca', 'TUE-1', largo))
+    assert all(len(texto[2]) == MAX_CARACTERES_DESCRIPCION for texto in indice._textos.values())
@@ -0,0 +1,52 @@
+import time
+
+from app import db, Categoria, Producto, catalogo_cache, incrementar_versiones_cache, leer_versiones_cache
+
+
+def test_lista_de_categorias_se_sirve_desde_cache(client):
+    catalogo_cache.cache.clear()
+    db.session.add(Categoria(nombre_categoria='A'))
+    db.session.commit()
+
+    assert len(client.get('/api/categorias').get_json()) == 1
+    hits = catalogo_cache.cache.hits
+    assert len(client.get('/api/categorias').get_json()) == 1
+    assert catalogo_cache.cache.hits == hits + 1
+
+
+def test_otro_worker_ve_la_invalidacion_por_version(client):
+    catalogo_cache.cache.clear()
+    db.session.add(Categoria(nombre_categoria='A'))
+    db.session.commit()
+    assert [c['nombre_categoria'] for c in client.get('/api/categorias').get_json()] == ['A']
+
+    # Escritura hecha por otro proceso: solo cambia la versión en la base
+    db.session.add(Categoria(nombre_categoria='B'))
+    db.session.commit()
+    incrementar_versiones_cache(['categoria'])
+    catalogo_cache._ultimo_chequeo = time.monotonic()
+    assert len(client.get('/api/categorias').get_json()) == 1
+
+    # Pasado el intervalo de chequeo se relee la versión
+    catalogo_cache._ultimo_chequeo = 0.0
+
+    assert len(client.get('/api/categorias').get_json()) == 2
+
+
+def test_stock_del_detalle_no_sale_de_la_cache(client):
+    catalogo_cache.cache.clear()
+    db.session.add(Producto(nombre='P', sku='P-1', precio_costo=1, precio_venta=2, cantidad=5))
+    db.session.commit()
+    assert client.get('/api/productos/1').get_json()['cantidad'] == 5
+    versiones = leer_versiones_cache()
+
+    client.post('/api/movimientos', json={'producto_id': 1, 'tipo': 'venta', 'cantidad': 2})
+    hits = catalogo_cache.cache.hits
+    assert client.get('/api/productos/1').get_json()['cantidad'] == 3
+    # La ficha sigue en caché y el movimiento no tocó la fila de versiones
+    assert catalogo_cache.cache.hits == hits + 1
+    assert leer_versiones_cache() == versiones
+
+
+def test_detalle_de_producto_inexistente(client):
+    assert client.get('/api/productos/999').status_code == 404
@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError
+
+from concurrencia import QueuePoolMedido, opciones_engine, perfil_desde_env, stats_pool
+
+
+def test_pool_dimensionado_con_los_hilos_del_perfil(monkeypatch):
+    monkeypatch.setenv('GUNICORN_WORKER_CLASS', 'gthread')
+    monkeypatch.setenv('GUNICORN_THREADS', '8')
+    opciones = opciones_engine('postgresql://u:p@db/inventario', perfil_desde_env())
+    assert opciones['pool_size'] == 8 and opciones['pool_pre_ping']
+    monkeypatch.setenv('GUNICORN_WORKER_CLASS', 'sync')
+    assert opciones_engine('postgresql://u:p@db/inventario', perfil_desde_env())['pool_size'] == 1
+    assert opciones_engine('sqlite://', perfil_desde_env()) == {}
+    monkeypatch.setenv('GUNICORN_WORKER_CLASS', 'eventlet')
+    with pytest.raises(ValueError):
+        perfil_desde_env()
+
+
+def test_stats_del_pool(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePoolMedido,
+                           pool_size=1, max_overflow=1, pool_timeout=0.05)
+    conexiones = [engine.connect(), engine.connect()]
+    stats = stats_pool(engine)
+    assert (stats['en_uso'], stats['desborde'], stats['esperas']) == (2, 1, 2)
+    with pytest.raises(TimeoutError):
+        engine.connect()
+    for conexion in conexiones:
+        conexion.close()
+    stats = stats_pool(engine)
+    assert stats['en_uso'] == 0 and stats['timeouts'] == 1 and stats['espera_maxima_ms'] >= 50
+    engine.dispose()
+
+
+def test_endpoint_pool(client):
+    respuesta = client.get('/api/health/pool')
+    assert respuesta.status_code == 200 and 'pid' in respuesta.get_json()
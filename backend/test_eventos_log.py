@@ -0,0 +1,45 @@
+import logging
+
+from logging_config import StructuredLogger, sampling_from_env
+
+
+def evaluar_nunca():
+    raise AssertionError("el payload no debía construirse")
+
+
+def test_payload_perezoso_y_campo_type(caplog):
+    logger = logging.getLogger('test_eventos')
+    logger.setLevel(logging.INFO)
+    eventos = StructuredLogger(logger)
+    with caplog.at_level(logging.INFO, logger='test_eventos'):
+        eventos.debug('product_get', evaluar_nunca, evaluar_nunca)
+        eventos.info('product_get', lambda: "Obteniendo producto 1", lambda: {'product_id': 1},
+                     detalle=evaluar_nunca)
+    registro, = caplog.records
+    assert registro.getMessage() == "Obteniendo producto 1"
+    assert (registro.type, registro.product_id) == ('product_get', 1)
+    assert registro.funcName == 'test_payload_perezoso_y_campo_type'
+
+    with caplog.at_level(logging.DEBUG, logger='test_eventos'):
+        eventos.info('auth', "Validando", detalle=lambda: {'headers': {'Accept': '*/*'}})
+    assert caplog.records[-1].headers == {'Accept': '*/*'}
+
+
+def test_muestreo_por_tipo(caplog, monkeypatch):
+    monkeypatch.setenv('LOG_SAMPLING', 'product_list=0, auth=1')
+    logger = logging.getLogger('test_eventos_muestreo')
+    eventos = StructuredLogger(logger, sampling_from_env())
+    with caplog.at_level(logging.INFO, logger='test_eventos_muestreo'):
+        for _ in range(50):
+            eventos.info('product_list', evaluar_nunca)
+        eventos.info('auth', "Validando")
+        eventos.info('product_get', "Sin muestreo")
+    assert [r.type for r in caplog.records] == ['auth', 'product_get']
+    assert caplog.records[0].sample_rate == 1.0 and not hasattr(caplog.records[1], 'sample_rate')
+
+
+def test_404_no_expone_cabeceras_sensibles(client, caplog):
+    with caplog.at_level(logging.DEBUG):
+        client.get('/api/no-existe', headers={'Authorization': 'Bearer secreto', 'X-Trace': 'abc'})
+    registro, = [r for r in caplog.records if getattr(r, 'type', None) == 'not_found']
+    assert registro.headers['Authorization'] == '***' and registro.headers['X-Trace'] == 'abc'
@@ -0,0 +1,70 @@
+import csv
+import io
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import app as modulo_app
+from app import db, Categoria, Producto, EXPORT_COLUMNAS, schema_export_productos
+
+
+def crear_productos(n):
+    categoria = Categoria(nombre_categoria='Ferretería')
+    db.session.add(categoria)
+    db.session.flush()
+    db.session.add_all([
+        Producto(nombre=f'Producto {i}', sku=f'SKU-{i}', precio_costo='1.25', precio_venta=2,
+                 descripcion='Con "comillas", y comas' if i == 0 else None, cantidad=i,
+                 categoria_id=categoria.id if i % 2 else None)
+        for i in range(n)
+    ])
+    db.session.commit()
+
+
+def test_exportacion_parquet(client, monkeypatch):
+    # Bloques chicos: cada uno es un row group distinto
+    monkeypatch.setattr(modulo_app, 'EXPORT_CHUNK', 4)
+    crear_productos(10)
+    respuesta = client.get('/api/productos/export?formato=parquet')
+    assert respuesta.status_code == 200
+    assert respuesta.is_streamed
+    assert respuesta.mimetype == 'application/vnd.apache.parquet'
+    assert respuesta.headers['Content-Disposition'] == 'attachment; filename=productos.parquet'
+
+    archivo = pq.ParquetFile(pa.BufferReader(respuesta.get_data()))
+    assert archivo.schema_arrow == schema_export_productos()
+    assert archivo.metadata.num_rows == 10
+    assert archivo.num_row_groups == 3
+
+    filas = archivo.read().to_pylist()
+    assert [fila['id'] for fila in filas] == list(range(1, 11))
+    assert filas[0]['precio_costo'] == Decimal('1.25')
+    assert filas[0]['precio_venta'] == Decimal('2.00')
+    assert filas[0]['descripcion'] == 'Con "comillas", y comas'
+    assert filas[0]['categoria'] is None and filas[1]['categoria'] == 'Ferretería'
+
+
+def test_exportacion_parquet_vacia(client):
+    respuesta = client.get('/api/productos/export?formato=parquet')
+    assert respuesta.status_code == 200
+    tabla = pq.read_table(pa.BufferReader(respuesta.get_data()))
+    assert tabla.schema == schema_export_productos()
+    assert tabla.num_rows == 0
+
+
+def test_exportacion_csv(client):
+    crear_productos(10)
+    respuesta = client.get('/api/productos/export')
+    assert respuesta.status_code == 200
+    assert respuesta.mimetype == 'text/csv'
+    filas = list(csv.reader(io.StringIO(respuesta.get_data(as_text=True))))
+    assert filas[0] == EXPORT_COLUMNAS
+    assert len(filas) == 11
+    assert filas[1][EXPORT_COLUMNAS.index('descripcion')] == 'Con "comillas", y comas'
+
+
+def test_exportacion_formato_desconocido(client):
+    respuesta = client.get('/api/productos/export?formato=xlsx')
+    assert respuesta.status_code == 400
+    assert respuesta.get_json() == {'error': 'Formato no soportado'}
@@ -0,0 +1,117 @@
+from datetime import datetime
+
+from app import (db, Categoria, MovimientoInventario, OrdenCompra, OrdenCompraItem, Producto,
+                 Proveedor)
+
+
+def crear_datos():
+    categoria = Categoria(nombre_categoria='Ferretería')
+    proveedor = Proveedor(nombre='Proveedor A')
+    db.session.add_all([categoria, proveedor])
+    db.session.flush()
+    productos = [
+        Producto(nombre=f'Producto {i:02d}', sku=f'SKU-{i:02d}', precio_costo='1.25', precio_venta='2.50',
+                 descripcion='Texto largo ' * 50, cantidad=i, categoria_id=categoria.id)
+        for i in range(12)
+    ]
+    db.session.add_all(productos)
+    db.session.flush()
+    for i in range(3):
+        orden = OrdenCompra(proveedor_id=proveedor.id, total='7.50')
+        for producto in productos[i:i + 2]:
+            orden.items.append(OrdenCompraItem(producto_id=producto.id, cantidad=3,
+                                               precio_unitario='1.25', subtotal='3.75'))
+        db.session.add(orden)
+    db.session.add_all([
+        MovimientoInventario(producto_id=productos[0].id, tipo='venta', cantidad=2,
+                             usuario=None, fecha=datetime(2026, 3, 1, 10)),
+        MovimientoInventario(producto_id=productos[1].id, tipo='uso', cantidad=1,
+                             usuario='ana', fecha=datetime(2026, 3, 2, 11)),
+    ])
+    db.session.commit()
+
+
+def test_productos_solo_columnas_pedidas(client, capturar_sentencias):
+    crear_datos()
+    with capturar_sentencias() as sentencias:
+        respuesta = client.get('/api/productos?fields=id,nombre,sku,cantidad')
+    assert respuesta.status_code == 200
+    items = respuesta.get_json()['items']
+    assert len(items) == 12
+    assert items[0] == {'id': 1, 'nombre': 'Producto 00', 'sku': 'SKU-00', 'cantidad': 0}
+    sql = ' '.join(sentencias).lower()
+    assert 'descripcion' not in sql and 'categoria' not in sql
+
+
+def test_productos_con_categoria_hace_join(client, capturar_sentencias):
+    crear_datos()
+    completo = client.get('/api/productos').get_json()['items'][0]
+    with capturar_sentencias() as sentencias:
+        items = client.get('/api/productos?fields=categoria,precio_venta,fecha_creacion').get_json()['items']
+    assert 'JOIN categoria' in ' '.join(sentencias)
+    assert items[0] == {k: completo[k] for k in ('categoria', 'precio_venta', 'fecha_creacion')}
+
+
+def test_productos_cursor_con_fields(client):
+    crear_datos()
+    vistos = []
+    cursor = None
+    while True:
+        params = {'fields': 'sku', 'sort': '-nombre', 'limit': 5}
+        if cursor:
+            params['cursor'] = cursor
+        pagina = client.get('/api/productos', query_string=params).get_json()
+        assert all(list(item) == ['sku'] for item in pagina['items'])
+        vistos += [item['sku'] for item in pagina['items']]
+        cursor = pagina['next_cursor']
+        if not cursor:
+            break
+    assert vistos == [f'SKU-{i:02d}' for i in reversed(range(12))]
+
+
+def test_fields_invalidos(client):
+    assert client.get('/api/productos?fields=id,clave').status_code == 400
+    assert client.get('/api/productos?fields=,').status_code == 400
+    assert client.get('/api/ordenes-compra?fields=nombre').status_code == 400
+    assert client.get('/api/reportes/movimientos?fields=producto_id').status_code == 400
+
+
+def test_ordenes_proyectadas(client, capturar_sentencias):
+    crear_datos()
+    completas = client.get('/api/ordenes-compra').get_json()['items']
+    with capturar_sentencias() as sentencias:
+        items = client.get('/api/ordenes-compra?fields=id,total,estado').get_json()['items']
+    assert items == [{k: o[k] for k in ('id', 'total', 'estado')} for o in completas]
+    assert len(sentencias) == 1 and 'JOIN' not in sentencias[0]
+
+    with capturar_sentencias() as sentencias:
+        items = client.get('/api/ordenes-compra?fields=proveedor,items').get_json()['items']
+    assert items == [{k: o[k] for k in ('proveedor', 'items')} for o in completas]
+    assert len(sentencias) == 2
+
+
+def test_movimientos_proyectados(client, capturar_sentencias):
+    crear_datos()
+    with capturar_sentencias() as sentencias:
+        filas = client.get('/api/reportes/movimientos?fields=usuario,fecha').get_json()
+    assert filas == [{'fecha': '2026-03-02', 'usuario': 'ana'}, {'fecha': '2026-03-01', 'usuario': ''}]
+    assert 'JOIN' not in ' '.join(sentencias)
+
+    csv = client.get('/api/reportes/movimientos?formato=csv&fields=producto,cantidad').get_data(as_text=True)
+    assert csv.splitlines() == ['producto,cantidad', 'Producto 01,1', 'Producto 00,2']
+
+
+def test_estado_proyectado_usa_el_dia_de_cada_peticion(client, monkeypatch):
+    import app as modulo_app
+    proveedor = Proveedor(nombre='Proveedor B')
+    db.session.add(proveedor)
+    db.session.flush()
+    db.session.add(OrdenCompra(proveedor_id=proveedor.id, estado='pendiente', total=0,
+                               fecha_entrega=datetime(2026, 3, 10)))
+    db.session.commit()
+
+    monkeypatch.setattr(modulo_app, 'inicio_de_hoy', lambda: datetime(2026, 3, 10))
+    assert client.get('/api/ordenes-compra?fields=estado').get_json()['items'] == [{'estado': 'pendiente'}]
+    # Pasó la medianoche del día de entrega: la misma orden ya está vencida
+    monkeypatch.setattr(modulo_app, 'inicio_de_hoy', lambda: datetime(2026, 3, 11))
+    assert client.get('/api/ordenes-compra?fields=estado').get_json()['items'] == [{'estado': 'vencida'}]
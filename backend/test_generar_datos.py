@@ -0,0 +1,49 @@
+from argparse import Namespace
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from app import db, MovimientoInventario, OrdenCompra, OrdenCompraItem, Producto
+import generar_datos
+
+
+def generar(semilla):
+    args = Namespace(semilla=semilla, categorias=3, proveedores=4, productos=50, ordenes=20,
+                     items_por_orden=3, movimientos=500, dias=60, hasta=datetime(2026, 1, 1),
+                     sesgo=1.1, prefijo='Gen', chunk=64)
+    categorias = generar_datos.generar_categorias(args, semilla)
+    proveedores = generar_datos.generar_proveedores(args, semilla)
+    productos, costos, pesos = generar_datos.generar_productos(args, semilla, categorias)
+    generar_datos.generar_ordenes(args, semilla, proveedores, productos, costos, pesos)
+    generar_datos.generar_movimientos(args, semilla, productos, pesos)
+    return {
+        'productos': db.session.execute(select(Producto.nombre, Producto.sku, Producto.precio_costo)
+                                        .order_by(Producto.id)).all(),
+        'movimientos': db.session.execute(select(MovimientoInventario.producto_id, MovimientoInventario.fecha,
+                                                 MovimientoInventario.tipo, MovimientoInventario.cantidad)
+                                          .order_by(MovimientoInventario.id)).all(),
+        'ordenes': db.session.execute(select(OrdenCompra.total, OrdenCompra.estado)
+                                      .order_by(OrdenCompra.id)).all(),
+    }
+
+
+def test_misma_semilla_mismos_datos(app):
+    primera = generar(7)
+    db.drop_all()
+    db.create_all()
+    assert generar(7) == primera
+    db.drop_all()
+    db.create_all()
+    assert generar(8)['movimientos'] != primera['movimientos']
+
+
+def test_totales_y_fechas_consistentes(app):
+    datos = generar(1)
+    fechas = [m.fecha for m in datos['movimientos']]
+    assert len(fechas) == 500 and fechas == sorted(fechas)
+    assert datetime(2025, 11, 2) <= fechas[0] and fechas[-1] <= datetime(2026, 1, 1)
+    # El total de cada orden es la suma de sus items
+    sumas = dict(db.session.execute(select(OrdenCompraItem.orden_compra_id, func.sum(OrdenCompraItem.subtotal))
+                                    .group_by(OrdenCompraItem.orden_compra_id)).all())
+    for orden in OrdenCompra.query.all():
+        assert round(float(orden.total), 2) == round(float(sumas[orden.id]), 2)
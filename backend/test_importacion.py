@@ -0,0 +1,80 @@
+import io
+
+from app import db, Categoria, Producto
+
+
+def importar(client, headers, contenido, nombre='productos.csv'):
+    return client.post('/api/productos/import',
+                       data={'archivo': (io.BytesIO(contenido.encode()), nombre)},
+                       headers=headers,
+                       content_type='multipart/form-data')
+
+
+def test_importacion_inserta_actualiza_y_reporta_errores(app, client, admin_headers):
+    db.session.add(Categoria(nombre_categoria='A'))
+    db.session.add(Producto(nombre='Viejo', sku='SKU-1', precio_costo=1, precio_venta=2, cantidad=7))
+    db.session.commit()
+
+    contenido = (
+        "nombre,sku,precio_costo,precio_venta,categoria_id\n"
+        "Nuevo nombre,SKU-1,3.5,5,1\n"
+        "Producto 2,SKU-2,1,2,\n"
+        ",SKU-3,1,2,\n"
+        "Producto 4,SKU-4,-1,abc,\n"
+        "Producto 5,SKU-5,1,2,99\n"
+    )
+    respuesta = importar(client, admin_headers, contenido)
+    datos = respuesta.get_json()
+
+    assert respuesta.status_code == 200
+    assert datos['filas'] == 5
+    assert datos['importadas'] == 2
+    errores = {e['fila']: e['errores'] for e in datos['errores']}
+    assert errores[4] == {'nombre': 'Campo requerido'}
+    assert set(errores[5]) == {'precio_costo', 'precio_venta'}
+    assert errores[6] == {'categoria_id': 'Categoría inexistente'}
+
+    actualizado = Producto.query.filter_by(sku='SKU-1').one()
+    assert actualizado.nombre == 'Nuevo nombre'
+    assert float(actualizado.precio_costo) == 3.5
+    # cantidad no venía en el archivo: se conserva
+    assert actualizado.cantidad == 7
+    nuevo = Producto.query.filter_by(sku='SKU-2').one()
+    assert nuevo.cantidad == 0 and nuevo.umbral_reorden == 10
+    assert db.session.execute(db.text('SELECT COUNT(*) FROM producto_staging')).scalar() == 0
+
+
+def test_celdas_vacias(app, client, admin_headers):
+    db.session.add(Producto(nombre='Viejo', sku='SKU-1', precio_costo=1, precio_venta=2,
+                            descripcion='Original', cantidad=7, umbral_reorden=3))
+    db.session.commit()
+
+    contenido = (
+        "nombre,sku,precio_costo,precio_venta,descripcion,cantidad,umbral_reorden\n"
+        "Nuevo nombre,SKU-1,1,2,,,4\n"
+        "A,SKU-A,1,2,,,\n"
+    )
+    assert importar(client, admin_headers, contenido).get_json()['importadas'] == 2
+
+    # Producto existente: la celda vacía conserva el valor actual
+    existente = Producto.query.filter_by(sku='SKU-1').one()
+    assert existente.nombre == 'Nuevo nombre' and existente.umbral_reorden == 4
+    assert existente.cantidad == 7 and existente.descripcion == 'Original'
+    # Producto nuevo: los mismos valores por defecto que crear_producto
+    nuevo = Producto.query.filter_by(sku='SKU-A').one()
+    assert nuevo.cantidad == 0 and nuevo.umbral_reorden == 10 and nuevo.descripcion == ''
+    assert client.get('/api/reportes/resumen').get_json()['totales']['unidades'] == 7
+
+
+def test_sku_repetido_gana_la_ultima_fila(app, client, admin_headers):
+    contenido = (
+        "nombre,sku,precio_costo,precio_venta\n"
+        "Primero,SKU-1,1,2\n"
+        "Segundo,SKU-1,1,2\n"
+    )
+    assert importar(client, admin_headers, contenido).get_json()['importadas'] == 1
+    assert Producto.query.filter_by(sku='SKU-1').one().nombre == 'Segundo'
+
+
+def test_formato_no_soportado(app, client, admin_headers):
+    assert importar(client, admin_headers, 'x', nombre='productos.txt').status_code == 400
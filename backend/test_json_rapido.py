@@ -0,0 +1,87 @@
+import gzip
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from flask import jsonify
+
+import json_rapido
+from app import db, Producto
+from json_rapido import OrjsonProvider, StdlibProvider, elegir_codificacion
+
+
+def crear_productos(n):
+    db.session.add_all([
+        Producto(nombre=f'Producto {i}', sku=f'SKU-{i}', precio_costo=Decimal('1.25'),
+                 precio_venta=Decimal('2.50'), descripcion='Descripción de prueba ' * 3)
+        for i in range(n)
+    ])
+    db.session.commit()
+
+
+@pytest.mark.parametrize('proveedor', [OrjsonProvider, StdlibProvider])
+def test_decimal_y_fechas_sin_convertir(app, proveedor):
+    anterior = app.json
+    app.json = proveedor(app)
+    try:
+        with app.test_request_context():
+            respuesta = jsonify({'b': Decimal('10.50'), 'a': datetime(2025, 3, 1, 10, 30), 'c': date(2025, 3, 1)})
+        assert respuesta.get_data(as_text=True).strip() == \
+            '{"a":"2025-03-01T10:30:00","b":10.5,"c":"2025-03-01"}'
+        assert app.json.loads(app.json.dumps({'x': Decimal('1.5')})) == {'x': 1.5}
+    finally:
+        app.json = anterior
+
+
+def test_misma_salida_con_ambos_proveedores(app, client):
+    crear_productos(5)
+    orjson_ = client.get('/api/productos').get_json()
+    anterior = app.json
+    app.json = StdlibProvider(app)
+    try:
+        assert client.get('/api/productos').get_json() == orjson_
+    finally:
+        app.json = anterior
+
+
+def test_listado_comprimido_con_gzip(client):
+    crear_productos(30)
+    plano = client.get('/api/productos')
+    assert 'Content-Encoding' not in plano.headers
+    assert plano.headers['Vary'] == 'Accept-Encoding'
+
+    comprimido = client.get('/api/productos', headers={'Accept-Encoding': 'gzip'})
+    assert comprimido.headers['Content-Encoding'] == 'gzip'
+    assert int(comprimido.headers['Content-Length']) < len(plano.data)
+    assert gzip.decompress(comprimido.data) == plano.data
+
+
+def test_brotli_preferido_si_esta_disponible(client):
+    brotli = pytest.importorskip('brotli')
+    crear_productos(30)
+    respuesta = client.get('/api/productos', headers={'Accept-Encoding': 'gzip, deflate, br'})
+    assert respuesta.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(respuesta.data) == client.get('/api/productos').data
+
+
+def test_respuestas_chicas_no_se_comprimen(client):
+    respuesta = client.get('/api/health', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in respuesta.headers
+    assert respuesta.get_json() == {'status': 'healthy'}
+
+
+def test_exportacion_en_streaming_no_se_comprime(client):
+    crear_productos(30)
+    respuesta = client.get('/api/productos/export?formato=csv', headers={'Accept-Encoding': 'gzip'})
+    assert respuesta.status_code == 200
+    assert 'Content-Encoding' not in respuesta.headers
+
+
+def test_negociacion_accept_encoding(monkeypatch):
+    monkeypatch.setattr(json_rapido, 'brotli', None)
+    assert elegir_codificacion('gzip, br') == 'gzip'
+    assert elegir_codificacion('br') is None
+    assert elegir_codificacion('gzip;q=0, identity') is None
+    assert elegir_codificacion('*') == 'gzip'
+    assert elegir_codificacion('*, gzip;q=0') is None
+    assert elegir_codificacion(None) is None
@@ -0,0 +1,59 @@
+import time
+from datetime import datetime, timedelta
+
+import jwt
+
+from app import db, Categoria, jwt_cache
+
+
+def token(app, segundos=3600, secret=None):
+    payload = {
+        'user_id': 1,
+        'username': 'admin',
+        'rol': 'admin',
+        'exp': datetime.utcnow() + timedelta(seconds=segundos)
+    }
+    return jwt.encode(payload, secret or app.config['SECRET_KEY'], algorithm='HS256')
+
+
+def borrar_categoria(client, id, tk):
+    return client.delete(f'/api/categorias/{id}', headers={'Authorization': f'Bearer {tk}'})
+
+
+def test_token_verificado_se_sirve_desde_cache(app, client):
+    jwt_cache.clear()
+    db.session.add_all([Categoria(nombre_categoria='A'), Categoria(nombre_categoria='B')])
+    db.session.commit()
+    tk = token(app)
+    hits = jwt_cache.hits
+
+    assert borrar_categoria(client, 1, tk).status_code == 204
+    assert borrar_categoria(client, 2, tk).status_code == 204
+    assert jwt_cache.hits == hits + 1
+
+
+def test_rotar_secret_key_invalida_tokens_cacheados(app, client):
+    jwt_cache.clear()
+    db.session.add(Categoria(nombre_categoria='A'))
+    db.session.commit()
+    tk = token(app)
+    assert borrar_categoria(client, 99, tk).status_code == 404
+
+    original = app.config['SECRET_KEY']
+    app.config['SECRET_KEY'] = 'clave-rotada'
+    try:
+        assert borrar_categoria(client, 1, tk).status_code == 401
+    finally:
+        app.config['SECRET_KEY'] = original
+
+
+def test_token_firmado_con_otra_clave_no_se_acepta(app, client):
+    jwt_cache.clear()
+    tk = token(app, secret='otra-clave')
+    assert borrar_categoria(client, 1, tk).status_code == 401
+
+
+def test_entrada_caduca_con_el_token(app):
+    jwt_cache.clear()
+    jwt_cache.set(('s', 't'), {'rol': 'admin'}, expira=time.time() - 1)
+    assert jwt_cache.get(('s', 't')) is None
@@ -0,0 +1,150 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+import app as modulo_app
+import password_hashing
+from app import db, Usuario
+from password_hashing import (PasswordVerifier, VerificacionExpirada, VerificacionSaturada,
+                              verifier_from_env)
+
+
+def crear_usuario(password_hash):
+    db.session.add(Usuario(username='ana', password_hash=password_hash, rol='admin'))
+    db.session.commit()
+
+
+def ocupar(verificador, bloqueo):
+    """Hilo que ocupa el pool con un trabajo que dura hasta que se libere `bloqueo`."""
+    def trabajo():
+        try:
+            verificador._ejecutar(bloqueo.wait, 5)
+        except VerificacionExpirada:
+            pass
+    hilo = threading.Thread(target=trabajo)
+    hilo.start()
+    time.sleep(0.02)
+    return hilo
+
+
+def login(client, password='secreta'):
+    return client.post('/api/login', json={'username': 'ana', 'password': password})
+
+
+def test_login_rehashea_con_el_metodo_actual(client, monkeypatch):
+    verificador = PasswordVerifier(metodo='pbkdf2:sha256:2000')
+    monkeypatch.setattr(modulo_app, 'password_verifier', verificador)
+    crear_usuario(generate_password_hash('secreta', 'pbkdf2:sha256:1000'))
+
+    assert login(client, 'otra').status_code == 401
+    assert Usuario.query.one().password_hash.startswith('pbkdf2:sha256:1000$')
+
+    respuesta = login(client)
+    assert respuesta.status_code == 200 and respuesta.get_json()['token']
+    nuevo = Usuario.query.one().password_hash
+    assert nuevo.startswith('pbkdf2:sha256:2000$')
+
+    # Ya con el método actual no se vuelve a escribir
+    assert login(client).status_code == 200
+    assert Usuario.query.one().password_hash == nuevo
+
+
+def test_login_responde_503_con_la_cola_llena(client, monkeypatch):
+    verificador = PasswordVerifier(workers=1, max_pendientes=0, espera_admision=0.01,
+                                   metodo='pbkdf2:sha256:1000')
+    monkeypatch.setattr(modulo_app, 'password_verifier', verificador)
+    crear_usuario(generate_password_hash('secreta', 'pbkdf2:sha256:1000'))
+
+    bloqueo = threading.Event()
+    ocupado = ocupar(verificador, bloqueo)
+    try:
+        respuesta = login(client)
+        assert respuesta.status_code == 503
+        assert respuesta.headers['Retry-After'] == '1'
+        assert verificador.rechazadas == 1
+    finally:
+        bloqueo.set()
+        ocupado.join()
+    assert login(client).status_code == 200
+
+
+def test_timeout_responde_503_y_conserva_el_lugar_hasta_que_termina(client, monkeypatch):
+    verificador = PasswordVerifier(workers=1, max_pendientes=0, espera_admision=0.01,
+                                   timeout=0.05, metodo='pbkdf2:sha256:1000')
+    monkeypatch.setattr(modulo_app, 'password_verifier', verificador)
+    crear_usuario(generate_password_hash('secreta', 'pbkdf2:sha256:1000'))
+
+    bloqueo = threading.Event()
+    original = password_hashing.check_password_hash
+
+    def lenta(password_hash, password):
+        bloqueo.wait(5)
+        return original(password_hash, password)
+
+    monkeypatch.setattr(password_hashing, 'check_password_hash', lenta)
+    assert login(client).status_code == 503
+    assert verificador.expiradas == 1
+    # El hash sigue corriendo en el pool: su lugar en la admisión no se libera
+    with pytest.raises(VerificacionSaturada):
+        verificador.verify('x', 'y')
+
+    bloqueo.set()
+    monkeypatch.setattr(password_hashing, 'check_password_hash', original)
+    time.sleep(0.05)
+    assert login(client).status_code == 200
+
+
+def test_timeout_cancela_lo_que_no_empezo():
+    verificador = PasswordVerifier(workers=1, max_pendientes=1, espera_admision=0.01, timeout=0.05)
+    bloqueo = threading.Event()
+    ocupado = ocupar(verificador, bloqueo)
+    try:
+        # Espera en la cola detrás del hash bloqueado, vence y se cancela
+        with pytest.raises(VerificacionExpirada):
+            verificador._ejecutar(lambda: None)
+        # La cancelación devolvió su lugar: se admite otra espera (que también vence)
+        with pytest.raises(VerificacionExpirada):
+            verificador._ejecutar(lambda: None)
+    finally:
+        bloqueo.set()
+        ocupado.join()
+
+
+def test_logins_en_espera_dejan_un_hilo_libre(app, client, monkeypatch):
+    # Valores por defecto (2 + 8 admitidas) contra un worker gthread de 4 hilos
+    monkeypatch.setenv('LOGIN_ADMISSION_TIMEOUT', '0.05')
+    monkeypatch.setenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+    verificador = verifier_from_env(4)
+    assert verificador.max_admitidas == 3
+    assert verifier_from_env(1).max_admitidas == 1
+    monkeypatch.setattr(modulo_app, 'password_verifier', verificador)
+    crear_usuario(generate_password_hash('secreta', 'pbkdf2:sha256:1000'))
+
+    bloqueo = threading.Event()
+    original = password_hashing.check_password_hash
+
+    def lenta(password_hash, password):
+        bloqueo.wait(5)
+        return original(password_hash, password)
+
+    monkeypatch.setattr(password_hashing, 'check_password_hash', lenta)
+
+    def en_contexto(fn):
+        with app.app_context():
+            return fn()
+
+    # Los hilos de petición del worker: una ráfaga de logins y después otra ruta
+    with ThreadPoolExecutor(max_workers=4) as hilos:
+        logins = [hilos.submit(en_contexto, lambda: login(app.test_client()).status_code)
+                  for _ in range(6)]
+        otra = hilos.submit(en_contexto, lambda: app.test_client().get('/api/categorias').status_code)
+        # Se atiende mientras los logins admitidos siguen esperando su hash
+        terminadas, _ = wait([otra], timeout=2)
+        assert otra in terminadas and otra.result() == 200
+        assert not bloqueo.is_set()
+        bloqueo.set()
+        codigos = sorted(f.result() for f in logins)
+    assert codigos == [200] * 3 + [503] * 3
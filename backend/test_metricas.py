@@ -0,0 +1,29 @@
+from prometheus_client import REGISTRY
+
+from app import db, Categoria
+
+
+def valor(nombre, **etiquetas):
+    return REGISTRY.get_sample_value(nombre, etiquetas) or 0.0
+
+
+def test_latencia_y_sentencias_por_ruta(client):
+    db.session.add(Categoria(nombre_categoria='Herramientas'))
+    db.session.commit()
+    ruta = '/api/categorias/<int:id>'
+    antes = valor('http_request_duration_seconds_count', method='GET', route=ruta, status='200')
+    sentencias_antes = valor('db_statements_per_request_sum', route=ruta)
+
+    assert client.get('/api/categorias/1').status_code == 200
+    client.get('/api/no-existe')
+
+    assert valor('http_request_duration_seconds_count', method='GET', route=ruta, status='200') == antes + 1
+    assert valor('db_statements_per_request_sum', route=ruta) > sentencias_antes
+    assert valor('http_request_duration_seconds_count', method='GET', route='<sin ruta>', status='404') >= 1
+
+    respuesta = client.get('/api/metrics')
+    assert respuesta.status_code == 200
+    assert respuesta.content_type.startswith('text/plain')
+    texto = respuesta.get_data(as_text=True)
+    assert 'http_request_duration_seconds_bucket{' in texto
+    assert 'db_pool_checked_out' in texto
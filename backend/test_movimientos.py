@@ -0,0 +1,60 @@
+from app import db, MovimientoInventario, Producto
+
+
+def crear_producto(cantidad):
+    producto = Producto(nombre='Tornillo', sku='TOR', precio_costo=1, precio_venta=2,
+                        cantidad=cantidad, umbral_reorden=5)
+    db.session.add(producto)
+    db.session.commit()
+    return producto.id
+
+
+def mover(client, producto_id, tipo, cantidad):
+    return client.post('/api/movimientos', json={'producto_id': producto_id, 'tipo': tipo,
+                                                 'cantidad': cantidad, 'usuario': 'ana'})
+
+
+def stock(producto_id):
+    db.session.expire_all()
+    return db.session.get(Producto, producto_id).cantidad
+
+
+def test_entrada_y_salida(client):
+    producto_id = crear_producto(5)
+    respuesta = mover(client, producto_id, 'entrada', 10)
+    assert respuesta.status_code == 201
+    cuerpo = respuesta.get_json()
+    assert (cuerpo['producto'], cuerpo['tipo'], cuerpo['cantidad'], cuerpo['usuario']) == \
+        ('Tornillo', 'entrada', 10, 'ana')
+    assert stock(producto_id) == 15
+
+    respuesta = mover(client, producto_id, 'venta', 15)
+    assert respuesta.status_code == 201 and respuesta.get_json()['cantidad'] == 15
+    # Vender exactamente lo que hay deja el stock en cero
+    assert stock(producto_id) == 0
+    assert MovimientoInventario.query.count() == 2
+
+
+def test_stock_insuficiente_no_escribe_nada(client):
+    producto_id = crear_producto(3)
+    respuesta = mover(client, producto_id, 'venta', 4)
+    assert respuesta.status_code == 400
+    assert respuesta.get_json() == {'error': 'Stock insuficiente'}
+    assert stock(producto_id) == 3
+    assert MovimientoInventario.query.count() == 0
+
+
+def test_stock_nulo_cuenta_como_cero(client):
+    producto_id = crear_producto(None)
+    assert mover(client, producto_id, 'uso', 1).status_code == 400
+    assert mover(client, producto_id, 'entrada', 2).status_code == 201
+    assert stock(producto_id) == 2
+
+
+def test_producto_inexistente_y_tipo_invalido(client):
+    assert mover(client, 99, 'entrada', 1).status_code == 404
+    assert mover(client, 99, 'venta', 1).status_code == 404
+    producto_id = crear_producto(3)
+    assert mover(client, producto_id, 'regalo', 1).status_code == 400
+    assert stock(producto_id) == 3
+    assert MovimientoInventario.query.count() == 0
@@ -0,0 +1,75 @@
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+from app import db, MovimientoDiario, MovimientoInventario, Producto, reconstruir_movimientos_diarios
+
+
+def crear_productos():
+    db.session.add_all([
+        Producto(nombre='Tornillo', sku='TOR', precio_costo=1, precio_venta=2, cantidad=100, umbral_reorden=5),
+        Producto(nombre='Tuerca', sku='TUE', precio_costo=1, precio_venta=2, cantidad=100, umbral_reorden=5),
+    ])
+    db.session.commit()
+
+
+def test_agregado_se_mantiene_en_cada_movimiento(app, client, monkeypatch):
+    monkeypatch.setenv('API_TOKEN', 'token')
+    crear_productos()
+    client.post('/api/movimientos', json={'producto_id': 1, 'tipo': 'venta', 'cantidad': 3})
+    client.post('/api/movimientos', json={'producto_id': 1, 'tipo': 'venta', 'cantidad': 2})
+    client.post('/api/movimientos/batch', json=[
+        {'producto_id': 1, 'tipo': 'entrada', 'cantidad': 10},
+        {'producto_id': 2, 'tipo': 'venta', 'cantidad': 4},
+        {'producto_id': 2, 'tipo': 'venta', 'cantidad': 1},
+    ], headers={'X-API-Token': 'token'})
+
+    hoy = datetime.utcnow().date()
+    filas = {(f.producto_id, f.tipo): (f.cantidad, f.movimientos)
+             for f in MovimientoDiario.query.filter_by(dia=hoy)}
+    assert filas == {(1, 'venta'): (5, 2), (1, 'entrada'): (10, 1), (2, 'venta'): (5, 2)}
+    # El agregado incremental coincide con el recalculado desde cero
+    assert reconstruir_movimientos_diarios() == []
+
+
+def test_agregado_por_semana_y_mes(app, client):
+    crear_productos()
+    for dia, cantidad in ((date(2026, 3, 2), 1), (date(2026, 3, 8), 2),
+                          (date(2026, 3, 9), 4), (date(2026, 4, 1), 8)):
+        db.session.add(MovimientoInventario(producto_id=1, tipo='venta', cantidad=cantidad,
+                                            fecha=datetime.combine(dia, datetime.min.time())))
+    db.session.add(MovimientoInventario(producto_id=2, tipo='venta', cantidad=100,
+                                        fecha=datetime(2026, 3, 2, 15)))
+    db.session.commit()
+    # Movimientos cargados por fuera de la API: el agregado se repara
+    assert len(reconstruir_movimientos_diarios()) == 5
+    db.session.commit()
+
+    def serie(consulta):
+        respuesta = client.get(f'/api/reportes/movimientos/agregado?{consulta}')
+        assert respuesta.status_code == 200
+        return [(s['periodo'], s['cantidad'], s['movimientos']) for s in respuesta.get_json()['series']]
+
+    assert serie('granularidad=semana&producto_id=1') == [
+        ('2026-03-02', 3, 2), ('2026-03-09', 4, 1), ('2026-03-30', 8, 1)]
+    assert serie('granularidad=mes&producto_id=1') == [('2026-03-01', 7, 3), ('2026-04-01', 8, 1)]
+    assert serie('granularidad=dia&desde=2026-03-02&hasta=2026-03-02') == [('2026-03-02', 101, 2)]
+    assert client.get('/api/reportes/movimientos/agregado?granularidad=hora').status_code == 400
+
+    # Reparar desde una fecha solo toca esos días
+    db.session.get(MovimientoDiario, (1, date(2026, 4, 1), 'venta')).cantidad = 0
+    db.session.commit()
+    diferencias = reconstruir_movimientos_diarios(date(2026, 3, 15))
+    assert [(d['producto_id'], d['dia']) for d in diferencias] == [(1, '2026-04-01')]
+
+
+def test_reconstruir_omite_movimientos_sin_fecha_o_tipo(app):
+    crear_productos()
+    # Filas anteriores a la API, con las columnas nulas que permite el esquema
+    db.session.execute(text(
+        "INSERT INTO movimiento_inventario (producto_id, tipo, cantidad, fecha) VALUES "
+        "(1, 'venta', 2, '2026-03-02 10:00:00'), (1, 'venta', 5, NULL), (1, NULL, 7, '2026-03-02 11:00:00')"))
+    db.session.commit()
+    assert len(reconstruir_movimientos_diarios()) == 1
+    db.session.commit()
+    assert [(f.dia, f.tipo, f.cantidad) for f in MovimientoDiario.query] == [(date(2026, 3, 2), 'venta', 2)]
@@ -0,0 +1,71 @@
+import pytest
+
+from app import db, MovimientoInventario, Producto, MOVIMIENTOS_BATCH_MAX
+
+
+@pytest.fixture
+def token(monkeypatch):
+    monkeypatch.setenv('API_TOKEN', 'token')
+    return {'X-API-Token': 'token'}
+
+
+def crear_productos():
+    db.session.add_all([
+        Producto(nombre='Tornillo', sku='TOR', precio_costo=1, precio_venta=2, cantidad=5),
+        Producto(nombre='Tuerca', sku='TUE', precio_costo=1, precio_venta=2, cantidad=0),
+    ])
+    db.session.commit()
+
+
+def stock(producto_id):
+    db.session.expire_all()
+    return db.session.get(Producto, producto_id).cantidad
+
+
+def test_lote_con_exito_parcial_y_errores_por_linea(client, token):
+    crear_productos()
+    respuesta = client.post('/api/movimientos/batch', headers=token, json=[
+        {'producto_id': 1, 'tipo': 'venta', 'cantidad': 3},
+        {'producto_id': 1, 'tipo': 'venta', 'cantidad': 3},     # stock insuficiente (quedan 2)
+        {'producto_id': 2, 'tipo': 'entrada', 'cantidad': 4},
+        {'producto_id': 2, 'tipo': 'uso', 'cantidad': 4},       # usa la entrada anterior del lote
+        {'producto_id': 99, 'tipo': 'entrada', 'cantidad': 1},
+        {'producto_id': 1, 'tipo': 'regalo', 'cantidad': 1},
+        {'producto_id': 1, 'tipo': 'venta', 'cantidad': 0},
+        {'tipo': 'venta', 'cantidad': 1},
+        'no es un objeto',
+    ])
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.get_json()
+    assert cuerpo['registrados'] == 3 and cuerpo['rechazados'] == 6
+    assert [r['indice'] for r in cuerpo['resultados']] == list(range(9))
+    assert [r['estado'] for r in cuerpo['resultados']] == ['ok', 'error', 'ok', 'ok'] + ['error'] * 5
+    errores = {r['indice']: r['error'] for r in cuerpo['resultados'] if r['estado'] == 'error'}
+    assert errores[1] == 'Stock insuficiente'
+    assert errores[4] == 'Producto no encontrado'
+    assert errores[5] == 'Tipo de movimiento no válido'
+    assert errores[6] == 'La cantidad debe ser mayor que 0'
+    assert errores[7] == 'Campo requerido faltante: producto_id'
+    assert errores[8] == 'El movimiento debe ser un objeto'
+
+    assert stock(1) == 2 and stock(2) == 0
+    assert MovimientoInventario.query.count() == 3
+
+
+def test_lote_bloquea_y_actualiza_con_sentencias_fijas(client, token, capturar_sentencias):
+    crear_productos()
+    lote = [{'producto_id': 1 + i % 2, 'tipo': 'entrada', 'cantidad': 1} for i in range(200)]
+    with capturar_sentencias() as sentencias:
+        assert client.post('/api/movimientos/batch', headers=token, json=lote).get_json()['registrados'] == 200
+    lectura = next(s for s in sentencias if s.lstrip().startswith('SELECT') and 'FROM producto' in s)
+    assert 'ORDER BY producto.id' in lectura
+    assert len([s for s in sentencias if s.lstrip().startswith('UPDATE producto')]) == 1
+    assert stock(1) == 105 and stock(2) == 100
+
+
+def test_lote_invalido(client, token):
+    assert client.post('/api/movimientos/batch', headers=token, json={'otra': 1}).status_code == 400
+    assert client.post('/api/movimientos/batch', headers=token, json=[]).status_code == 400
+    lote = [{'producto_id': 1, 'tipo': 'entrada', 'cantidad': 1}] * (MOVIMIENTOS_BATCH_MAX + 1)
+    assert client.post('/api/movimientos/batch', headers=token, json=lote).status_code == 400
+    assert client.post('/api/movimientos/batch', json=lote[:1]).status_code == 401
@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta
+
+from app import db, OrdenCompra, OrdenCompraItem, Producto, Proveedor
+
+
+def crear_ordenes(n, items_por_orden=3, prefijo='A'):
+    proveedores = [Proveedor(nombre=f'Proveedor {prefijo}{i}') for i in range(3)]
+    productos = [
+        Producto(nombre=f'Producto {prefijo}{i}', sku=f'SKU-{prefijo}{i}', precio_costo=1, precio_venta=2)
+        for i in range(5)
+    ]
+    db.session.add_all(proveedores + productos)
+    db.session.flush()
+    for i in range(n):
+        orden = OrdenCompra(proveedor_id=proveedores[i % 3].id, total=0)
+        for j in range(items_por_orden):
+            orden.items.append(OrdenCompraItem(
+                producto_id=productos[(i + j) % 5].id,
+                cantidad=1,
+                precio_unitario=1,
+                subtotal=1
+            ))
+        db.session.add(orden)
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def test_listado_ordenes_numero_constante_de_sentencias(client, capturar_sentencias):
+    crear_ordenes(2)
+    with capturar_sentencias() as pocas:
+        respuesta = client.get('/api/ordenes-compra')
+    assert respuesta.status_code == 200
+    assert len(respuesta.get_json()['items']) == 2
+
+    crear_ordenes(40, items_por_orden=5, prefijo='B')
+    with capturar_sentencias() as muchas:
+        respuesta = client.get('/api/ordenes-compra')
+    ordenes = respuesta.get_json()['items']
+    assert len(ordenes) == 42
+    assert all(o['proveedor'] for o in ordenes)
+    assert all(item['producto'] for o in ordenes for item in o['items'])
+
+    assert len(muchas) == len(pocas) <= 2
+
+
+def test_detalle_orden_numero_constante_de_sentencias(client, capturar_sentencias):
+    crear_ordenes(1, items_por_orden=30)
+    with capturar_sentencias() as sentencias:
+        respuesta = client.get('/api/ordenes-compra/1')
+    assert respuesta.status_code == 200
+    assert len(respuesta.get_json()['items']) == 30
+    assert len(sentencias) <= 2
+
+
+def test_detalle_orden_inexistente(client):
+    assert client.get('/api/ordenes-compra/999').status_code == 404
+
+
+def test_filtro_por_estado_efectivo_y_conteos(client):
+    proveedores = [Proveedor(nombre='P1'), Proveedor(nombre='P2')]
+    db.session.add_all(proveedores)
+    db.session.flush()
+    ayer = datetime.now() - timedelta(days=1)
+    manana = datetime.now() + timedelta(days=1)
+    db.session.add_all([
+        OrdenCompra(proveedor_id=proveedores[0].id, estado='pendiente', fecha_entrega=ayer),
+        OrdenCompra(proveedor_id=proveedores[0].id, estado='pendiente', fecha_entrega=manana),
+        OrdenCompra(proveedor_id=proveedores[0].id, estado='pendiente'),
+        OrdenCompra(proveedor_id=proveedores[0].id, estado='completada', fecha_entrega=ayer),
+        OrdenCompra(proveedor_id=proveedores[1].id, estado='pendiente', fecha_entrega=ayer),
+    ])
+    db.session.commit()
+
+    vencidas = client.get('/api/ordenes-compra?estado=vencida').get_json()['items']
+    assert [o['id'] for o in vencidas] == [1, 5]
+    assert all(o['estado'] == 'vencida' for o in vencidas)
+    pendientes = client.get('/api/ordenes-compra?estado=pendiente&proveedor_id=1').get_json()['items']
+    assert [o['id'] for o in pendientes] == [2, 3]
+    assert client.get('/api/ordenes-compra?estado=otra').status_code == 400
+
+    assert client.get('/api/ordenes-compra/conteos').get_json() == {
+        'pendiente': 2, 'vencida': 2, 'completada': 1, 'cancelada': 0}
+    assert client.get('/api/ordenes-compra/conteos?proveedor_id=2').get_json()['vencida'] == 1
+
+
+def test_listado_ordenes_paginado_por_cursor(client):
+    crear_ordenes(5, items_por_orden=1)
+    ids = []
+    cursor = None
+    while True:
+        pagina = client.get('/api/ordenes-compra', query_string={'limit': 2, 'cursor': cursor or ''}).get_json()
+        ids += [o['id'] for o in pagina['items']]
+        cursor = pagina['next_cursor']
+        if not cursor:
+            break
+    assert ids == [1, 2, 3, 4, 5]
+
+
+def crear_catalogo(n):
+    proveedor = Proveedor(nombre='Distribuidor')
+    db.session.add(proveedor)
+    db.session.add_all([
+        Producto(nombre=f'Producto {i}', sku=f'SKU-{i}', precio_costo=1, precio_venta=2) for i in range(n)
+    ])
+    db.session.commit()
+    return proveedor.id
+
+
+def test_crear_orden_grande_sin_consulta_por_linea(app, client, admin_headers, capturar_sentencias):
+    proveedor_id = crear_catalogo(300)
+    items = [{'producto_id': i % 300 + 1, 'cantidad': 3, 'precio_unitario': 0.1} for i in range(600)]
+    with capturar_sentencias() as sentencias:
+        respuesta = client.post('/api/ordenes-compra', headers=admin_headers,
+                                json={'proveedor_id': proveedor_id, 'items': items})
+    assert respuesta.status_code == 201
+    orden = respuesta.get_json()
+    assert len(orden['items']) == 600
+    # 600 * 3 * 0.10 en Decimal, sin el error acumulado de sumar floats
+    assert orden['total'] == 180.0
+    assert str(db.session.get(OrdenCompra, orden['id']).total) == '180.00'
+    assert len(sentencias) < 20
+
+
+def test_crear_orden_productos_inexistentes(app, client, admin_headers):
+    proveedor_id = crear_catalogo(2)
+    respuesta = client.post('/api/ordenes-compra', headers=admin_headers, json={
+        'proveedor_id': proveedor_id,
+        'items': [{'producto_id': 1, 'cantidad': 1, 'precio_unitario': 1},
+                  {'producto_id': 7, 'cantidad': 1, 'precio_unitario': 1},
+                  {'producto_id': 9, 'cantidad': 1, 'precio_unitario': 1}]})
+    assert respuesta.status_code == 404
+    assert respuesta.get_json()['producto_ids'] == [7, 9]
+    assert OrdenCompra.query.count() == 0 and OrdenCompraItem.query.count() == 0
+
+
+def test_crear_orden_linea_invalida(app, client, admin_headers):
+    proveedor_id = crear_catalogo(1)
+    respuesta = client.post('/api/ordenes-compra', headers=admin_headers, json={
+        'proveedor_id': proveedor_id,
+        'items': [{'producto_id': 1, 'cantidad': 1, 'precio_unitario': 1},
+                  {'producto_id': 1, 'cantidad': 0, 'precio_unitario': 1}]})
+    assert respuesta.status_code == 400
+    assert 'Línea 1' in respuesta.get_json()['detalles']['items'][0]
+
+
+def test_actualizar_items_aplica_solo_diferencias(app, client, admin_headers, capturar_sentencias):
+    proveedor_id = crear_catalogo(4)
+    orden = client.post('/api/ordenes-compra', headers=admin_headers, json={
+        'proveedor_id': proveedor_id,
+        'items': [{'producto_id': 1, 'cantidad': 1, 'precio_unitario': 1},
+                  {'producto_id': 2, 'cantidad': 2, 'precio_unitario': 2},
+                  {'producto_id': 3, 'cantidad': 1, 'precio_unitario': 3}]}).get_json()
+    ids = {item['producto_id']: item['id'] for item in orden['items']}
+
+    with capturar_sentencias() as sentencias:
+        respuesta = client.put(f"/api/ordenes-compra/{orden['id']}", headers=admin_headers, json={
+            'items': [{'producto_id': 2, 'cantidad': 5, 'precio_unitario': 2},
+                      {'producto_id': 1, 'cantidad': 1, 'precio_unitario': 1},
+                      {'producto_id': 4, 'cantidad': 1, 'precio_unitario': 0.5}]})
+    assert respuesta.status_code == 200
+    items = {item['producto_id']: item for item in respuesta.get_json()['items']}
+    assert set(items) == {1, 2, 4}
+    # El item sin cambios y el modificado conservan su fila
+    assert items[1]['id'] == ids[1] and items[2]['id'] == ids[2]
+    assert items[2]['cantidad'] == 5 and items[2]['subtotal'] == 10.0
+    assert respuesta.get_json()['total'] == 11.5
+    escrituras = [s for s in sentencias if s.split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+    # DELETE del producto 3, UPDATE del 2, INSERT del 4 y UPDATE del total
+    assert len(escrituras) == 4
+
+
+def test_actualizar_items_producto_inexistente_no_modifica(app, client, admin_headers):
+    proveedor_id = crear_catalogo(1)
+    orden = client.post('/api/ordenes-compra', headers=admin_headers, json={
+        'proveedor_id': proveedor_id,
+        'items': [{'producto_id': 1, 'cantidad': 1, 'precio_unitario': 1}]}).get_json()
+    respuesta = client.put(f"/api/ordenes-compra/{orden['id']}", headers=admin_headers, json={
+        'estado': 'completada', 'items': [{'producto_id': 5, 'cantidad': 1, 'precio_unitario': 1}]})
+    assert respuesta.status_code == 404
+    assert client.get(f"/api/ordenes-compra/{orden['id']}").get_json() == orden
@@ -0,0 +1,80 @@
+import logging
+import os
+
+from sqlalchemy import create_engine, text
+
+from app import app as flask_app, perfilador
+import perfilado
+from perfilado import ConsultasLentas, Perfilador
+
+
+def test_perfil_a_pedido_de_un_admin(client, jwt_headers, tmp_path, monkeypatch):
+    monkeypatch.setattr(perfilador, 'directorio', str(tmp_path))
+    monkeypatch.setattr(perfilador, 'maximo', 2)
+    admin = jwt_headers('admin')
+
+    assert 'X-Profile-Id' not in client.get('/api/categorias').headers
+    # Un usuario sin rol de admin no puede pedir perfiles
+    assert 'X-Profile-Id' not in client.get('/api/categorias', headers={
+        'X-Profile': '1', **jwt_headers('usuario')}).headers
+
+    respuesta = client.get('/api/categorias', headers={'X-Profile': '1', 'X-Request-ID': 'req-1', **admin})
+    assert respuesta.headers['X-Profile-Id'] == 'req-1'
+    texto = client.get('/api/perfiles/req-1', headers=admin).get_data(as_text=True)
+    assert 'obtener_categorias' in texto
+    assert client.get('/api/perfiles/req-1?formato=pstats', headers=admin).status_code == 200
+    assert client.get('/api/perfiles/req-1', headers=jwt_headers('usuario')).status_code == 403
+
+    # El anillo conserva solo los más recientes
+    for _ in range(3):
+        client.get('/api/proveedores', headers={'X-Profile': '1', **admin})
+    listado = client.get('/api/perfiles', headers=admin).get_json()
+    assert len(listado) == 2 and listado[0]['ruta'] == '/api/proveedores'
+    assert client.get('/api/perfiles/req-1', headers=admin).status_code == 404
+
+
+def test_consultas_lentas_con_plan_y_ruta(caplog):
+    engine = create_engine('sqlite://')
+    ConsultasLentas(umbral_ms=0, umbral_explain_ms=0).instrumentar(engine)
+    with engine.connect() as conn:
+        conn.execute(text('CREATE TABLE t (id INTEGER PRIMARY KEY, nombre TEXT)'))
+        with flask_app.test_request_context('/api/reportes/movimientos'), caplog.at_level(logging.WARNING):
+            conn.execute(text('SELECT * FROM t WHERE nombre = :nombre'), {'nombre': 'x'}).fetchall()
+
+    registro, = [r for r in caplog.records
+                 if getattr(r, 'type', None) == 'slow_query' and r.sql.startswith('SELECT')]
+    assert registro.route == '/api/reportes/movimientos'
+    assert "'x'" in registro.params
+    assert 'SCAN' in registro.plan
+
+
+def test_consulta_lenta_con_cte_tambien_se_explica(caplog):
+    engine = create_engine('sqlite://')
+    ConsultasLentas(umbral_ms=0, umbral_explain_ms=0).instrumentar(engine)
+    with engine.connect() as conn:
+        conn.execute(text('CREATE TABLE t (id INTEGER PRIMARY KEY, nombre TEXT)'))
+        with caplog.at_level(logging.WARNING):
+            conn.execute(text('WITH x AS (SELECT * FROM t WHERE nombre = :nombre) SELECT * FROM x'),
+                         {'nombre': 'x'}).fetchall()
+
+    registro, = [r for r in caplog.records
+                 if getattr(r, 'type', None) == 'slow_query' and r.sql.startswith('WITH')]
+    assert 'SCAN' in registro.plan
+
+
+def test_perfil_borrado_por_otro_worker_se_omite(tmp_path, monkeypatch):
+    perfiles = Perfilador(str(tmp_path))
+    for i, perfil_id in enumerate(['a', 'b', 'c']):
+        ruta = tmp_path / f'{perfil_id}.json'
+        ruta.write_text('{"id": "%s"}' % perfil_id)
+        os.utime(ruta, (i, i))
+    scandir = os.scandir
+
+    def scandir_y_borrar(directorio):
+        # Otro worker recorta el anillo entre el listado y el stat
+        entradas = list(scandir(directorio))
+        (tmp_path / 'b.json').unlink()
+        return iter(entradas)
+
+    monkeypatch.setattr(perfilado.os, 'scandir', scandir_y_borrar)
+    assert perfiles._ordenados() == ['a', 'c']
@@ -0,0 +1,91 @@
+import pytest
+
+from app import db, Categoria, Producto, PRODUCTOS_LIMIT_MAX, encode_cursor
+
+
+def crear_productos():
+    herramientas = Categoria(nombre_categoria='Herramientas')
+    db.session.add(herramientas)
+    db.session.flush()
+    # Cantidades repetidas para probar el desempate por id en el cursor
+    for i, nombre in enumerate(['Tornillo', 'Tuerca', 'Martillo', 'Arandela', 'Taladro',
+                                'Clavo', 'Sierra', 'Lija', 'Cable', 'Enchufe']):
+        db.session.add(Producto(nombre=nombre, sku=f'SKU-{i}', precio_costo=1, precio_venta=2,
+                                cantidad=(i % 4) * 5, umbral_reorden=5,
+                                categoria_id=herramientas.id if i % 2 else None))
+    db.session.commit()
+
+
+def recorrer(client, **params):
+    """Todas las páginas de /api/productos siguiendo next_cursor."""
+    items, cursor = [], None
+    while True:
+        pagina = client.get('/api/productos', query_string={**params, **({'cursor': cursor} if cursor else {})})
+        assert pagina.status_code == 200
+        cuerpo = pagina.get_json()
+        assert set(cuerpo) == {'items', 'next_cursor'}
+        items += cuerpo['items']
+        cursor = cuerpo['next_cursor']
+        if not cursor:
+            return items
+
+
+def test_primera_pagina_y_limit(client):
+    crear_productos()
+    cuerpo = client.get('/api/productos?limit=3').get_json()
+    assert [p['id'] for p in cuerpo['items']] == [1, 2, 3]
+    assert cuerpo['next_cursor']
+    assert client.get('/api/productos?limit=100').get_json()['next_cursor'] is None
+    assert client.get('/api/productos?limit=0').status_code == 400
+    assert client.get('/api/productos?limit=abc').status_code == 400
+
+
+@pytest.mark.parametrize('sort, clave', [
+    ('id', lambda p: p['id']),
+    ('nombre', lambda p: (p['nombre'], p['id'])),
+    ('-sku', lambda p: (p['sku'], p['id'])),
+    ('cantidad', lambda p: (p['cantidad'], p['id'])),
+    ('-cantidad', lambda p: (p['cantidad'], p['id'])),
+])
+def test_cursor_recorre_todo_sin_repetir_ni_saltear(client, sort, clave):
+    crear_productos()
+    items = recorrer(client, sort=sort, limit=3)
+    assert len(items) == 10 and len({p['id'] for p in items}) == 10
+    assert items == sorted(items, key=clave, reverse=sort.startswith('-'))
+
+
+def test_filtros(client):
+    crear_productos()
+    assert [p['nombre'] for p in recorrer(client, nombre='tu')] == ['Tuerca']
+    assert [p['sku'] for p in recorrer(client, sku='SKU-1')] == ['SKU-1']
+    en_categoria = recorrer(client, categoria_id=1)
+    assert [p['id'] for p in en_categoria] == [2, 4, 6, 8, 10]
+    assert all(p['categoria'] == 'Herramientas' for p in en_categoria)
+    bajo_stock = recorrer(client, bajo_stock='true', sort='nombre', limit=2)
+    assert bajo_stock and all(p['cantidad'] <= p['umbral_reorden'] for p in bajo_stock)
+    assert len(bajo_stock) == 6
+
+
+def test_cursor_de_otro_orden_es_rechazado(client):
+    crear_productos()
+    cursor = client.get('/api/productos?sort=-cantidad&limit=3').get_json()['next_cursor']
+    assert client.get(f'/api/productos?sort=-cantidad&cursor={cursor}').status_code == 200
+    for sort in ('nombre', 'cantidad', 'id'):
+        respuesta = client.get(f'/api/productos?sort={sort}&cursor={cursor}')
+        assert respuesta.status_code == 400
+        assert 'otro orden' in respuesta.get_json()['error']
+
+
+def test_parametros_invalidos(client):
+    assert client.get('/api/productos?sort=precio').status_code == 400
+    assert client.get('/api/productos?cursor=no-es-base64!').status_code == 400
+    assert client.get('/api/productos?cursor=' + encode_cursor([1, 2])).status_code == 400
+    assert client.get('/api/productos?cursor=' + encode_cursor(['id', 1, 'x'])).status_code == 400
+
+
+def test_limit_acotado_al_maximo(client):
+    db.session.add_all([Producto(nombre=f'P{i}', sku=f'P-{i}', precio_costo=1, precio_venta=2)
+                        for i in range(PRODUCTOS_LIMIT_MAX + 5)])
+    db.session.commit()
+    cuerpo = client.get(f'/api/productos?limit={PRODUCTOS_LIMIT_MAX * 2}').get_json()
+    assert len(cuerpo['items']) == PRODUCTOS_LIMIT_MAX and cuerpo['next_cursor']
@@ -0,0 +1,69 @@
+import json
+from datetime import datetime, timedelta
+
+import app as modulo_app
+from app import db, MovimientoInventario, Producto
+
+
+def crear_movimientos(n):
+    producto = Producto(nombre='Tornillo, 5mm', sku='TOR-5', precio_costo=1, precio_venta=2)
+    db.session.add(producto)
+    db.session.flush()
+    inicio = datetime(2026, 3, 1, 8)
+    db.session.add_all([
+        MovimientoInventario(producto_id=producto.id, tipo='venta' if i % 2 else 'entrada',
+                             cantidad=i + 1, usuario='ana' if i % 3 else None,
+                             fecha=inicio + timedelta(hours=i))
+        for i in range(n)
+    ])
+    db.session.commit()
+
+
+def test_reporte_csv_en_streaming(client, monkeypatch):
+    # Bloques chicos para que el cuerpo salga en varios trozos
+    monkeypatch.setattr(modulo_app, 'MOVIMIENTOS_CHUNK', 4)
+    crear_movimientos(10)
+    respuesta = client.get('/api/reportes/movimientos?formato=csv')
+    assert respuesta.status_code == 200
+    assert respuesta.is_streamed
+    assert respuesta.mimetype == 'text/csv'
+    assert respuesta.headers['Content-Disposition'] == 'attachment; filename=movimientos.csv'
+    assert 'Content-Length' not in respuesta.headers
+    trozos = list(respuesta.response)
+    assert len(trozos) > 1
+
+    lineas = b''.join(trozos).decode().splitlines()
+    assert lineas[0] == ','.join(modulo_app.MOVIMIENTOS_CAMPOS)
+    assert len(lineas) == 11
+    # El nombre con coma va entre comillas y el más reciente sale primero
+    assert lineas[1] == '2026-03-01,"Tornillo, 5mm",venta,10,'
+
+
+def test_reporte_ndjson_en_streaming(client, monkeypatch):
+    monkeypatch.setattr(modulo_app, 'MOVIMIENTOS_CHUNK', 4)
+    crear_movimientos(10)
+    respuesta = client.get('/api/reportes/movimientos?formato=ndjson')
+    assert respuesta.status_code == 200
+    assert respuesta.is_streamed
+    assert respuesta.mimetype == 'application/x-ndjson'
+    trozos = list(respuesta.response)
+    assert len(trozos) == 3
+
+    filas = [json.loads(linea) for linea in b''.join(trozos).decode().splitlines()]
+    assert len(filas) == 10
+    assert filas == client.get('/api/reportes/movimientos').get_json()
+    assert filas[-1] == {'producto': 'Tornillo, 5mm', 'tipo': 'entrada',
+                         'cantidad': 1, 'usuario': '', 'fecha': '2026-03-01'}
+
+
+def test_reporte_filtra_por_fecha(client):
+    crear_movimientos(48)
+    cuerpo = client.get('/api/reportes/movimientos?formato=ndjson&fecha_inicio=2026-03-02'
+                        '&fecha_fin=2026-03-02T23:59:59').get_data(as_text=True)
+    assert len(cuerpo.splitlines()) == 24
+
+
+def test_reporte_formato_invalido(client):
+    respuesta = client.get('/api/reportes/movimientos?formato=xml')
+    assert respuesta.status_code == 400
+    assert respuesta.get_json() == {'error': 'Formato no soportado'}
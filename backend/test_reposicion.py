@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from app import db, MovimientoInventario, OrdenCompra, OrdenCompraItem, Producto, Proveedor
+from reposicion import estadisticas_demanda
+
+# Los fillna sobre columnas object emiten FutureWarning en pandas 2.x
+pytestmark = pytest.mark.filterwarnings('error::FutureWarning')
+
+
+def test_estadisticas_cuentan_los_dias_sin_ventas_como_cero():
+    hoy = datetime(2026, 1, 31)
+    demanda = pd.DataFrame({'producto_id': [1, 1], 'dia': ['2026-01-30', '2026-01-20'],
+                            'cantidad': [10, 10]})
+    stats = estadisticas_demanda(demanda, hoy, dias_historia=10, dias_corto=5)
+    assert stats.loc[1, 'media'] == 1.0
+    assert stats.loc[1, 'media_corta'] == 2.0
+    # Un solo día con 10 y nueve días con 0
+    assert round(stats.loc[1, 'desviacion'], 4) == round(pd.Series([10] + [0] * 9).std(), 4)
+
+
+def test_sugerencias_agrupadas_por_proveedor(client):
+    proveedores = [Proveedor(nombre='Ferretería'), Proveedor(nombre='Pinturas')]
+    productos = [
+        Producto(nombre='Tornillo', sku='TOR', precio_costo=1, precio_venta=2, cantidad=5, umbral_reorden=10),
+        Producto(nombre='Pintura', sku='PIN', precio_costo=8, precio_venta=12, cantidad=100, umbral_reorden=10),
+        Producto(nombre='Brocha', sku='BRO', precio_costo=3, precio_venta=5, cantidad=2, umbral_reorden=5),
+        Producto(nombre='Lija', sku='LIJ', precio_costo=1, precio_venta=2, cantidad=0, umbral_reorden=3),
+    ]
+    db.session.add_all(proveedores + productos)
+    db.session.flush()
+    creada = datetime.now() - timedelta(days=30)
+    for proveedor, producto, precio in ((proveedores[0], productos[0], 0.9),
+                                        (proveedores[1], productos[1], 7.5),
+                                        (proveedores[1], productos[2], 2.5)):
+        orden = OrdenCompra(proveedor_id=proveedor.id, estado='completada', fecha_creacion=creada,
+                            fecha_entrega=creada + timedelta(days=5), total=0)
+        orden.items.append(OrdenCompraItem(producto_id=producto.id, cantidad=10,
+                                           precio_unitario=precio, subtotal=10 * precio))
+        db.session.add(orden)
+    # 3 tornillos por día durante 20 días; la brocha casi no se vende
+    ahora = datetime.now()
+    db.session.add_all(MovimientoInventario(producto_id=productos[0].id, tipo='venta', cantidad=3,
+                                            fecha=ahora - timedelta(days=d)) for d in range(1, 21))
+    db.session.add(MovimientoInventario(producto_id=productos[2].id, tipo='venta', cantidad=1,
+                                        fecha=ahora - timedelta(days=3)))
+    db.session.commit()
+
+    respuesta = client.get('/api/reposicion/sugerencias?dias=60&cobertura=14')
+    assert respuesta.status_code == 200
+    ordenes = {o['proveedor']: o for o in respuesta.get_json()['ordenes']}
+    assert set(ordenes) == {'Ferretería', 'Pinturas', None}
+
+    tornillo, = ordenes['Ferretería']['items']
+    assert tornillo['producto'] == 'Tornillo'
+    assert tornillo['precio_unitario'] == 0.9
+    # 60 unidades en los últimos 28 días
+    assert tornillo['demanda_diaria'] == round(60 / 28, 3)
+    # plazo de 5 días: demanda del plazo + stock de seguridad, más 14 días de cobertura
+    assert tornillo['punto_reorden'] > 60 / 28 * 5
+    assert tornillo['cantidad'] >= tornillo['punto_reorden'] + 60 / 28 * 14 - 5 - 1
+
+    brocha, = ordenes['Pinturas']['items']
+    assert brocha['producto'] == 'Brocha' and brocha['punto_reorden'] >= 5
+    # Sin historial de compras: precio de costo y sin proveedor
+    lija, = ordenes[None]['items']
+    assert lija['cantidad'] == 4 and lija['precio_unitario'] == 1.0
+
+    solo_pinturas = client.get(f'/api/reposicion/sugerencias?proveedor_id={proveedores[1].id}').get_json()
+    assert [o['proveedor'] for o in solo_pinturas['ordenes']] == ['Pinturas']
+    assert client.get('/api/reposicion/sugerencias?nivel_servicio=2').status_code == 400
+
+
+def test_sugerencias_sin_historial_de_compras(client):
+    db.session.add_all([
+        Producto(nombre='Tornillo', sku='TOR', precio_costo=1.5, precio_venta=2, cantidad=0, umbral_reorden=10),
+        Producto(nombre='Tuerca', sku='TUE', precio_costo=0.5, precio_venta=1, cantidad=50, umbral_reorden=10),
+    ])
+    db.session.commit()
+
+    respuesta = client.get('/api/reposicion/sugerencias')
+    assert respuesta.status_code == 200
+    orden, = respuesta.get_json()['ordenes']
+    assert orden['proveedor'] is None
+    tornillo, = orden['items']
+    assert tornillo['producto'] == 'Tornillo'
+    assert tornillo['precio_unitario'] == 1.5 and tornillo['en_camino'] == 0
@@ -0,0 +1,46 @@
+from app import db, Categoria, Producto, ResumenInventario, reconstruir_resumen
+
+
+def producto(nombre, categoria_id, cantidad, precio_costo=2, umbral=5):
+    return {'nombre': nombre, 'sku': nombre, 'precio_costo': precio_costo, 'precio_venta': 3,
+            'cantidad': cantidad, 'umbral_reorden': umbral, 'categoria_id': categoria_id}
+
+
+def test_resumen_se_mantiene_en_cada_escritura(app, client, monkeypatch, admin_headers):
+    monkeypatch.setenv('API_TOKEN', 'token')
+    db.session.add_all([Categoria(nombre_categoria='A'), Categoria(nombre_categoria='B')])
+    db.session.commit()
+    headers = admin_headers
+
+    client.post('/api/productos', json=producto('P1', 1, 10))
+    client.post('/api/productos', json=producto('P2', 1, 3))
+    client.post('/api/productos', json=producto('P3', None, 4, precio_costo=1.5))
+    client.post('/api/movimientos', json={'producto_id': 1, 'tipo': 'venta', 'cantidad': 6})
+    client.post('/api/movimientos/batch', json=[
+        {'producto_id': 2, 'tipo': 'entrada', 'cantidad': 10},
+        {'producto_id': 3, 'tipo': 'venta', 'cantidad': 1}
+    ], headers={'X-API-Token': 'token'})
+    client.put('/api/productos/2', json=producto('P2', 2, 13), headers=headers)
+    client.delete('/api/productos/3', headers=headers)
+
+    resumen = client.get('/api/reportes/resumen').get_json()
+    por_categoria = {c['categoria']: c for c in resumen['categorias']}
+    assert por_categoria['A'] == {'categoria_id': 1, 'categoria': 'A', 'productos': 1,
+                                  'unidades': 4, 'valor_total': 8.0, 'bajo_stock': 1}
+    assert por_categoria['B']['unidades'] == 13
+    assert resumen['totales']['productos'] == 2
+
+    # El resumen incremental coincide con el recalculado desde cero
+    assert reconstruir_resumen() == []
+
+
+def test_reconstruir_corrige_desvios(app):
+    db.session.add(Producto(nombre='P', sku='P', precio_costo=1, precio_venta=2,
+                            cantidad=3, umbral_reorden=5))
+    db.session.commit()
+
+    diferencias = reconstruir_resumen()
+    db.session.commit()
+    assert [d['categoria_clave'] for d in diferencias] == [0]
+    fila = db.session.get(ResumenInventario, 0)
+    assert (fila.productos, fila.unidades, fila.bajo_stock) == (1, 3, 1)
@@ -5,6 +5,7 @@ const API_URL = window.location.hostname === "localhost"
 const API_TOKEN = 'mi_token_api_super_seguro_456';  // Este token debe coincidir con el del backend
 
 let productosCargados = [];
+let productosNextCursor = null;
 
 // --- LOGIN Y ROLES ---
 const JWT_KEY = 'admin_jwt';
@@ -161,9 +162,31 @@ async function apiRequest(url, options = {}) {
     }
 }
 
-// Obtener productos
-async function obtenerProductos() {
-    return await apiRequest(`${API_URL}/productos`);
+// Obtener una página de productos (filtros y cursor se resuelven en el servidor)
+async function obtenerProductos(params = {}) {
+    const query = new URLSearchParams();
+    Object.entries(params).forEach(([clave, valor]) => {
+        if (valor !== undefined && valor !== null && valor !== '') query.append(clave, valor);
+    });
+    const qs = query.toString();
+    return await apiRequest(`${API_URL}/productos${qs ? '?' + qs : ''}`);
+}
+
+// Obtener todos los productos recorriendo las páginas del cursor
+async function obtenerTodosLosProductos(params = {}) {
+    let productos = [];
+    let cursor = null;
+    do {
+        const pagina = await obtenerProductos({ ...params, limit: 500, cursor });
+        productos = productos.concat(pagina.items);
+        cursor = pagina.next_cursor;
+    } while (cursor);
+    return productos;
+}
+
+// Obtener un producto por ID
+async function obtenerProducto(id) {
+    return await apiRequest(`${API_URL}/productos/${id}`);
 }
 
 // Crear producto
@@ -218,18 +241,50 @@ function mostrarProductos(productos) {
     updateUIForRole();
 }
 
-// Cargar productos
+// Filtros actuales del buscador de productos
+function filtrosProductos() {
+    return {
+        nombre: document.getElementById('searchNombre').value.trim(),
+        sku: document.getElementById('searchSKU').value.trim(),
+        categoria_id: document.getElementById('searchCategoria').value,
+        sort: 'nombre'
+    };
+}
+
+// Cargar productos (primera página con los filtros actuales)
 async function cargarProductos() {
     try {
-        const productos = await obtenerProductos();
-        productosCargados = productos;
-        mostrarProductos(productos);
+        const pagina = await obtenerProductos(filtrosProductos());
+        productosCargados = pagina.items;
+        productosNextCursor = pagina.next_cursor;
+        mostrarProductos(productosCargados);
+        actualizarBotonCargarMas();
         llenarSelectCategorias();
-        return productos;
+        return productosCargados;
+    } catch (error) {
+        showAlert('Error al cargar productos', 'danger');
+    }
+}
+
+// Cargar la siguiente página y añadirla a la tabla
+async function cargarMasProductos() {
+    if (!productosNextCursor) return;
+    try {
+        const pagina = await obtenerProductos({ ...filtrosProductos(), cursor: productosNextCursor });
+        productosCargados = productosCargados.concat(pagina.items);
+        productosNextCursor = pagina.next_cursor;
+        mostrarProductos(productosCargados);
+        actualizarBotonCargarMas();
     } catch (error) {
         showAlert('Error al cargar productos', 'danger');
     }
 }
+window.cargarMasProductos = cargarMasProductos;
+
+function actualizarBotonCargarMas() {
+    const boton = document.getElementById('btnCargarMasProductos');
+    if (boton) boton.style.display = productosNextCursor ? '' : 'none';
+}
 
 // Manejar envío de nuevo producto
 async function manejarNuevoProducto(event) {
@@ -260,9 +315,7 @@ async function manejarNuevoProducto(event) {
 // Editar producto
 async function editarProducto(id) {
     try {
-        const productos = await obtenerProductos();
-        const producto = productos.find(p => p.id === id);
-        if (!producto) throw new Error('Producto no encontrado');
+        const producto = await obtenerProducto(id);
         const form = document.getElementById('editarProductoForm');
 
         // Llenar el select de categorías y seleccionar la actual
@@ -334,20 +387,11 @@ document.getElementById('searchNombre').addEventListener('input', filtrarProduct
 document.getElementById('searchSKU').addEventListener('input', filtrarProductos);
 document.getElementById('searchCategoria').addEventListener('change', filtrarProductos);
 
-// 2. Función de filtrado
+// 2. Función de filtrado (el filtrado lo hace el servidor; se espera a que el usuario deje de escribir)
+let filtrarProductosTimeout = null;
 function filtrarProductos() {
-    const nombre = document.getElementById('searchNombre').value.toLowerCase();
-    const sku = document.getElementById('searchSKU').value.toLowerCase();
-    const categoria = document.getElementById('searchCategoria').value;
-
-    const filtrados = productosCargados.filter(producto => {
-        const coincideNombre = producto.nombre.toLowerCase().includes(nombre);
-        const coincideSKU = producto.sku && producto.sku.toLowerCase().includes(sku);
-        const coincideCategoria = !categoria || (producto.categoria_id && String(producto.categoria_id) === categoria);
-        return coincideNombre && coincideSKU && coincideCategoria;
-    });
-
-    mostrarProductos(filtrados);
+    clearTimeout(filtrarProductosTimeout);
+    filtrarProductosTimeout = setTimeout(cargarProductos, 300);
 }
 
 // 3. Llenar el select de categorías correctamente
@@ -355,10 +399,12 @@ async function llenarSelectCategorias() {
     try {
         const categorias = await obtenerCategorias();
         
-        // Llenar el select de búsqueda (por id)
+        // Llenar el select de búsqueda (por id), conservando el filtro elegido
         const selectBusqueda = document.getElementById('searchCategoria');
+        const seleccionada = selectBusqueda.value;
         selectBusqueda.innerHTML = '<option value="">Todas las categorías</option>' +
             categorias.map(cat => `<option value="${cat.id}">${cat.nombre_categoria}</option>`).join('');
+        selectBusqueda.value = seleccionada;
 
         // Llenar el select del formulario de nuevo producto (por id)
         const selectNuevoProducto = document.getElementById('categoria');
@@ -631,7 +677,7 @@ window.eliminarProveedor = eliminarProveedor;
 
 async function llenarSelectProductos(selectElement) {
     try {
-        const productos = await obtenerProductos();
+        const productos = await obtenerTodosLosProductos({ sort: 'nombre', fields: 'id,nombre' });
         console.log('Productos cargados:', productos);
         selectElement.innerHTML = '<option value="">Seleccione un producto</option>';
         productos.forEach(prod => {
@@ -717,9 +763,18 @@ async function crearOrdenCompraAPI(orden) {
     });
 }
 
-// Obtener órdenes de compra
-async function obtenerOrdenesCompra() {
-    return await apiRequest(`${API_URL}/ordenes-compra`);
+// Obtener órdenes de compra recorriendo las páginas del cursor
+async function obtenerOrdenesCompra(params = {}) {
+    let ordenes = [];
+    let cursor = null;
+    do {
+        const query = new URLSearchParams({ ...params, limit: 500 });
+        if (cursor) query.append('cursor', cursor);
+        const pagina = await apiRequest(`${API_URL}/ordenes-compra?${query.toString()}`);
+        ordenes = ordenes.concat(pagina.items);
+        cursor = pagina.next_cursor;
+    } while (cursor);
+    return ordenes;
 }
 
 function mostrarOrdenesCompra(ordenes) {
@@ -817,29 +872,26 @@ async function cambiarEstadoOrden(id, nuevoEstado) {
 
 async function cargarInventarioValorado() {
     try {
-        const response = await fetch(`${API_URL}/productos`);
-        if (!response.ok) throw new Error('Error al obtener productos');
-        const productos = await response.json();
+        // El resumen por categoría se mantiene en el servidor
+        const resumen = await apiRequest(`${API_URL}/reportes/resumen`);
 
         const tbody = document.getElementById('inventarioValoradoBody');
         const totalInventarioCell = document.getElementById('totalInventario');
         tbody.innerHTML = '';
-        let totalInventario = 0;
 
-        productos.forEach(producto => {
-            const valorTotal = producto.cantidad * producto.precio_costo;
-            totalInventario += valorTotal;
+        resumen.categorias.forEach(categoria => {
             const tr = document.createElement('tr');
             tr.innerHTML = `
-                <td>${producto.nombre}</td>
-                <td>${producto.cantidad}</td>
-                <td>$${producto.precio_costo.toFixed(2)}</td>
-                <td>$${valorTotal.toFixed(2)}</td>
+                <td>${categoria.categoria || 'Sin categoría'}</td>
+                <td>${categoria.productos}</td>
+                <td>${categoria.unidades}</td>
+                <td>${categoria.bajo_stock}</td>
+                <td>$${categoria.valor_total.toFixed(2)}</td>
             `;
             tbody.appendChild(tr);
         });
 
-        totalInventarioCell.textContent = `$${totalInventario.toFixed(2)}`;
+        totalInventarioCell.textContent = `$${resumen.totales.valor_total.toFixed(2)}`;
     } catch (error) {
         showAlert('Error al cargar inventario valorado', 'danger');
     }
@@ -1014,8 +1066,7 @@ document.addEventListener('DOMContentLoaded', () => {
         const select = document.getElementById('productoMovimiento');
         if (!select) return;
         try {
-            const response = await fetch(`${API_URL}/productos`);
-            const productos = await response.json();
+            const productos = await obtenerTodosLosProductos({ sort: 'nombre', fields: 'id,nombre' });
             select.innerHTML = productos.map(p =>
                 `<option value="${p.id}">${p.nombre}</option>`
             ).join('');